@@ -0,0 +1,46 @@
+"""per-domain and per-tenant aggregate totals
+
+Revision ID: add_aggregate_stats
+Revises: add_score_series
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.models import ScorePoint
+from app.services.aggregates import rebuild_aggregates
+
+# revision identifiers, used by Alembic.
+revision = "add_aggregate_stats"
+down_revision = "add_score_series"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "aggregate_stats",
+        sa.Column("scope", sa.String(), primary_key=True),
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("period", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("overall_sum", sa.Float(), nullable=False),
+        *[
+            column
+            for name in ScorePoint.SECTIONS
+            for column in (
+                sa.Column(f"{name}_sum", sa.Float(), nullable=False),
+                sa.Column(f"{name}_count", sa.Integer(), nullable=False),
+            )
+        ],
+        sa.Column("first_analysis_at", sa.DateTime(), nullable=False),
+        sa.Column("last_analysis_at", sa.DateTime(), nullable=False),
+    )
+    rebuild_aggregates(Session(bind=op.get_bind()))
+
+
+def downgrade() -> None:
+    op.drop_table("aggregate_stats")
@@ -0,0 +1,52 @@
+"""add canonical_url to analyses
+
+Revision ID: add_analyses_canonical_url
+Revises: create_anonymous_usage_table
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.canonical import canonicalize_url
+
+# revision identifiers, used by Alembic.
+revision = "add_analyses_canonical_url"
+down_revision = "create_anonymous_usage_table"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column("analyses", sa.Column("canonical_url", sa.String(), nullable=True))
+
+    # Backfill in id order, one batch at a time, so large tables never have to
+    # be held in memory
+    conn = op.get_bind()
+    last_id = ""
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, url FROM analyses WHERE id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            sa.text("UPDATE analyses SET canonical_url = :canonical WHERE id = :id"),
+            [{"id": row.id, "canonical": canonicalize_url(row.url)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    op.create_index("ix_analyses_canonical_url", "analyses", ["canonical_url"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analyses_canonical_url", "analyses")
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("canonical_url")
@@ -0,0 +1,35 @@
+"""page titles and a full-text search index over analyses
+
+Revision ID: add_analysis_search
+Revises: add_issue_index
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.models import ANALYSIS_SEARCH_DDL
+from app.services.search import rebuild_search_index
+
+# revision identifiers, used by Alembic.
+revision = "add_analysis_search"
+down_revision = "add_issue_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("analyses", sa.Column("title", sa.String(), nullable=True))
+    statements = ANALYSIS_SEARCH_DDL.get(op.get_bind().dialect.name)
+    if statements:
+        for statement in statements:
+            op.execute(statement)
+        rebuild_search_index(Session(bind=op.get_bind()))
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS analysis_search")
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("title")
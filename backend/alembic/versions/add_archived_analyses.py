@@ -0,0 +1,42 @@
+"""summary rows for analyses moved to archive files
+
+Revision ID: add_archived_analyses
+Revises: add_history_indexes
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "add_archived_analyses"
+down_revision = "add_history_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "archived_analyses",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("anonymous_id", sa.String(), nullable=False),
+        sa.Column("canonical_url", sa.String(), nullable=True),
+        sa.Column("overall_score", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archive", sa.String(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_archived_analyses_anonymous_id_created_at",
+        "archived_analyses",
+        ["anonymous_id", sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    # Archived records stay in their files but are no longer served by id
+    op.drop_index(
+        "ix_archived_analyses_anonymous_id_created_at", "archived_analyses"
+    )
+    op.drop_table("archived_analyses")
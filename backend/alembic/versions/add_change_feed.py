@@ -0,0 +1,48 @@
+"""commit-ordered change feed positions on analyses
+
+Revision ID: add_change_feed
+Revises: add_analysis_search
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "add_change_feed"
+down_revision = "add_analysis_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_sequences",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+    )
+    op.add_column("analyses", sa.Column("change_seq", sa.BigInteger(), nullable=True))
+
+    # Existing analyses enter the feed in the order they were created
+    op.execute(
+        "UPDATE analyses SET change_seq = numbered.seq FROM ("
+        "SELECT id, ROW_NUMBER() OVER (ORDER BY created_at, id) AS seq "
+        "FROM analyses) AS numbered WHERE numbered.id = analyses.id"
+    )
+    op.execute(
+        "INSERT INTO change_sequences (name, value) "
+        "SELECT 'analyses', COUNT(*) FROM analyses"
+    )
+    op.create_index(
+        "ix_analyses_anonymous_id_change_seq",
+        "analyses",
+        ["anonymous_id", "change_seq"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analyses_anonymous_id_change_seq", table_name="analyses")
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("change_seq")
+    op.drop_table("change_sequences")
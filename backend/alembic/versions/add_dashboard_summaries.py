@@ -0,0 +1,38 @@
+"""precomputed per-user dashboard summaries
+
+Revision ID: add_dashboard_summaries
+Revises: add_change_feed
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.services.dashboard import rebuild_dashboard_summaries
+
+# revision identifiers, used by Alembic.
+revision = "add_dashboard_summaries"
+down_revision = "add_change_feed"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dashboard_summaries",
+        sa.Column("anonymous_id", sa.String(), primary_key=True),
+        sa.Column("analysis_count", sa.BigInteger(), nullable=False),
+        sa.Column("overall_sum", sa.Float(), nullable=False),
+        sa.Column("best_score", sa.Float(), nullable=True),
+        sa.Column("worst_score", sa.Float(), nullable=True),
+        sa.Column("last_analysis_at", sa.DateTime(), nullable=True),
+        sa.Column("recent_scores", sa.JSON(), nullable=False),
+        sa.Column("quota_used", sa.BigInteger(), nullable=False),
+    )
+    rebuild_dashboard_summaries(Session(bind=op.get_bind()))
+
+
+def downgrade() -> None:
+    op.drop_table("dashboard_summaries")
@@ -0,0 +1,62 @@
+"""composite indexes for history and per-URL queries
+
+Revision ID: add_history_indexes
+Revises: postgres_jsonb_sections
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "add_history_indexes"
+down_revision = "postgres_jsonb_sections"
+branch_labels = None
+depends_on = None
+
+# The new indexes lead with anonymous_id and canonical_url, which makes the old
+# single-column indexes on those redundant
+INDEXES = {
+    "ix_analyses_anonymous_id_created_at": [
+        "anonymous_id",
+        sa.text("created_at DESC"),
+        sa.text("id DESC"),
+        "overall_score",
+        "result_hash",
+    ],
+    "ix_analyses_canonical_url_created_at": [
+        "canonical_url",
+        sa.text("created_at DESC"),
+    ],
+}
+REPLACED = {
+    "ix_analyses_anonymous_id": ["anonymous_id"],
+    "ix_analyses_canonical_url": ["canonical_url"],
+}
+
+
+def _swap(create: dict, drop: dict) -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking writes to analyses; CONCURRENTLY cannot run
+        # inside a transaction
+        with op.get_context().autocommit_block():
+            for name, columns in create.items():
+                op.create_index(
+                    name, "analyses", columns, postgresql_concurrently=True
+                )
+            for name in drop:
+                op.drop_index(name, "analyses", postgresql_concurrently=True)
+        return
+    for name, columns in create.items():
+        op.create_index(name, "analyses", columns)
+    for name in drop:
+        op.drop_index(name, "analyses")
+
+
+def upgrade() -> None:
+    _swap(INDEXES, REPLACED)
+
+
+def downgrade() -> None:
+    _swap(REPLACED, INDEXES)
@@ -0,0 +1,99 @@
+"""inverted index of reported issues with per-day counts
+
+Revision ID: add_issue_index
+Revises: add_score_sketches
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.models import Analysis, AnalysisResult
+from app.services.issues import record_issue_points, section_issues
+from app.services.persistence import load_sections
+
+# revision identifiers, used by Alembic.
+revision = "add_issue_index"
+down_revision = "add_score_sketches"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _backfill(session: Session) -> None:
+    # Archived analyses no longer have their issues in the database
+    sections = [name for name in AnalysisResult.SECTIONS if name != "recommendations"]
+    last_id = ""
+    while True:
+        rows = (
+            session.query(
+                Analysis.id,
+                Analysis.url,
+                Analysis.canonical_url,
+                Analysis.created_at,
+                Analysis.result_hash,
+            )
+            .filter(Analysis.id > last_id, Analysis.created_at.isnot(None))
+            .order_by(Analysis.id)
+            .limit(BATCH_SIZE)
+            .all()
+        )
+        if not rows:
+            return
+        results = load_sections(session, {row.result_hash for row in rows}, sections)
+        record_issue_points(
+            session,
+            [
+                {
+                    "analysis_id": row.id,
+                    "url": row.canonical_url or row.url,
+                    "created_at": row.created_at,
+                    "issues": section_issues(results.get(row.result_hash, {})),
+                }
+                for row in rows
+            ],
+        )
+        session.flush()
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "issue_codes",
+        sa.Column("code", sa.String(), primary_key=True),
+        sa.Column("section", sa.String(), nullable=False),
+        sa.Column("severity", sa.String(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "issue_daily_counts",
+        sa.Column("code", sa.String(), primary_key=True),
+        sa.Column("day", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "issue_occurrences",
+        sa.Column("code", sa.String(), primary_key=True),
+        sa.Column("analysis_id", sa.String(), primary_key=True),
+        sa.Column("domain", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_issue_occurrences_code_created_at",
+        "issue_occurrences",
+        ["code", "created_at"],
+    )
+    _backfill(Session(bind=op.get_bind()))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_issue_occurrences_code_created_at", "issue_occurrences")
+    op.drop_table("issue_occurrences")
+    op.drop_table("issue_daily_counts")
+    op.drop_table("issue_codes")
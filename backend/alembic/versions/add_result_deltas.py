@@ -0,0 +1,58 @@
+"""delta-encoded analysis results
+
+Revision ID: add_result_deltas
+Revises: compress_result_sections
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, joinedload, undefer
+
+from app.models import AnalysisResult
+
+# revision identifiers, used by Alembic.
+revision = "add_result_deltas"
+down_revision = "compress_result_sections"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing results all hold full sections and act as keyframes
+    with op.batch_alter_table("analysis_results") as batch_op:
+        batch_op.add_column(sa.Column("base_hash", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("delta", sa.LargeBinary(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_analysis_results_base_hash",
+            "analysis_results",
+            ["base_hash"],
+            ["hash"],
+        )
+    op.create_index(
+        "ix_analysis_results_base_hash", "analysis_results", ["base_hash"]
+    )
+
+
+def downgrade() -> None:
+    # Rewrite deltas as full keyframes before their columns go away
+    session = Session(bind=op.get_bind())
+    deltas = (
+        session.query(AnalysisResult)
+        .options(undefer("*"), joinedload(AnalysisResult.base).undefer("*"))
+        .filter(AnalysisResult.base_hash.isnot(None))
+        .all()
+    )
+    for result in deltas:
+        for name, value in result.sections().items():
+            setattr(result, name, value)
+        result.base_hash = None
+        result.delta = None
+    session.flush()
+
+    op.drop_index("ix_analysis_results_base_hash", "analysis_results")
+    with op.batch_alter_table("analysis_results") as batch_op:
+        batch_op.drop_constraint("fk_analysis_results_base_hash", type_="foreignkey")
+        batch_op.drop_column("delta")
+        batch_op.drop_column("base_hash")
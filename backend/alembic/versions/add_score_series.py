@@ -0,0 +1,118 @@
+"""per-URL score points with day and week rollups for trend charts
+
+Revision ID: add_score_series
+Revises: add_archived_analyses
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.models import Analysis, ArchivedAnalysis, ScorePoint
+from app.services.persistence import load_sections
+from app.services.trends import record_score_points, section_scores
+
+# revision identifiers, used by Alembic.
+revision = "add_score_series"
+down_revision = "add_archived_analyses"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+SECTIONS = ScorePoint.SECTIONS
+
+
+def _backfill(session: Session, model, with_sections: bool) -> None:
+    # Keyset batches by id; archived analyses only kept their overall score
+    last_id = ""
+    while True:
+        columns = [
+            model.id,
+            model.canonical_url,
+            model.created_at,
+            model.overall_score,
+        ]
+        if with_sections:
+            columns.append(model.result_hash)
+        rows = (
+            session.query(*columns)
+            .filter(
+                model.id > last_id,
+                model.canonical_url.isnot(None),
+                model.created_at.isnot(None),
+                model.overall_score.isnot(None),
+            )
+            .order_by(model.id)
+            .limit(BATCH_SIZE)
+            .all()
+        )
+        if not rows:
+            return
+        results = (
+            load_sections(session, {row.result_hash for row in rows}, list(SECTIONS))
+            if with_sections
+            else {}
+        )
+        record_score_points(
+            session,
+            [
+                {
+                    "analysis_id": row.id,
+                    "canonical_url": row.canonical_url,
+                    "created_at": row.created_at,
+                    "overall_score": row.overall_score,
+                    **section_scores(
+                        results.get(row.result_hash, {}) if with_sections else {}
+                    ),
+                }
+                for row in rows
+            ],
+        )
+        session.flush()
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "score_points",
+        sa.Column("analysis_id", sa.String(), primary_key=True),
+        sa.Column("canonical_url", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("overall_score", sa.Float(), nullable=False),
+        *[sa.Column(name, sa.Float(), nullable=True) for name in SECTIONS],
+    )
+    op.create_index(
+        "ix_score_points_canonical_url_created_at",
+        "score_points",
+        ["canonical_url", "created_at"],
+    )
+    op.create_table(
+        "score_rollups",
+        sa.Column("canonical_url", sa.String(), primary_key=True),
+        sa.Column("granularity", sa.String(), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("overall_sum", sa.Float(), nullable=False),
+        sa.Column("overall_min", sa.Float(), nullable=False),
+        sa.Column("overall_max", sa.Float(), nullable=False),
+        *[
+            column
+            for name in SECTIONS
+            for column in (
+                sa.Column(f"{name}_sum", sa.Float(), nullable=False),
+                sa.Column(f"{name}_count", sa.Integer(), nullable=False),
+            )
+        ],
+    )
+
+    session = Session(bind=op.get_bind())
+    _backfill(session, Analysis, with_sections=True)
+    _backfill(session, ArchivedAnalysis, with_sections=False)
+
+
+def downgrade() -> None:
+    op.drop_table("score_rollups")
+    op.drop_index("ix_score_points_canonical_url_created_at", "score_points")
+    op.drop_table("score_points")
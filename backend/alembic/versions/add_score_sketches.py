@@ -0,0 +1,74 @@
+"""score histograms per section and schema type for percentile ranks
+
+Revision ID: add_score_sketches
+Revises: add_aggregate_stats
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.models import Analysis, ArchivedAnalysis, ScorePoint
+from app.services.percentiles import ScorePercentiles
+from app.services.persistence import load_sections
+
+# revision identifiers, used by Alembic.
+revision = "add_score_sketches"
+down_revision = "add_aggregate_stats"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _backfill(session: Session) -> None:
+    # Every schema type seen so far, not just the first few hundred
+    percentiles = ScorePercentiles(max_schema_types=10**6)
+    for model in (Analysis, ArchivedAnalysis):
+        last_id = ""
+        while True:
+            columns = [model.id, model.overall_score]
+            if model is Analysis:
+                columns.append(model.result_hash)
+            rows = (
+                session.query(*columns)
+                .filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            # Archived analyses only kept their overall score
+            results = (
+                load_sections(
+                    session,
+                    {row.result_hash for row in rows},
+                    list(ScorePoint.SECTIONS),
+                )
+                if model is Analysis
+                else {}
+            )
+            for row in rows:
+                sections = results.get(row.result_hash, {}) if results else {}
+                percentiles.observe({"overall_score": row.overall_score, **sections})
+            last_id = rows[-1].id
+    percentiles.flush(session)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "score_sketches",
+        sa.Column("dimension", sa.String(), primary_key=True),
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("bins", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    _backfill(Session(bind=op.get_bind()))
+
+
+def downgrade() -> None:
+    op.drop_table("score_sketches")
@@ -0,0 +1,61 @@
+"""binary result sections and compression dictionaries
+
+Revision ID: compress_result_sections
+Revises: dedupe_analysis_results
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "compress_result_sections"
+down_revision = "dedupe_analysis_results"
+branch_labels = None
+depends_on = None
+
+SECTIONS = (
+    "crawlability",
+    "structured_data",
+    "content_structure",
+    "eeat",
+    "recommendations",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "compression_dictionaries",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+    # Existing JSON text becomes plain (uncompressed) JSON bytes; run
+    # `python -m tools.compress_results migrate --to zstd` to compress them
+    with op.batch_alter_table("analysis_results") as batch_op:
+        for name in SECTIONS:
+            batch_op.alter_column(
+                name,
+                type_=sa.LargeBinary(),
+                existing_type=sa.JSON(),
+                postgresql_using=f"convert_to({name}::text, 'UTF8')",
+            )
+
+
+def downgrade() -> None:
+    # Compressed rows must be decoded first with
+    # `python -m tools.compress_results migrate --to none`
+    with op.batch_alter_table("analysis_results") as batch_op:
+        for name in SECTIONS:
+            batch_op.alter_column(
+                name,
+                type_=sa.JSON(),
+                existing_type=sa.LargeBinary(),
+                postgresql_using=f"convert_from({name}, 'UTF8')::json",
+            )
+    op.drop_table("compression_dictionaries")
@@ -0,0 +1,117 @@
+"""store analysis results once, keyed by content hash
+
+Revision ID: dedupe_analysis_results
+Revises: add_analyses_canonical_url
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import json
+
+from app.models import AnalysisResult
+
+# revision identifiers, used by Alembic.
+revision = "dedupe_analysis_results"
+down_revision = "add_analyses_canonical_url"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+SECTIONS = AnalysisResult.SECTIONS
+
+results_table = sa.table(
+    "analysis_results",
+    sa.column("hash", sa.String()),
+    *[sa.column(name, sa.JSON()) for name in SECTIONS],
+)
+
+
+def _load(value):
+    # Raw SQLite reads return JSON text; drivers with a JSON type return objects
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_results",
+        sa.Column("hash", sa.String(), primary_key=True),
+        *[sa.Column(name, sa.JSON(), nullable=True) for name in SECTIONS],
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP")
+        ),
+    )
+    op.add_column("analyses", sa.Column("result_hash", sa.String(), nullable=True))
+
+    # Move every payload into analysis_results once, pointing each analysis at
+    # its hash, in id-ordered batches
+    conn = op.get_bind()
+    columns = ", ".join(SECTIONS)
+    last_id = ""
+    while True:
+        rows = conn.execute(
+            sa.text(
+                f"SELECT id, {columns} FROM analyses WHERE id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        payloads = {}
+        updates = []
+        for row in rows:
+            sections = {name: _load(row._mapping[name]) for name in SECTIONS}
+            key = AnalysisResult.content_hash(sections)
+            payloads.setdefault(key, sections)
+            updates.append({"id": row.id, "hash": key})
+
+        stored = {
+            row.hash
+            for row in conn.execute(
+                sa.select(results_table.c.hash).where(
+                    results_table.c.hash.in_(list(payloads))
+                )
+            )
+        }
+        new = [
+            {"hash": key, **sections}
+            for key, sections in payloads.items()
+            if key not in stored
+        ]
+        if new:
+            conn.execute(results_table.insert(), new)
+        conn.execute(
+            sa.text("UPDATE analyses SET result_hash = :hash WHERE id = :id"),
+            updates,
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table("analyses") as batch_op:
+        for name in SECTIONS:
+            batch_op.drop_column(name)
+        batch_op.alter_column("result_hash", nullable=False)
+        batch_op.create_foreign_key(
+            "fk_analyses_result_hash", "analysis_results", ["result_hash"], ["hash"]
+        )
+    op.create_index("ix_analyses_result_hash", "analyses", ["result_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analyses_result_hash", "analyses")
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_constraint("fk_analyses_result_hash", type_="foreignkey")
+        for name in SECTIONS:
+            batch_op.add_column(sa.Column(name, sa.JSON(), nullable=True))
+
+    for name in SECTIONS:
+        op.execute(
+            f"UPDATE analyses SET {name} = (SELECT {name} FROM analysis_results "
+            "WHERE analysis_results.hash = analyses.result_hash)"
+        )
+
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("result_hash")
+    op.drop_table("analysis_results")
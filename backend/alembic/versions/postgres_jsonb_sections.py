@@ -0,0 +1,41 @@
+"""store result sections as JSONB on PostgreSQL
+
+Revision ID: postgres_jsonb_sections
+Revises: add_result_deltas
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+from app.models import AnalysisResult
+
+# revision identifiers, used by Alembic.
+revision = "postgres_jsonb_sections"
+down_revision = "add_result_deltas"
+branch_labels = None
+depends_on = None
+
+# Expects sections as plain JSON bytes: any zstd-compressed rows must first be
+# rewritten with `python -m tools.compress_results migrate --to none`
+COLUMNS = AnalysisResult.SECTIONS + ("delta",)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name in COLUMNS:
+        op.execute(
+            f"ALTER TABLE analysis_results ALTER COLUMN {name} TYPE JSONB "
+            f"USING convert_from({name}, 'UTF8')::jsonb"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name in COLUMNS:
+        op.execute(
+            f"ALTER TABLE analysis_results ALTER COLUMN {name} TYPE BYTEA "
+            f"USING convert_to({name}::text, 'UTF8')"
+        )
@@ -2,13 +2,14 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from app.database import get_db
+from app.database import get_db, run_db
 from app.models import User, AnonymousUsage
 from app.schemas import UserCreate, UserResponse, TokenResponse
 from app.services.auth import (
     authenticate_user,
     create_user,
     create_access_token,
+    get_user_by_email,
     verify_token,
 )
 from app.config import settings
@@ -27,7 +28,7 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     """Sign up a new user"""
     logger.info(f"Attempting to create new user with email: {user_data.email}")
     try:
-        user = create_user(db, user_data)
+        user = await run_db(create_user, db, user_data)
         logger.info(f"Successfully created user with email: {user_data.email}")
         return user
     except HTTPException as e:
@@ -48,7 +49,9 @@ async def signin(
     """Sign in a user"""
     logger.info(f"Attempting to authenticate user: {form_data.username}")
     try:
-        user = authenticate_user(db, form_data.username, form_data.password)
+        user = await run_db(
+            authenticate_user, db, form_data.username, form_data.password
+        )
         if not user:
             logger.warning(f"Authentication failed for user: {form_data.username}")
             raise HTTPException(
@@ -103,7 +106,7 @@ async def get_current_user(
             )
 
         logger.info(f"Token verified for email: {email}")
-        user = db.query(User).filter(User.email == email).first()
+        user = await run_db(get_user_by_email, db, email)
 
         if not user:
             logger.error(f"No user found for verified email: {email}")
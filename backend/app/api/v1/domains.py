@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from sqlalchemy.orm import Session
+from app.database import get_db, run_db
+from app.services.aggregates import get_aggregate
+from app.services.canonical import url_domain
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MAX_STATS_DAYS = 366
+
+
+@router.get("/{domain}/stats")
+async def get_domain_stats(
+    domain: str,
+    days: int = Query(30, ge=1, le=MAX_STATS_DAYS),
+    db: Session = Depends(get_db),
+):
+    """
+    Average scores and analysis counts for a domain, all-time and per day over
+    the last `days` days, read from the incrementally maintained aggregates.
+    """
+    key = url_domain(domain)
+    if not key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid domain"
+        )
+    try:
+        stats = await run_db(get_aggregate, db, "domain", key, days)
+    except Exception as e:
+        logger.error(f"Error fetching stats for domain {key}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch domain stats: {str(e)}",
+        )
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No analyses of {key}",
+        )
+    return {"success": True, "data": stats}
@@ -2,15 +2,22 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from authlib.integrations.starlette_client import OAuth
-from app.database import get_db
+from app.database import get_db, run_db
 from app.config import settings
 from app.models import User
-from app.services.auth import create_access_token
+from app.services.auth import create_access_token, get_user_by_email
 import uuid
 import httpx
 
 router = APIRouter()
 
+
+def _create_google_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
 # Initialize OAuth
 oauth = OAuth()
 
@@ -70,7 +77,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             )
 
         # Check if user exists
-        user = db.query(User).filter(User.email == user_info["email"]).first()
+        user = await run_db(get_user_by_email, db, user_info["email"])
 
         if not user:
             # Create new user
@@ -81,9 +88,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 # We don't set password for Google users
                 hashed_password="GOOGLE_AUTH_USER",  # This prevents normal login
             )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+            await run_db(_create_google_user, db, user)
 
         # Create access token
         access_token = create_access_token(data={"sub": user.email})
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.database import get_db, run_db
+from app.services.issues import issue_report, top_issues
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MAX_TOP_K = 100
+MAX_ISSUE_DAYS = 366
+
+
+@router.get("/top")
+async def get_top_issues(
+    k: int = Query(10, ge=1, le=MAX_TOP_K),
+    days: Optional[int] = Query(None, ge=1, le=MAX_ISSUE_DAYS),
+    severity: Optional[str] = Query(None, pattern="^(fail|warn)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    The k most frequently reported issues across all analyses, all-time or
+    over the last `days` days, from the issue index maintained on write.
+    """
+    try:
+        issues = await run_db(top_issues, db, k, days, severity)
+    except Exception as e:
+        logger.error(f"Error fetching top issues: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch top issues: {str(e)}",
+        )
+    return {"success": True, "data": issues}
+
+
+@router.get("/{code}")
+async def get_issue(
+    code: str,
+    days: int = Query(30, ge=1, le=MAX_ISSUE_DAYS),
+    k: int = Query(10, ge=1, le=MAX_TOP_K),
+    db: Session = Depends(get_db),
+):
+    """
+    How often an issue was reported per day over the last `days` days, and
+    the k domains it was reported on most.
+    """
+    try:
+        report = await run_db(issue_report, db, code, days, k)
+    except Exception as e:
+        logger.error(f"Error fetching issue {code}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch issue: {str(e)}",
+        )
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown issue {code}"
+        )
+    return {"success": True, "data": report}
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.database import get_db, run_db
+from app.services.canonical import canonicalize_url
+from app.services.trends import score_trend
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+DEFAULT_TREND_DAYS = 90
+MAX_TREND_POINTS = 500
+
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC, so convert timezone-aware ones"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("")
+async def get_score_trend(
+    url: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(30, ge=1, le=MAX_TREND_POINTS),
+    db: Session = Depends(get_db),
+):
+    """
+    Score trend of a URL as up to `points` evenly spaced buckets between start
+    and end (default: the last 90 days). Long ranges are served from daily or
+    weekly rollups, so the cost depends on the number of points, not audits.
+    """
+    end = _naive_utc(end) or datetime.utcnow()
+    start = _naive_utc(start) or end - timedelta(days=DEFAULT_TREND_DAYS)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end",
+        )
+    canonical_url = canonicalize_url(url)
+    try:
+        trend = await run_db(score_trend, db, canonical_url, start, end, points)
+    except Exception as e:
+        logger.error(f"Error fetching score trend for {canonical_url}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch score trend: {str(e)}",
+        )
+    return {"success": True, "data": trend}
@@ -1,22 +1,184 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
 from datetime import datetime
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Analysis, AnonymousUsage, User
-from app.schemas import AnalysisResponse, UsageStatsResponse
+from app.database import SessionLocal, get_db, iterate_db, run_db
+from app.models import Analysis, AnalysisResult, User
+from app.schemas import UsageStatsResponse
+from app.responses import FastJSONResponse
 from app.api.v1.auth import get_current_user
+from app.config import settings
+from app.api.v1.domains import MAX_STATS_DAYS
+from app.services.aggregates import get_aggregate
+from app.services.auth import get_user_by_anonymous_id
+from app.services.changes import change_notifier
+from app.services.dashboard import get_dashboard_summary
+from app.services.export import (
+    EXPORT_FORMATS,
+    check_export_format,
+    export_analyses,
+    parse_export_fields,
+)
+from app.services.persistence import load_sections
+from app.services.search import parse_query, search_analyses
+from app.services.usage import usage_counters
+import asyncio
+import base64
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Fields selectable on the history endpoint, mapped to the columns that back them;
+# result sections are read from the stored results, which may be deltas
+HISTORY_FIELDS = {
+    "id": Analysis.id,
+    "url": Analysis.url,
+    "canonical_url": Analysis.canonical_url,
+    "title": Analysis.title,
+    "overall_score": Analysis.overall_score,
+    "timestamp": Analysis.created_at,
+    **{name: None for name in AnalysisResult.SECTIONS},
+}
+DEFAULT_HISTORY_FIELDS = ["id", "url", "overall_score", "timestamp"]
+DEFAULT_HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+MAX_CHANGES_WAIT = 30
 
-@router.get("/analyses", response_model=List[AnalysisResponse])
+
+def _encode_cursor(created_at: datetime, analysis_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{analysis_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, analysis_id = (
+            base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        )
+        return datetime.fromisoformat(created_at), analysis_id
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _encode_change_cursor(anonymous_id: str, change_seq: int) -> str:
+    # Tied to the history it was issued for, which link-extension can replace
+    raw = f"{change_seq}|{_history_tag(anonymous_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_change_cursor(cursor: str, anonymous_id: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        change_seq, tag = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        change_seq = int(change_seq)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if tag != _history_tag(anonymous_id):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor is for another history; reload the analyses",
+        )
+    return change_seq
+
+
+def _history_tag(anonymous_id: str) -> str:
+    return hashlib.sha256(anonymous_id.encode("utf-8")).hexdigest()[:16]
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return DEFAULT_HISTORY_FIELDS
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in HISTORY_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(HISTORY_FIELDS)}",
+        )
+    return selected
+
+
+def _list_analyses(
+    db: Session,
+    anonymous_id: str,
+    fields: List[str],
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[datetime, str]] = None,
+):
+    """
+    Keyset-paginated history, newest first, reading only the requested columns.
+    Rows are ordered by (created_at, id) so the cursor is stable across inserts.
+    """
+    sections = [f for f in fields if f in AnalysisResult.SECTIONS]
+    columns = _history_columns(fields, sections)
+    query = db.query(*columns).filter(Analysis.anonymous_id == anonymous_id)
+    if cursor:
+        created_at, analysis_id = cursor
+        query = query.filter(
+            or_(
+                Analysis.created_at < created_at,
+                and_(Analysis.created_at == created_at, Analysis.id < analysis_id),
+            )
+        )
+    query = query.order_by(Analysis.created_at.desc(), Analysis.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return _history_items(db, rows, fields, sections), next_cursor
+
+
+def _history_columns(fields: List[str], sections: List[str]) -> list:
+    return [Analysis.id, Analysis.created_at, Analysis.result_hash] + [
+        HISTORY_FIELDS[f]
+        for f in fields
+        if f not in ("id", "timestamp") and f not in sections
+    ]
+
+
+def _history_items(db: Session, rows, fields: List[str], sections: List[str]):
+    results = load_sections(db, {row.result_hash for row in rows}, sections)
+    items = []
+    for row in rows:
+        values = results.get(row.result_hash, {})
+        items.append(
+            {
+                f: values.get(f) if f in sections else row._mapping[HISTORY_FIELDS[f]]
+                for f in fields
+            }
+        )
+    return items
+
+
+@router.get("/analyses")
 async def get_user_analyses(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_HISTORY_PAGE_SIZE, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    """Get all analyses for a user"""
+    """
+    Get analyses for a user, newest first, `limit` per page (default 50);
+    the next page's cursor is returned in the X-Next-Cursor header. `fields`
+    is a comma-separated column projection.
+    """
     try:
         logger.info("Attempting to fetch user analyses")
 
@@ -40,11 +202,15 @@ async def get_user_analyses(
             f"Fetching analyses for user with anonymous_id: {current_user.anonymous_id}"
         )
 
-        analyses = (
-            db.query(Analysis)
-            .filter(Analysis.anonymous_id == current_user.anonymous_id)
-            .order_by(Analysis.created_at.desc())
-            .all()
+        selected_fields = _parse_fields(fields)
+        after = _decode_cursor(cursor) if cursor else None
+        analyses, next_cursor = await run_db(
+            _list_analyses,
+            db,
+            current_user.anonymous_id,
+            selected_fields,
+            limit,
+            after,
         )
 
         logger.info(f"Found {len(analyses)} analyses for user")
@@ -54,15 +220,8 @@ async def get_user_analyses(
                 "No analyses found for user - this might be normal for new users"
             )
 
-        return [
-            AnalysisResponse(
-                id=str(analysis.id),
-                url=analysis.url,
-                overall_score=analysis.overall_score,
-                timestamp=analysis.created_at,
-            )
-            for analysis in analyses
-        ]
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return FastJSONResponse(analyses, headers=headers)
     except HTTPException as he:
         logger.error(f"HTTP Exception in get_user_analyses: {str(he)}")
         raise he
@@ -74,6 +233,202 @@ async def get_user_analyses(
         )
 
 
+@router.get("/analyses/search")
+async def search_user_analyses(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Search the user's history by URL, page title, schema types and issue
+    text, newest first. Every word of `q` matches as a prefix; the next
+    page's cursor is returned in the X-Next-Cursor header.
+    """
+    if not current_user.anonymous_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no anonymous ID",
+        )
+    try:
+        terms = parse_query(q)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    after = _decode_cursor(cursor) if cursor else None
+
+    items = await run_db(
+        search_analyses, db, current_user.anonymous_id, terms, limit + 1, after
+    )
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1]["timestamp"], items[-1]["id"])
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(items, headers=headers)
+
+
+def _list_changes(
+    db: Session, anonymous_id: str, fields: List[str], after: int, limit: int
+):
+    """
+    A page of analyses added to a user's history after a feed position, in
+    feed order. Returns the items, the last position read and whether more
+    are ready.
+    """
+    sections = [f for f in fields if f in AnalysisResult.SECTIONS]
+    rows = (
+        db.query(*_history_columns(fields, sections), Analysis.change_seq)
+        .filter(Analysis.anonymous_id == anonymous_id, Analysis.change_seq > after)
+        .order_by(Analysis.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1].change_seq if rows else after
+    return _history_items(db, rows, fields, sections), last, more
+
+
+def _poll_changes(
+    db: Session, anonymous_id: str, fields: List[str], after: int, limit: int
+):
+    try:
+        return _list_changes(db, anonymous_id, fields, after, limit)
+    finally:
+        # End the read transaction, so a waiting long poll holds no connection
+        db.rollback()
+
+
+@router.get("/analyses/changes")
+async def get_user_analysis_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=MAX_CHANGES_WAIT),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Analyses added to the user's history since the `since` cursor, oldest
+    first; without one the feed starts from the beginning. The cursor for
+    the next poll is returned in the X-Next-Cursor header, and
+    X-More-Changes is set while more pages are ready. With `wait`, a poll
+    that finds nothing is held open up to that many seconds.
+    """
+    anonymous_id = current_user.anonymous_id
+    if not anonymous_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no anonymous ID",
+        )
+    selected_fields = _parse_fields(fields)
+    after = _decode_change_cursor(since, anonymous_id) if since else 0
+
+    deadline = time.monotonic() + wait
+    while True:
+        # Listen before reading, so a commit in between still wakes us
+        changed = change_notifier.listen(anonymous_id)
+        try:
+            items, last, more = await run_db(
+                _poll_changes, db, anonymous_id, selected_fields, after, limit
+            )
+            remaining = deadline - time.monotonic()
+            if items or remaining <= 0:
+                break
+            await asyncio.wait(
+                {changed}, timeout=min(remaining, settings.changes_poll_interval)
+            )
+        finally:
+            change_notifier.cancel(anonymous_id, changed)
+
+    headers = {"X-Next-Cursor": _encode_change_cursor(anonymous_id, last)}
+    if more:
+        headers["X-More-Changes"] = "true"
+    return FastJSONResponse(items, headers=headers)
+
+
+def _export(fmt: str, fields: List[str], anonymous_id: str, since: Optional[datetime]):
+    """Export bytes from a session of its own, which outlives the request handler"""
+    db = SessionLocal()
+    try:
+        yield from export_analyses(db, fmt, fields, anonymous_id, since)
+    finally:
+        db.close()
+
+
+@router.get("/analyses/export")
+async def export_user_analyses(
+    fmt: str = Query("ndjson", alias="format"),
+    fields: Optional[str] = None,
+    since: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream the user's whole history, oldest first, as NDJSON, CSV or Parquet.
+    Rows are read and encoded in chunks, so memory use does not grow with it.
+    """
+    if not current_user.anonymous_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no anonymous ID",
+        )
+    try:
+        check_export_format(fmt)
+        selected_fields = parse_export_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    logger.info(f"Exporting analyses for {current_user.email} as {fmt}")
+    return StreamingResponse(
+        iterate_db(_export(fmt, selected_fields, current_user.anonymous_id, since)),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="analyses.{fmt}"'},
+    )
+
+
+@router.get("/stats")
+async def get_user_stats(
+    days: int = Query(30, ge=1, le=MAX_STATS_DAYS),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The user's analysis count and average scores, all-time and per day over
+    the last `days` days, read from the incrementally maintained aggregates.
+    """
+    if not current_user.anonymous_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no anonymous ID",
+        )
+    stats = await run_db(get_aggregate, db, "tenant", current_user.anonymous_id, days)
+    return {"success": True, "data": stats or {"count": 0, "days": []}}
+
+
+@router.get("/dashboard")
+async def get_user_dashboard(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The user's dashboard summary: analysis count, average, best and worst
+    scores, recent scores with their trend, and quota usage, from one
+    precomputed row kept current on every write.
+    """
+    anonymous_id = current_user.anonymous_id
+    if not anonymous_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no anonymous ID",
+        )
+    summary = await run_db(get_dashboard_summary, db, anonymous_id)
+    # Include increments still buffered in memory
+    summary["quota_used"] += usage_counters.pending(anonymous_id)
+    summary["is_premium"] = current_user.is_premium
+    return {"success": True, "data": summary}
+
+
 @router.get("/usage", response_model=UsageStatsResponse)
 async def get_user_usage(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
@@ -98,24 +453,15 @@ async def get_user_usage(
             f"Fetching usage stats for user with anonymous_id: {current_user.anonymous_id}"
         )
 
-        usage = (
-            db.query(AnonymousUsage)
-            .filter(AnonymousUsage.anonymous_id == current_user.anonymous_id)
-            .first()
-        )
-
-        if not usage:
-            logger.info("No usage record found, creating default response")
-            return UsageStatsResponse(
-                analysis_count=0, full_views_used=0, is_premium=current_user.is_premium
-            )
+        # Includes increments not yet flushed to the database
+        usage = await run_db(usage_counters.usage, db, current_user.anonymous_id)
 
         logger.info(
-            f"Found usage stats: analyses={usage.analysis_count}, views={usage.full_views_used}"
+            f"Found usage stats: analyses={usage['analysis_count']}, views={usage['full_views_used']}"
         )
         return UsageStatsResponse(
-            analysis_count=usage.analysis_count,
-            full_views_used=usage.full_views_used,
+            analysis_count=usage["analysis_count"],
+            full_views_used=usage["full_views_used"],
             is_premium=current_user.is_premium,
         )
     except HTTPException as he:
@@ -147,10 +493,8 @@ async def link_chrome_extension(
         logger.info(f"Linking extension for user {current_user.email}")
 
         # Check if extension_anonymous_id is already linked to another user
-        existing_user = (
-            db.query(User)
-            .filter(User.anonymous_id == request.extension_anonymous_id)
-            .first()
+        existing_user = await run_db(
+            get_user_by_anonymous_id, db, request.extension_anonymous_id
         )
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
@@ -158,12 +502,15 @@ async def link_chrome_extension(
                 detail="This extension is already linked to another account",
             )
 
-        # Update current user's anonymous_id to match their extension
+        # Update current user's anonymous_id to match their extension. The
+        # dashboard summary and change feed are keyed by anonymous_id, so the
+        # next read serves the extension's history rather than a stale copy
+        email = current_user.email
         old_anonymous_id = current_user.anonymous_id
         current_user.anonymous_id = request.extension_anonymous_id
-        db.commit()
+        await run_db(db.commit)
 
-        logger.info(f"Successfully linked extension for {current_user.email}")
+        logger.info(f"Successfully linked extension for {email}")
         return {
             "success": True,
             "message": "Chrome extension linked successfully",
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, aliased, joinedload
+from app.config import settings
+from app.database import get_db, run_db
 from app.schemas import AnalysisRequest
-from app.models import Analysis, AnonymousUsage
+from app.models import Analysis, AnalysisResult
+from app.delta import summarize_changes
+from app.responses import FastJSONResponse, dumps
 from app.services import LLMOAnalyzer
+from app.services.analyzer import ANALYZER_VERSION
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.cache import LRUCache
+from app.services.canonical import canonicalize_url
+from app.services.percentiles import score_percentiles
+from app.services.persistence import analysis_writer
+from app.services.result_cache import STALE, result_cache
+from app.services.retention import load_archived_analysis
+from app.services.usage import usage_counters
+from typing import Optional, Tuple
+import hashlib
 import uuid
 from datetime import datetime
 import logging
@@ -11,9 +26,107 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Analyses are immutable once written, so served responses can be cached by ID
+# together with their ETag and revalidated without touching the database
+analysis_cache = LRUCache(settings.analysis_cache_size)
+ANALYSIS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Until its batch commits an accepted analysis can still be lost
+PENDING_ANALYSIS_CACHE_CONTROL = "no-cache"
+
+# Global cap on concurrent LLMOAnalyzer runs in this process
+audit_admission = AdmissionController(
+    max_concurrent=settings.max_concurrent_audits,
+    max_queue=settings.audit_queue_size,
+    queue_timeout=settings.audit_queue_timeout,
+)
+
+
+def _compute_etag(body: dict) -> str:
+    """Strong ETag derived from the response body"""
+    return f'"{hashlib.sha256(dumps(body, sort_keys=True)).hexdigest()[:32]}"'
+
+
+def _with_etag(body: dict) -> Tuple[dict, str]:
+    return body, _compute_etag(body)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _analysis_data(analysis: Analysis) -> dict:
+    sections = analysis.sections()
+    return {
+        "id": str(analysis.id),
+        "url": analysis.url,
+        "canonical_url": analysis.canonical_url,
+        "title": analysis.title,
+        "overall_score": analysis.overall_score,
+        "crawlability": sections.get("crawlability"),
+        "structured_data": sections.get("structured_data"),
+        "content_structure": sections.get("content_structure"),
+        "eeat": sections.get("eeat"),
+        "recommendations": sections.get("recommendations"),
+        "timestamp": analysis.created_at.isoformat(),
+    }
+
+
+def _archived_data(record: dict) -> dict:
+    return {
+        "id": record["id"],
+        "url": record["url"],
+        "canonical_url": record["canonical_url"],
+        # Archive files do not keep page titles
+        "title": None,
+        "overall_score": record["overall_score"],
+        **{name: record[name] for name in AnalysisResult.SECTIONS},
+        "timestamp": record["created_at"].isoformat(),
+    }
+
+
+# Loads an analysis with its result and, for deltas, the keyframe in one query
+WITH_SECTIONS = (
+    joinedload(Analysis.result).undefer("*"),
+    joinedload(Analysis.result).joinedload(AnalysisResult.base).undefer("*"),
+)
+
+
+def _load_analysis(db: Session, analysis_id: str):
+    """Load an analysis by ID and build its response data (blocking)"""
+    analysis = (
+        db.query(Analysis)
+        .options(*WITH_SECTIONS)
+        .filter(Analysis.id == analysis_id)
+        .first()
+    )
+    if not analysis:
+        # Aged analyses were moved to the archive; serve them the same way
+        record = load_archived_analysis(db, analysis_id)
+        return _archived_data(record) if record else None
+    return _analysis_data(analysis)
+
+
+def _result_key(url: str) -> str:
+    return f"{ANALYZER_VERSION}:{canonicalize_url(url)}"
+
+
+async def _refresh_result(url: str):
+    """Recompute a result for the cache; None when the analysis fails"""
+    async with audit_admission.slot():
+        result = await LLMOAnalyzer(url).analyze_page()
+    if not result.get("success", False):
+        return None
+    return result.get("data", result)
+
 
 @router.post("/analyze")
-async def analyze_webpage_real(request: AnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_webpage_real(request: AnalysisRequest):
     """Real analyze endpoint using LLMOAnalyzer"""
     logger.info(f"Real analyze called for URL: {request.url}")
 
@@ -26,11 +139,42 @@ async def analyze_webpage_real(request: AnalysisRequest, db: Session = Depends(g
                 "message": "URL must start with http:// or https://",
             }
 
+        # Results depend only on the page, so reuse one computed by any worker.
+        # Stale results are served right away while a refresh runs behind them.
+        analyzer = LLMOAnalyzer(str(request.url))
+        cache_key = _result_key(analyzer.url)
+        result, cache_status, cache_age = None, "bypass", 0.0
+        if not request.force_refresh:
+            cache_status, cached, cache_age = await result_cache.lookup(
+                cache_key, request.max_age
+            )
+            if cached is not None:
+                result = {"success": True, "data": cached}
+            if cache_status == STALE:
+                url = str(request.url)
+                result_cache.revalidate(cache_key, lambda: _refresh_result(url))
+
         # Initialize and run real analyzer
         try:
-            analyzer = LLMOAnalyzer(str(request.url))
-            result = await analyzer.analyze_page()
-            logger.info(f"Analysis completed for {request.url}")
+            if result is None:
+                async with audit_admission.slot():
+                    result = await analyzer.analyze_page()
+                logger.info(f"Analysis completed for {request.url}")
+                # Only under the requested URL: the page's declared canonical
+                # URL is its own to choose, so it must not pick other keys
+                if result.get("success", False):
+                    await result_cache.put(cache_key, result.get("data", result))
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected analysis for {request.url}: {e.reason}")
+            return FastJSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)},
+                content={
+                    "success": False,
+                    "error": "Server busy",
+                    "message": f"{e.reason}. Please retry in {e.retry_after} seconds.",
+                },
+            )
         except Exception as e:
             logger.error(f"Analysis failed: {str(e)}", exc_info=True)
             return {
@@ -62,56 +206,62 @@ async def analyze_webpage_real(request: AnalysisRequest, db: Session = Depends(g
         # Generate unique ID for this analysis
         analysis_id = str(uuid.uuid4())
 
-        # Save to database
+        # Save to database; identical payloads share one stored result
+        result_row = AnalysisResult.from_sections(
+            {
+                "crawlability": crawlability,
+                "structured_data": structured_data,
+                "content_structure": content_structure,
+                "eeat": eeat,
+                "recommendations": recommendations,
+            }
+        )
         analysis = Analysis(
             id=analysis_id,
             anonymous_id=request.anonymous_id,
             url=str(request.url),
+            canonical_url=data.get("canonical_url") or analyzer.canonical_url,
+            title=data.get("title"),
             overall_score=float(overall_score),
-            crawlability=crawlability,
-            structured_data=structured_data,
-            content_structure=content_structure,
-            eeat=eeat,
-            recommendations=recommendations,
+            result_hash=result_row.hash,
+            result=result_row,
+            created_at=datetime.utcnow(),
         )
 
-        db.add(analysis)
-
-        # Update usage tracking
-        usage = (
-            db.query(AnonymousUsage)
-            .filter(AnonymousUsage.anonymous_id == request.anonymous_id)
-            .first()
+        # Batched with other completed analyses; optionally respond before commit
+        durable = (
+            request.durable
+            if request.durable is not None
+            else settings.analysis_write_durable
         )
+        await analysis_writer.submit(analysis, durable=durable)
 
-        if not usage:
-            usage = AnonymousUsage(
-                anonymous_id=request.anonymous_id,
-                analysis_count=1,
-                full_views_used=0,
-            )
-            db.add(usage)
-        else:
-            usage.analysis_count += 1
+        # Update usage tracking; flushed to the database in the background
+        usage_counters.increment(request.anonymous_id)
+        # Same for the score histograms this analysis is ranked against
+        score_percentiles.observe(data)
 
-        db.commit()
-        db.refresh(analysis)
-
-        return {
-            "success": True,
-            "data": {
-                "id": analysis_id,
-                "url": str(request.url),
-                "overall_score": overall_score,
-                "crawlability": crawlability,
-                "structured_data": structured_data,
-                "content_structure": content_structure,
-                "eeat": eeat,
-                "recommendations": recommendations,
-                "timestamp": datetime.utcnow().isoformat(),
-            },
-            "message": "Analysis completed successfully",
-        }
+        return FastJSONResponse(
+            {
+                "success": True,
+                "data": {
+                    "id": analysis_id,
+                    "url": str(request.url),
+                    "canonical_url": analysis.canonical_url,
+                    "title": analysis.title,
+                    "overall_score": overall_score,
+                    "crawlability": crawlability,
+                    "structured_data": structured_data,
+                    "content_structure": content_structure,
+                    "eeat": eeat,
+                    "recommendations": recommendations,
+                    "percentiles": score_percentiles.ranks(data),
+                    "timestamp": datetime.utcnow().isoformat(),
+                },
+                "message": "Analysis completed successfully",
+                "cache": {"status": cache_status, "age": round(cache_age)},
+            }
+        )
 
     except Exception as e:
         logger.error(f"Error in real analyze: {str(e)}", exc_info=True)
@@ -119,42 +269,146 @@ async def analyze_webpage_real(request: AnalysisRequest, db: Session = Depends(g
 
 
 @router.get("/analysis/{analysis_id}")
-async def get_analysis(analysis_id: str, db: Session = Depends(get_db)):
+async def get_analysis(
+    analysis_id: str, request: Request, db: Session = Depends(get_db)
+):
     """Get analysis results by ID"""
     try:
         logger.info(f"Fetching analysis with ID: {analysis_id}")
 
-        # Query the database for the analysis
-        analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+        cached = analysis_cache.get(analysis_id)
+        pending = analysis_writer.pending(analysis_id) if cached is None else None
+        cache_control = ANALYSIS_CACHE_CONTROL
+        if pending is not None:
+            # Accepted but not committed yet; serve it without caching
+            cached = _with_etag({"success": True, "data": _analysis_data(pending)})
+            cache_control = PENDING_ANALYSIS_CACHE_CONTROL
+        elif cached is None:
+            # Query the database for the analysis
+            data = await run_db(_load_analysis, db, analysis_id)
+
+            if not data:
+                logger.error(f"Analysis not found with ID: {analysis_id}")
+                return {
+                    "success": False,
+                    "error": "Analysis not found",
+                    "message": "The requested analysis could not be found.",
+                }
+
+            cached = _with_etag({"success": True, "data": data})
+            analysis_cache.set(analysis_id, cached)
+
+        body, etag = cached
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+
+        # Return the analysis data
+        return FastJSONResponse(content=body, headers=headers)
+    except Exception as e:
+        logger.error(f"Error fetching analysis: {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": "Failed to fetch analysis",
+            "message": str(e),
+        }
+
+
+def _previous_analysis_id(db: Session, analysis_id: str) -> Optional[str]:
+    """The same user's analysis of the same URL just before this one (blocking)"""
+    target = aliased(Analysis)
+    row = (
+        db.query(Analysis.id)
+        .join(
+            target,
+            and_(
+                target.id == analysis_id,
+                Analysis.canonical_url == target.canonical_url,
+                Analysis.anonymous_id == target.anonymous_id,
+                Analysis.created_at < target.created_at,
+            ),
+        )
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+        .first()
+    )
+    return row.id if row else None
+
+
+async def _analysis_body_data(db: Session, analysis_id: str) -> Optional[dict]:
+    """Response data for an analysis, via the same caches as get_analysis"""
+    cached = analysis_cache.get(analysis_id)
+    if cached is not None:
+        return cached[0]["data"]
+    pending = analysis_writer.pending(analysis_id)
+    if pending is not None:
+        return _analysis_data(pending)
+    data = await run_db(_load_analysis, db, analysis_id)
+    if data:
+        analysis_cache.set(analysis_id, _with_etag({"success": True, "data": data}))
+    return data
+
+
+def _audit_summary(data: dict) -> dict:
+    return {
+        "id": data["id"],
+        "url": data["url"],
+        "overall_score": data["overall_score"],
+        "timestamp": data["timestamp"],
+    }
+
+
+@router.get("/analysis/{analysis_id}/changes")
+async def get_analysis_changes(
+    analysis_id: str, since: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """
+    What changed between two stored analyses, without re-running either.
+    `since` defaults to the same user's previous analysis of the same URL.
+    """
+    try:
+        if since is None:
+            since = await run_db(_previous_analysis_id, db, analysis_id)
+            if since is None:
+                return {
+                    "success": False,
+                    "error": "No previous analysis",
+                    "message": "There is no earlier analysis of this URL to compare.",
+                }
 
-        if not analysis:
-            logger.error(f"Analysis not found with ID: {analysis_id}")
+        current = await _analysis_body_data(db, analysis_id)
+        previous = await _analysis_body_data(db, since)
+        if not current or not previous:
             return {
                 "success": False,
                 "error": "Analysis not found",
                 "message": "The requested analysis could not be found.",
             }
 
-        # Return the analysis data
-        return {
-            "success": True,
-            "data": {
-                "id": str(analysis.id),
-                "url": analysis.url,
-                "overall_score": analysis.overall_score,
-                "crawlability": analysis.crawlability,
-                "structured_data": analysis.structured_data,
-                "content_structure": analysis.content_structure,
-                "eeat": analysis.eeat,
-                "recommendations": analysis.recommendations,
-                "timestamp": analysis.created_at.isoformat(),
-            },
-        }
+        changes = summarize_changes(
+            {name: previous[name] for name in AnalysisResult.SECTIONS},
+            {name: current[name] for name in AnalysisResult.SECTIONS},
+        )
+        return FastJSONResponse(
+            {
+                "success": True,
+                "data": {
+                    "from": _audit_summary(previous),
+                    "to": _audit_summary(current),
+                    "overall_score": {
+                        "from": previous["overall_score"],
+                        "to": current["overall_score"],
+                        "change": current["overall_score"]
+                        - previous["overall_score"],
+                    },
+                    **changes,
+                },
+            }
+        )
     except Exception as e:
-        logger.error(f"Error fetching analysis: {str(e)}", exc_info=True)
+        logger.error(f"Error comparing analyses: {str(e)}", exc_info=True)
         return {
             "success": False,
-            "error": "Failed to fetch analysis",
+            "error": "Failed to compare analyses",
             "message": str(e),
         }
 
@@ -0,0 +1,215 @@
+"""
+Storage encoding for analysis result sections.
+
+On SQLite, sections are written either as plain JSON bytes or as zstd frames
+compressed with a dictionary trained on our own results. Every value is
+self-describing, since zstd frames start with a magic number and carry their
+dictionary ID, so rows written under either setting stay readable side by side.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+import json
+import logging
+import threading
+import time
+
+import orjson
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from .config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, only needed for RESULT_COMPRESSION=zstd
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ENCODINGS = ("none", "zstd")
+
+
+class SectionCodec:
+    """Encodes section values for storage and decodes them back"""
+
+    def __init__(self, compression: str, level: int):
+        if compression not in ENCODINGS:
+            raise ValueError(f"Unknown result compression {compression!r}")
+        self.compression = compression
+        self.level = level
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, Any] = {}
+        self._active_dict_id: Optional[int] = None
+        self._compressors = threading.local()
+        self._decompressors = threading.local()
+        self.encoded = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.decoded = 0
+        self.decode_seconds = 0.0
+
+    # Dictionaries
+
+    def add_dictionary(self, data: bytes, active: bool = True) -> int:
+        """Register a trained dictionary; returns its zstd dictionary ID"""
+        self._require_zstd()
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dict_id = dictionary.dict_id()
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+            if active:
+                self._active_dict_id = dict_id
+                self._compressors = threading.local()
+        return dict_id
+
+    def load_dictionaries(self, db) -> int:
+        """Load every stored dictionary; the newest one compresses new writes"""
+        from .models import CompressionDictionary
+
+        if zstandard is None:
+            return 0
+        rows = db.query(CompressionDictionary).order_by(
+            CompressionDictionary.created_at
+        )
+        count = 0
+        for row in rows:
+            self.add_dictionary(row.data)
+            count += 1
+        return count
+
+    def _load_dictionary(self, dict_id: int):
+        """Fetch a dictionary trained after startup, e.g. by another process"""
+        from .database import SessionLocal
+        from .models import CompressionDictionary
+
+        db = SessionLocal()
+        try:
+            row = db.get(CompressionDictionary, dict_id)
+        finally:
+            db.close()
+        if row is None:
+            raise RuntimeError(f"Unknown compression dictionary {dict_id}")
+        self.add_dictionary(row.data, active=False)
+        return self._dictionaries[dict_id]
+
+    @staticmethod
+    def train(samples: Iterable[bytes], dict_size: int) -> bytes:
+        """Train a zstd dictionary on encoded section samples"""
+        SectionCodec._require_zstd()
+        return zstandard.train_dictionary(dict_size, list(samples)).as_bytes()
+
+    @staticmethod
+    def _require_zstd():
+        if zstandard is None:
+            raise RuntimeError(
+                "zstd-compressed results need the zstandard package installed"
+            )
+
+    # Encoding
+
+    def _compressor(self):
+        compressor = getattr(self._compressors, "compressor", None)
+        if compressor is None:
+            dictionary = self._dictionaries.get(self._active_dict_id)
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=dictionary
+            )
+            self._compressors.compressor = compressor
+        return compressor
+
+    def encode(self, value: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+        raw = orjson.dumps(value)
+        stored = raw
+        if self.compression == "zstd":
+            if zstandard is None:
+                logger.warning("RESULT_COMPRESSION=zstd but zstandard is missing")
+            else:
+                stored = self._compressor().compress(raw)
+        with self._lock:
+            self.encoded += 1
+            self.raw_bytes += len(raw)
+            self.stored_bytes += len(stored)
+        return stored
+
+    def decode(self, stored) -> Any:
+        if stored is None:
+            return None
+        started = time.perf_counter()
+        if isinstance(stored, str):
+            # Legacy JSON text read back from a column that used to be JSON
+            value = json.loads(stored)
+        elif bytes(stored[:4]) == ZSTD_MAGIC:
+            value = orjson.loads(self._decompress(bytes(stored)))
+        else:
+            value = orjson.loads(stored)
+        with self._lock:
+            self.decoded += 1
+            self.decode_seconds += time.perf_counter() - started
+        return value
+
+    def _decompress(self, stored: bytes) -> bytes:
+        self._require_zstd()
+        dict_id = zstandard.get_frame_parameters(stored).dict_id
+        cache = self._decompressors.__dict__
+        decompressor = cache.get(dict_id)
+        if decompressor is None:
+            dictionary = self._dictionaries.get(dict_id) if dict_id else None
+            if dict_id and dictionary is None:
+                dictionary = self._load_dictionary(dict_id)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            cache[dict_id] = decompressor
+        return decompressor.decompress(stored)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "compression": self.compression,
+                "dictionary_id": self._active_dict_id,
+                "dictionaries": len(self._dictionaries),
+                "encoded": self.encoded,
+                "compression_ratio": (
+                    round(self.raw_bytes / self.stored_bytes, 2)
+                    if self.stored_bytes
+                    else 0.0
+                ),
+                "decoded": self.decoded,
+                "avg_decode_us": (
+                    round(self.decode_seconds / self.decoded * 1e6, 2)
+                    if self.decoded
+                    else 0.0
+                ),
+            }
+
+
+section_codec = SectionCodec(
+    compression=settings.result_compression,
+    level=settings.result_compression_level,
+)
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON column stored through section_codec. PostgreSQL stores it as JSONB
+    instead, which stays queryable and is already compressed by TOAST.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name == "postgresql":
+            return value
+        return section_codec.encode(value)
+
+    def process_result_value(self, value, dialect):
+        if dialect.name == "postgresql":
+            return value
+        return section_codec.decode(value)
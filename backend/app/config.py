@@ -19,6 +19,85 @@ class Settings(BaseSettings):
 
     # Database Settings
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./ampup.db")
+    db_thread_pool_size: int = int(os.getenv("DB_THREAD_POOL_SIZE", "8"))
+    # Connection pool for server databases (ignored for SQLite files)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # SQLite high-concurrency mode: WAL journal, a read pool and one writer
+    sqlite_wal: bool = os.getenv("SQLITE_WAL", "false").lower() == "true"
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Negative values are KiB, as in PRAGMA cache_size
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # Cache Settings
+    analysis_cache_size: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+
+    # Usage Counter Settings
+    usage_flush_interval: float = float(os.getenv("USAGE_FLUSH_INTERVAL", "2"))
+    usage_cache_size: int = int(os.getenv("USAGE_CACHE_SIZE", "10000"))
+
+    # Analysis Persistence Settings
+    analysis_batch_size: int = int(os.getenv("ANALYSIS_BATCH_SIZE", "50"))
+    analysis_batch_max_delay: float = float(
+        os.getenv("ANALYSIS_BATCH_MAX_DELAY", "0.05")
+    )
+    # When false, analyze responds before its batch commits unless the request asks otherwise
+    analysis_write_durable: bool = (
+        os.getenv("ANALYSIS_WRITE_DURABLE", "true").lower() == "true"
+    )
+
+    # Admission Control Settings
+    max_concurrent_audits: int = int(os.getenv("MAX_CONCURRENT_AUDITS", "8"))
+    audit_queue_size: int = int(os.getenv("AUDIT_QUEUE_SIZE", "16"))
+    audit_queue_timeout: float = float(os.getenv("AUDIT_QUEUE_TIMEOUT", "5"))
+
+    # Result cache: per-process LRU in front of one SQLite file shared by all
+    # workers. Results are fresh for result_fresh_ttl seconds, then served
+    # stale while they refresh, until result_cache_ttl expires them.
+    result_memory_cache_size: int = int(os.getenv("RESULT_MEMORY_CACHE_SIZE", "512"))
+    result_fresh_ttl: float = float(os.getenv("RESULT_FRESH_TTL", "3600"))
+    result_store_path: str = os.getenv("RESULT_STORE_PATH", "./result_cache.db")
+    result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "21600"))
+    result_store_max_entries: int = int(
+        os.getenv("RESULT_STORE_MAX_ENTRIES", "10000")
+    )
+
+    # Stored result sections: "none" writes plain JSON, "zstd" compresses with
+    # the newest trained dictionary (see tools.compress_results)
+    result_compression: str = os.getenv("RESULT_COMPRESSION", "none")
+    result_compression_level: int = int(os.getenv("RESULT_COMPRESSION_LEVEL", "9"))
+    # Repeat results for a URL are stored as deltas against a full keyframe;
+    # every Nth result starts a new keyframe (1 disables deltas)
+    result_keyframe_interval: int = int(os.getenv("RESULT_KEYFRAME_INTERVAL", "10"))
+
+    # Retention: analyses older than archive_after_days move to monthly Parquet
+    # files under archive_dir, leaving a summary row (see tools.archive_analyses)
+    archive_after_days: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+    archive_dir: str = os.getenv("ARCHIVE_DIR", "./archive")
+    archive_batch_size: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    # Seconds between runs of the in-process retention job; 0 leaves it to cron
+    archive_interval: float = float(os.getenv("ARCHIVE_INTERVAL", "0"))
+
+    # Exports stream rows from a server-side cursor this many at a time
+    export_chunk_size: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # Change feed long polls wake on this worker's commits, and re-read the
+    # feed every changes_poll_interval seconds to see other workers' commits
+    changes_poll_interval: float = float(os.getenv("CHANGES_POLL_INTERVAL", "2"))
+
+    # Score percentile histograms: seconds between merging this worker's new
+    # scores into the stored histograms, and how many schema types to track
+    percentile_flush_interval: float = float(
+        os.getenv("PERCENTILE_FLUSH_INTERVAL", "60")
+    )
+    percentile_max_schema_types: int = int(
+        os.getenv("PERCENTILE_MAX_SCHEMA_TYPES", "200")
+    )
 
     # API Settings
     api_prefix: str = "/api/v1"
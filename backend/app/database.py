@@ -1,13 +1,82 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .db import Base, engine
-
-# Create SQLite database engine
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ampup.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+from sqlalchemy import case, false, update
+from .config import settings
+
+# One engine, Base and session factory for the app, all built in app.db
+from .db import Base, SQLITE_WAL, SessionLocal, engine, get_db  # noqa: F401
+
+
+def conflict_insert(db):
+    """
+    The dialect's insert() construct supporting ON CONFLICT clauses, or None
+    when the database has none and callers must fall back to update-then-insert
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        return insert
+    return None
+
+
+def sqlite_write_lock(db, model):
+    """
+    On SQLite, take the database write lock now, in the session's transaction.
+    SQLite ignores FOR UPDATE and only locks on a transaction's first write,
+    so reads that a write depends on must come after this. No-op elsewhere.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    table = model.__table__
+    column = next(iter(table.primary_key.columns))
+    db.execute(update(table).where(false()).values({column.name: column}))
+
+
+def upsert_totals(db, model, rows, summed, least=(), greatest=(), chunk_size=200):
+    """
+    Insert rows of running totals, or merge each into the stored row with the
+    same primary key: `summed` columns are added, `least` and `greatest` keep
+    the smaller or larger value. Keys must be unique within rows (blocking).
+    """
+    insert = conflict_insert(db)
+    if insert is None:
+        keys = [column.name for column in model.__table__.primary_key.columns]
+        for row in rows:
+            existing = db.get(model, tuple(row[key] for key in keys))
+            if existing is None:
+                db.add(model(**row))
+                continue
+            for column in summed:
+                setattr(existing, column, getattr(existing, column) + row[column])
+            for column in least:
+                setattr(existing, column, min(getattr(existing, column), row[column]))
+            for column in greatest:
+                setattr(existing, column, max(getattr(existing, column), row[column]))
+        db.flush()
+        return
+
+    table = model.__table__
+    for start in range(0, len(rows), chunk_size):
+        stmt = insert(table).values(rows[start : start + chunk_size])
+        excluded = stmt.excluded
+        merged = {column: table.c[column] + excluded[column] for column in summed}
+        for columns, smaller in ((least, True), (greatest, False)):
+            for column in columns:
+                new, old = excluded[column], table.c[column]
+                merged[column] = case(
+                    (new < old if smaller else new > old, new), else_=old
+                )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns), set_=merged
+        )
+        db.execute(stmt)
 
 
 # Create database tables
@@ -19,18 +88,108 @@ def init_db():
     Base.metadata.create_all(bind=engine)
 
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Dedicated thread pool for blocking database work, so async endpoints never
+# run queries or commits on the event loop
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.db_thread_pool_size, thread_name_prefix="db"
+)
+
+# In SQLite WAL mode background writes run on one dedicated thread, the only
+# user of the single writer connection besides short request transactions
+_db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+
+class DBPoolStats:
+    """Counters for the database thread pool, including queue wait times"""
 
-# Create Base class
-Base = declarative_base()
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
 
+    def queued(self):
+        with self._lock:
+            self.submitted += 1
 
-# Dependency to get DB session
-def get_db():
-    """Get database session"""
-    db = SessionLocal()
+    def started(self, wait: float):
+        with self._lock:
+            self.in_flight += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def finished(self, run: float):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_run += run
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "in_flight": self.in_flight,
+                "queued": self.submitted - self.completed - self.in_flight,
+                "avg_wait_ms": (
+                    self.total_wait / self.completed * 1000 if self.completed else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+                "avg_run_ms": (
+                    self.total_run / self.completed * 1000 if self.completed else 0.0
+                ),
+            }
+
+
+db_pool_stats = DBPoolStats(settings.db_thread_pool_size)
+db_writer_stats = DBPoolStats(1)
+
+
+async def _run_on(executor, stats: DBPoolStats, fn, *args, **kwargs):
+    submitted_at = time.perf_counter()
+    stats.queued()
+
+    def call():
+        started_at = time.perf_counter()
+        stats.started(started_at - submitted_at)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stats.finished(time.perf_counter() - started_at)
+
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking database call on the DB thread pool and await its result"""
+    return await _run_on(_db_executor, db_pool_stats, fn, *args, **kwargs)
+
+
+async def iterate_db(iterator):
+    """Advance a blocking iterator on the DB thread pool, one item per call"""
+    done = object()
     try:
-        yield db
+        while True:
+            item = await run_db(next, iterator, done)
+            if item is done:
+                return
+            yield item
     finally:
-        db.close()
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await run_db(close)
+
+
+async def run_db_write(fn, *args, **kwargs):
+    """
+    Run a blocking background write. In SQLite WAL mode it goes to the writer
+    thread; otherwise it shares the DB thread pool like any other call.
+    """
+    if SQLITE_WAL:
+        return await _run_on(_db_writer, db_writer_stats, fn, *args, **kwargs)
+    return await run_db(fn, *args, **kwargs)
@@ -1,18 +1,143 @@
-from sqlalchemy import create_engine
+from typing import Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from .config import settings
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def create_db_engine(url: str = settings.database_url):
+    """
+    Engine for the configured database. SQLite connections are shared with the
+    DB thread pool; server databases get a sized, pre-pinged, recycled pool.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return create_engine(url, connect_args={"check_same_thread": False})
+    if url.drivername == "postgresql":
+        # Plain postgresql:// URLs use psycopg2, the driver in requirements.txt
+        url = url.set(drivername="postgresql+psycopg2")
+    return create_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+def _set_sqlite_pragmas(engine: Engine, query_only: bool) -> None:
+    synchronous = settings.sqlite_synchronous.upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLite synchronous mode {synchronous!r}")
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        # busy_timeout first, so switching the journal mode waits out other
+        # connections instead of failing
+        cursor.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms:d}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+        cursor.execute(f"PRAGMA mmap_size = {settings.sqlite_mmap_size:d}")
+        cursor.execute(f"PRAGMA cache_size = {settings.sqlite_cache_size:d}")
+        if query_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+def create_sqlite_wal_engines(url: str = settings.database_url) -> Tuple[Engine, Engine]:
+    """
+    Engines for SQLite in WAL mode: the writer holds the one connection every
+    write goes through, and readers share a pool of query-only connections
+    """
+    connect_args = {"check_same_thread": False}
+    writer = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    reader = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    _set_sqlite_pragmas(writer, query_only=False)
+    _set_sqlite_pragmas(reader, query_only=True)
+    return writer, reader
+
+
+class RoutingSession(Session):
+    """
+    Session bound to the writer engine that runs plain reads on a separate
+    read pool. Flushes and INSERT/UPDATE/DELETE statements use the writer,
+    and once a transaction has written, every later statement in it does too,
+    so it reads its own writes.
+    """
+
+    def __init__(self, reader: Engine, **kwargs):
+        super().__init__(**kwargs)
+        self.reader = reader
+        self._writing = False
+        event.listen(self, "after_transaction_end", self._end_writing)
+
+    def _end_writing(self, session, transaction):
+        if transaction.parent is None:
+            self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._writing or self._flushing or _is_dml(clause):
+            self._writing = True
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.reader
+
+
+_DML_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _is_dml(clause) -> bool:
+    if isinstance(clause, UpdateBase):
+        return True
+    # Raw SQL, e.g. for tables without a model such as the FTS5 search index
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(_DML_KEYWORDS)
+    return False
+
 
-# Create SQLite database engine
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ampup.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Create database engine from DATABASE_URL
+SQLALCHEMY_DATABASE_URL = settings.database_url
+SQLITE_WAL = (
+    settings.sqlite_wal
+    and make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
 )
 
 # Create Base class
 Base = declarative_base()
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory. In SQLite WAL mode `engine` is the single writer
+# connection, which also runs schema changes, and reads go to read_engine.
+if SQLITE_WAL:
+    engine, read_engine = create_sqlite_wal_engines(SQLALCHEMY_DATABASE_URL)
+    SessionLocal = sessionmaker(
+        class_=RoutingSession,
+        reader=read_engine,
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+    )
+else:
+    engine = read_engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 # Dependency to get DB session
@@ -0,0 +1,125 @@
+"""
+Structural diffs between analysis results.
+
+A patch turns one JSON value into another and is one of:
+
+    {"=": value}                         replace the value outright
+    {"{": {key: patch}, "-": [keys]}     edit, add or remove dict keys
+    {"[": {"index": patch}}              edit items of an equal-length list
+
+Patches are used to store repeat analyses of a URL against a keyframe, and the
+change summaries compare two stored results without re-running anything.
+"""
+
+from typing import Any, Dict, List, Optional
+
+REPLACE = "="
+DICT = "{"
+REMOVED = "-"
+LIST = "["
+
+
+def diff(base: Any, target: Any) -> Optional[dict]:
+    """Patch from base to target, or None when they are equal"""
+    if base == target:
+        return None
+    if isinstance(base, dict) and isinstance(target, dict):
+        changed = {}
+        for key, value in target.items():
+            if key not in base:
+                changed[key] = {REPLACE: value}
+            else:
+                patch = diff(base[key], value)
+                if patch is not None:
+                    changed[key] = patch
+        patch = {DICT: changed} if changed else {}
+        removed = [key for key in base if key not in target]
+        if removed:
+            patch[REMOVED] = removed
+        return patch
+    same_length_lists = (
+        isinstance(base, list) and isinstance(target, list) and len(base) == len(target)
+    )
+    if same_length_lists:
+        return {
+            LIST: {
+                str(index): patch
+                for index, (old, new) in enumerate(zip(base, target))
+                if (patch := diff(old, new)) is not None
+            }
+        }
+    return {REPLACE: target}
+
+
+def apply(base: Any, patch: Optional[dict]) -> Any:
+    """Apply a patch produced by diff() to base, without modifying base"""
+    if patch is None:
+        return base
+    if REPLACE in patch:
+        return patch[REPLACE]
+    if LIST in patch:
+        result = list(base)
+        for index, item_patch in patch[LIST].items():
+            result[int(index)] = apply(result[int(index)], item_patch)
+        return result
+    removed = set(patch.get(REMOVED, ()))
+    result = {key: value for key, value in base.items() if key not in removed}
+    for key, value_patch in patch.get(DICT, {}).items():
+        result[key] = apply(base.get(key), value_patch)
+    return result
+
+
+def diff_sections(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, dict]:
+    """Per-section patches for the sections that differ"""
+    return {
+        name: patch
+        for name in target
+        if (patch := diff(base.get(name), target[name])) is not None
+    }
+
+
+def apply_sections(base: Dict[str, Any], patches: Dict[str, dict]) -> Dict[str, Any]:
+    return {name: apply(value, patches.get(name)) for name, value in base.items()}
+
+
+def _issue_key(issue: Any) -> str:
+    if isinstance(issue, dict):
+        return issue.get("text") or issue.get("message") or str(issue)
+    return str(issue)
+
+
+def _issue_changes(old: List[Any], new: List[Any]) -> dict:
+    old_keys = {_issue_key(issue) for issue in old}
+    new_keys = {_issue_key(issue) for issue in new}
+    return {
+        "added": [issue for issue in new if _issue_key(issue) not in old_keys],
+        "resolved": [issue for issue in old if _issue_key(issue) not in new_keys],
+    }
+
+
+def summarize_changes(base: Dict[str, Any], target: Dict[str, Any]) -> dict:
+    """
+    Human-oriented summary of what changed between two results: score moves
+    and issues added or resolved per section, plus recommendation changes.
+    """
+    sections = {}
+    for name, new in target.items():
+        old = base.get(name)
+        if name == "recommendations" or old == new:
+            continue
+        old, new = old or {}, new or {}
+        sections[name] = {
+            "score": {"from": old.get("total_score"), "to": new.get("total_score")},
+            "issues": _issue_changes(old.get("issues", []), new.get("issues", [])),
+        }
+
+    old_recs = base.get("recommendations") or []
+    new_recs = target.get("recommendations") or []
+    return {
+        "changed": bool(sections) or old_recs != new_recs,
+        "sections": sections,
+        "recommendations": {
+            "added": [rec for rec in new_recs if rec not in old_recs],
+            "removed": [rec for rec in old_recs if rec not in new_recs],
+        },
+    }
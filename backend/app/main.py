@@ -6,13 +6,31 @@ from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, HttpUrl
 from app.db import get_db
-from app.database import init_db, engine, Base
+from app.database import (
+    init_db,
+    engine,
+    Base,
+    run_db,
+    run_db_write,
+    db_pool_stats,
+    db_writer_stats,
+    SessionLocal,
+)
 from app.models import AnonymousUsage, Analysis, User, Audit  # Import all models
+from app.compression import section_codec
 from app.services import LLMOAnalyzer
-from app.api_real import router as api_router
-from app.api.v1 import auth, user, google_auth
+from app.services.percentiles import score_percentiles
+from app.services.changes import change_notifier
+from app.services.persistence import analysis_writer
+from app.services.result_cache import result_cache
+from app.services.retention import run_retention
+from app.services.usage import usage_counters
+from app.api_real import router as api_router, analysis_cache, audit_admission
+from app.api.v1 import auth, user, google_auth, trends, domains, issues
 from app.config import settings
+from app.responses import FastJSONResponse
 import validators
+import asyncio
 import logging
 from datetime import datetime
 
@@ -51,13 +69,63 @@ app = FastAPI(
     title="LLMO Readiness Auditor API",
     description="API for analyzing web pages for LLM optimization",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 
+# Background tasks started with the app and stopped on shutdown
+background_tasks: List[asyncio.Task] = []
+
+
+def _load_compression_dictionaries() -> int:
+    db = SessionLocal()
+    try:
+        return section_codec.load_dictionaries(db)
+    finally:
+        db.close()
+
+
+def _load_score_percentiles() -> int:
+    db = SessionLocal()
+    try:
+        return score_percentiles.load(db)
+    finally:
+        db.close()
+
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    try:
+        count = await run_db(_load_compression_dictionaries)
+        logger.info(f"Loaded {count} result compression dictionaries")
+    except Exception as e:
+        logger.warning(f"Could not load compression dictionaries: {str(e)}")
+    try:
+        count = await run_db(_load_score_percentiles)
+        logger.info(f"Loaded {count} score percentile histograms")
+    except Exception as e:
+        logger.warning(f"Could not load score percentiles: {str(e)}")
+    background_tasks.append(
+        asyncio.create_task(usage_counters.run(settings.usage_flush_interval))
+    )
+    background_tasks.append(
+        asyncio.create_task(score_percentiles.run(settings.percentile_flush_interval))
+    )
+    if settings.archive_interval > 0:
+        background_tasks.append(
+            asyncio.create_task(run_retention(settings.archive_interval))
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    await analysis_writer.drain()
+    await run_db_write(usage_counters.flush_now)
+    await run_db_write(score_percentiles.flush_now)
 
 
 # Create database tables - AFTER importing all models
@@ -79,6 +147,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["ETag", "X-Next-Cursor", "X-More-Changes", "Retry-After"],
 )
 
 # Log CORS settings
@@ -96,6 +165,9 @@ app.include_router(api_router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(user.router, prefix="/api/v1/user", tags=["user"])
 app.include_router(google_auth.router, prefix="/api/v1/auth", tags=["auth"])
+app.include_router(trends.router, prefix="/api/v1/trends", tags=["trends"])
+app.include_router(domains.router, prefix="/api/v1/domains", tags=["domains"])
+app.include_router(issues.router, prefix="/api/v1/issues", tags=["issues"])
 
 
 @app.get("/")
@@ -108,32 +180,70 @@ async def health_check():
     return {"status": "healthy"}
 
 
-@app.get("/usage/{anon_id}")
-async def get_usage(anon_id: str, db: Session = Depends(get_db)):
-    """Get usage statistics for an anonymous user"""
-    usage = db.query(AnonymousUsage).filter(AnonymousUsage.anon_id == anon_id).first()
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for the API process"""
+    return {
+        "db_pool": db_pool_stats.to_dict(),
+        "db_writer": db_writer_stats.to_dict(),
+        "analysis_cache": analysis_cache.stats(),
+        "admission": audit_admission.stats(),
+        "usage_counters": usage_counters.stats(),
+        "score_percentiles": score_percentiles.stats(),
+        "analysis_writer": analysis_writer.stats(),
+        "change_feed": change_notifier.stats(),
+        "result_cache": result_cache.stats(),
+        "result_codec": section_codec.stats(),
+    }
+
+
+def _get_or_create_usage(db: Session, anon_id: str) -> Dict[str, Any]:
+    usage = (
+        db.query(AnonymousUsage).filter(AnonymousUsage.anonymous_id == anon_id).first()
+    )
     if not usage:
-        usage = AnonymousUsage(anon_id=anon_id)
+        usage = AnonymousUsage(anonymous_id=anon_id, analysis_count=0)
         db.add(usage)
         db.commit()
-    return usage.to_dict()
+    data = usage.to_dict()
+    # Include increments still buffered in memory
+    data["analysis_count"] = (data["analysis_count"] or 0) + usage_counters.pending(
+        anon_id
+    )
+    return data
+
+
+@app.get("/usage/{anon_id}")
+async def get_usage(anon_id: str, db: Session = Depends(get_db)):
+    """Get usage statistics for an anonymous user"""
+    return await run_db(_get_or_create_usage, db, anon_id)
 
 
 # Removed duplicate /api/v1/analyze endpoint - using the one in app/api.py instead
 
 
-@app.get("/debug/anonymous-ids")
+def _debug_only():
+    """Debug endpoints expose and rewrite other users' ids; off unless debugging"""
+    if not settings.debug:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get(
+    "/debug/anonymous-ids",
+    dependencies=[Depends(_debug_only)],
+    include_in_schema=settings.debug,
+)
 async def debug_anonymous_ids(db: Session = Depends(get_db)):
     """Debug endpoint to check anonymous IDs in the system"""
     try:
         # Get all analyses
-        analyses = db.query(Analysis).all()
+        analyses = await run_db(lambda: db.query(Analysis).all())
         analysis_ids = [
             {"id": a.id, "anonymous_id": a.anonymous_id, "url": a.url} for a in analyses
         ]
 
         # Get all users
-        users = db.query(User).all()
+        users = await run_db(lambda: db.query(User).all())
         user_ids = [{"email": u.email, "anonymous_id": u.anonymous_id} for u in users]
 
         return {
@@ -146,19 +256,25 @@ async def debug_anonymous_ids(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/debug/update-user-anonymous-id")
+@app.post(
+    "/debug/update-user-anonymous-id",
+    dependencies=[Depends(_debug_only)],
+    include_in_schema=settings.debug,
+)
 async def update_user_anonymous_id(
     email: str, new_anonymous_id: str, db: Session = Depends(get_db)
 ):
     """Debug endpoint to update a user's anonymous_id"""
     try:
-        user = db.query(User).filter(User.email == email).first()
+        user = await run_db(
+            lambda: db.query(User).filter(User.email == email).first()
+        )
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         old_anonymous_id = user.anonymous_id
         user.anonymous_id = new_anonymous_id
-        db.commit()
+        await run_db(db.commit)
 
         return {
             "success": True,
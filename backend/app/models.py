@@ -1,22 +1,31 @@
 from pydantic import BaseModel, HttpUrl, Field, field_validator
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     JSON,
+    event,
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
+import hashlib
 import uuid
+from .delta import apply_sections, diff_sections
+from .compression import CompressedJSON
 from .db import Base
+from .responses import dumps
 
 
 class AnalysisRequest(BaseModel):
@@ -68,20 +77,364 @@ class AnalysisResponse(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
+class AnalysisResult(Base):
+    """
+    Analyzer output stored once per distinct payload, keyed by its content
+    hash. Analyses of unchanged pages by different users share one row.
+
+    A result is either a keyframe holding every section, or a delta holding
+    per-section patches (see app.delta) against the keyframe in base_hash.
+    """
+
+    __tablename__ = "analysis_results"
+
+    hash = Column(String, primary_key=True)
+    # Each section is loaded, and decompressed, only when it is read
+    crawlability = deferred(Column(CompressedJSON))
+    structured_data = deferred(Column(CompressedJSON))
+    content_structure = deferred(Column(CompressedJSON))
+    eeat = deferred(Column(CompressedJSON))
+    recommendations = deferred(Column(CompressedJSON))
+    base_hash = Column(String, ForeignKey("analysis_results.hash"), index=True)
+    delta = deferred(Column(CompressedJSON))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    base = relationship("AnalysisResult", remote_side=[hash], viewonly=True)
+
+    SECTIONS = (
+        "crawlability",
+        "structured_data",
+        "content_structure",
+        "eeat",
+        "recommendations",
+    )
+
+    @classmethod
+    def content_hash(cls, sections: Dict[str, Any]) -> str:
+        payload = {name: sections.get(name) for name in cls.SECTIONS}
+        return hashlib.sha256(dumps(payload, sort_keys=True)).hexdigest()
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, Any]) -> "AnalysisResult":
+        return cls(
+            hash=cls.content_hash(sections),
+            **{name: sections.get(name) for name in cls.SECTIONS},
+        )
+
+    @classmethod
+    def as_delta(
+        cls, result: "AnalysisResult", keyframe: "AnalysisResult"
+    ) -> "AnalysisResult":
+        """Row storing result as patches against keyframe's sections"""
+        return cls(
+            hash=result.hash,
+            base_hash=keyframe.hash,
+            delta=diff_sections(keyframe.sections(), result.sections()),
+        )
+
+    def sections(self, names: Iterable[str] = SECTIONS) -> Dict[str, Any]:
+        """The named sections, reconstructed from the keyframe for deltas"""
+        if self.base_hash is None:
+            return {name: getattr(self, name) for name in names}
+        return apply_sections(self.base.sections(names), self.delta or {})
+
+
+class CompressionDictionary(Base):
+    """zstd dictionaries trained on stored sections, kept to decode older rows"""
+
+    __tablename__ = "compression_dictionaries"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary, nullable=False)
+    samples = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Analysis(Base):
     __tablename__ = "analyses"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    anonymous_id = Column(String, nullable=False, index=True)
+    anonymous_id = Column(String, nullable=False)
     url = Column(String, nullable=False)
+    # Normalised form of url (see app.services.canonical); groups equivalent URLs
+    canonical_url = Column(String)
+    # The page's <title>, kept for search
+    title = Column(String)
+    # Position in the change feed, in commit order (see services.changes)
+    change_seq = Column(BigInteger)
     overall_score = Column(Float, nullable=False)
-    crawlability = Column(JSON)
-    structured_data = Column(JSON)
-    content_structure = Column(JSON)
-    eeat = Column(JSON)
-    recommendations = Column(JSON)
+    result_hash = Column(
+        String, ForeignKey("analysis_results.hash"), nullable=False, index=True
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Results are shared between analyses and inserted by write_analyses, which
+    # skips payloads already stored, so this side never writes them
+    result = relationship("AnalysisResult", viewonly=True)
+
+    def sections(self) -> Dict[str, Any]:
+        return self.result.sections() if self.result is not None else {}
+
+
+# History pages list one user's analyses newest first. The trailing columns
+# let score listings (id, timestamp, overall_score) read from the index alone.
+Index(
+    "ix_analyses_anonymous_id_created_at",
+    Analysis.anonymous_id,
+    Analysis.created_at.desc(),
+    Analysis.id.desc(),
+    Analysis.overall_score,
+    Analysis.result_hash,
+)
+# Latest analyses of a URL, for keyframes and change reports
+Index(
+    "ix_analyses_canonical_url_created_at",
+    Analysis.canonical_url,
+    Analysis.created_at.desc(),
+)
+# A user's changes after a feed position
+Index("ix_analyses_anonymous_id_change_seq", Analysis.anonymous_id, Analysis.change_seq)
+
+
+class ArchivedAnalysis(Base):
+    """
+    Compact summary of an analysis the retention job moved out of analyses.
+    The full record lives in a monthly archive file (see app.services.retention).
+    """
+
+    __tablename__ = "archived_analyses"
+
+    id = Column(String, primary_key=True)
+    anonymous_id = Column(String, nullable=False)
+    canonical_url = Column(String)
+    overall_score = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    # Archive file holding the full record, relative to settings.archive_dir
+    archive = Column(String, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+Index(
+    "ix_archived_analyses_anonymous_id_created_at",
+    ArchivedAnalysis.anonymous_id,
+    ArchivedAnalysis.created_at.desc(),
+)
+
+
+class ScorePoint(Base):
+    """One audit's scores for a canonical URL: the raw series behind trend charts"""
+
+    __tablename__ = "score_points"
+
+    SECTIONS = ("crawlability", "structured_data", "content_structure", "eeat")
+
+    analysis_id = Column(String, primary_key=True)
+    canonical_url = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    overall_score = Column(Float, nullable=False)
+    # Section total_scores; null when the section is missing from the result
+    crawlability = Column(Float)
+    structured_data = Column(Float)
+    content_structure = Column(Float)
+    eeat = Column(Float)
+
+
+Index(
+    "ix_score_points_canonical_url_created_at",
+    ScorePoint.canonical_url,
+    ScorePoint.created_at,
+)
+
+
+class ScoreRollup(Base):
+    """
+    Score aggregates for a canonical URL per day or week (bucket_start is the
+    day, or the Monday the week starts on). Updated as audits are written.
+    """
+
+    __tablename__ = "score_rollups"
+
+    GRANULARITIES = ("day", "week")
+
+    canonical_url = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False)
+    overall_sum = Column(Float, nullable=False)
+    overall_min = Column(Float, nullable=False)
+    overall_max = Column(Float, nullable=False)
+    # Sections can be missing from a result, so each keeps its own count
+    crawlability_sum = Column(Float, nullable=False, default=0.0)
+    crawlability_count = Column(Integer, nullable=False, default=0)
+    structured_data_sum = Column(Float, nullable=False, default=0.0)
+    structured_data_count = Column(Integer, nullable=False, default=0)
+    content_structure_sum = Column(Float, nullable=False, default=0.0)
+    content_structure_count = Column(Integer, nullable=False, default=0)
+    eeat_sum = Column(Float, nullable=False, default=0.0)
+    eeat_count = Column(Integer, nullable=False, default=0)
+
+
+class AggregateStat(Base):
+    """
+    Running totals of analyses per domain or per tenant (anonymous_id), over
+    all time (period "total") and per day (period is the ISO date). Updated
+    as analyses are written; tools.rebuild_aggregates recomputes them.
+    """
+
+    __tablename__ = "aggregate_stats"
+
+    SCOPES = ("domain", "tenant")
+    TOTAL = "total"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+    overall_sum = Column(Float, nullable=False)
+    # Sections can be missing from a result, so each keeps its own count
+    crawlability_sum = Column(Float, nullable=False, default=0.0)
+    crawlability_count = Column(Integer, nullable=False, default=0)
+    structured_data_sum = Column(Float, nullable=False, default=0.0)
+    structured_data_count = Column(Integer, nullable=False, default=0)
+    content_structure_sum = Column(Float, nullable=False, default=0.0)
+    content_structure_count = Column(Integer, nullable=False, default=0)
+    eeat_sum = Column(Float, nullable=False, default=0.0)
+    eeat_count = Column(Integer, nullable=False, default=0)
+    first_analysis_at = Column(DateTime, nullable=False)
+    last_analysis_at = Column(DateTime, nullable=False)
+
+
+class ScoreSketch(Base):
+    """
+    Histogram of scores across all analyses, for one section ("section",
+    name) or for pages carrying one schema.org type ("schema_type", type).
+    bins is the packed histogram, see services.percentiles.ScoreHistogram.
+    """
+
+    __tablename__ = "score_sketches"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False)
+    bins = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class IssueCode(Base):
+    """
+    A failed or warned check, keyed by a code derived from its section and
+    text (see services.issues.issue_code), with all-time totals.
+    """
+
+    __tablename__ = "issue_codes"
+
+    code = Column(String, primary_key=True)
+    section = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    count = Column(BigInteger, nullable=False)
+    first_seen_at = Column(DateTime, nullable=False)
+    last_seen_at = Column(DateTime, nullable=False)
+
+
+class IssueDailyCount(Base):
+    """Analyses per day that reported an issue; day is the ISO date"""
+
+    __tablename__ = "issue_daily_counts"
+
+    code = Column(String, primary_key=True)
+    day = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class IssueOccurrence(Base):
+    """Inverted index entry: an analysis that reported an issue"""
+
+    __tablename__ = "issue_occurrences"
+
+    code = Column(String, primary_key=True)
+    analysis_id = Column(String, primary_key=True)
+    domain = Column(String)
+    created_at = Column(DateTime, nullable=False)
+
+
+# Occurrences of an issue over a time range, e.g. to break it down by domain
+Index(
+    "ix_issue_occurrences_code_created_at",
+    IssueOccurrence.code,
+    IssueOccurrence.created_at,
+)
+
+
+class ChangeSequence(Base):
+    """
+    Last position handed out in a change feed. Writers bump it inside their
+    transaction, which holds its row lock until commit, so positions become
+    visible in order.
+    """
+
+    __tablename__ = "change_sequences"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False)
+
+
+class DashboardSummary(Base):
+    """
+    Everything the dashboard shows for one anonymous_id, kept current in the
+    transactions that write its analyses and flush its usage, so a load is a
+    single primary key read (see services.dashboard)
+    """
+
+    __tablename__ = "dashboard_summaries"
+
+    anonymous_id = Column(String, primary_key=True)
+    # Stored and archived analyses
+    analysis_count = Column(BigInteger, nullable=False)
+    overall_sum = Column(Float, nullable=False)
+    best_score = Column(Float)
+    worst_score = Column(Float)
+    last_analysis_at = Column(DateTime)
+    # [timestamp, overall score] of the latest analyses, oldest first
+    recent_scores = Column(JSON, nullable=False)
+    # AnonymousUsage.analysis_count as of its last flush
+    quota_used = Column(BigInteger, nullable=False)
+
+
+# Full-text index of analyses for history search (see services.search). It is
+# an FTS5 table on SQLite and a tsvector column with a GIN index on PostgreSQL,
+# neither of which maps onto a declarative model, so it is created as DDL.
+ANALYSIS_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS analysis_search USING fts5("
+        "owner, url, title, schema_types, issues, "
+        "analysis_id UNINDEXED, created_at UNINDEXED, overall_score UNINDEXED, "
+        "prefix='2 3')"
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS analysis_search ("
+        "analysis_id VARCHAR PRIMARY KEY, anonymous_id VARCHAR NOT NULL, "
+        "created_at TIMESTAMP NOT NULL, url VARCHAR, title VARCHAR, "
+        "overall_score FLOAT, document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_analysis_search_document "
+        "ON analysis_search USING gin (document)",
+        "CREATE INDEX IF NOT EXISTS ix_analysis_search_anonymous_id_created_at "
+        "ON analysis_search (anonymous_id, created_at DESC, analysis_id DESC)",
+    ],
+}
+for _dialect, _statements in ANALYSIS_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Base.metadata, "after_create", DDL(_statement).execute_if(dialect=_dialect)
+        )
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS analysis_search").execute_if(
+        dialect=tuple(ANALYSIS_SEARCH_DDL)
+    ),
+)
+
 
 class AnonymousUsage(Base):
     __tablename__ = "anonymous_usage"
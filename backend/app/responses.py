@@ -0,0 +1,32 @@
+"""
+Response classes for the LLMO backend.
+"""
+
+from typing import Any
+from fastapi.responses import ORJSONResponse
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for values orjson cannot serialize natively"""
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """Serialize content to JSON bytes with orjson"""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(content, default=_default, option=option)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson-backed JSON response.
+    Returning one directly from an endpoint skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
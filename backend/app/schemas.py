@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
@@ -71,6 +71,12 @@ class AnalysisRequest(BaseModel):
     url: HttpUrl
     anonymous_id: str
     include_content: Optional[bool] = True
+    # Wait for the analysis to be committed before responding; None uses the server default
+    durable: Optional[bool] = None
+    # Oldest cached result, in seconds, the caller will accept
+    max_age: Optional[int] = Field(default=None, ge=0)
+    # Ignore cached results and run a new analysis
+    force_refresh: bool = False
 
 
 class AnalysisResponse(BaseModel):
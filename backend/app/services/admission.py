@@ -0,0 +1,83 @@
+"""Admission control for page audits."""
+
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import time
+
+
+class AdmissionRejected(Exception):
+    """Raised when an audit cannot be admitted; carries a Retry-After hint in seconds"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Caps how many audits run at once, with a short bounded wait queue.
+    Requests that find the queue full, or wait longer than queue_timeout,
+    are rejected so the caller can answer 429 instead of piling up.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Exponentially weighted average audit duration, used for Retry-After
+        self.avg_duration = 5.0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a newly arriving request"""
+        ahead = self.waiting + 1
+        return max(1, math.ceil(self.avg_duration * ahead / self.max_concurrent))
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise AdmissionRejected(self.retry_after(), reason)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one audit slot for the duration of the block"""
+        # Counters change synchronously, so this check cannot race other callers
+        if self.in_flight + self.waiting >= self.max_concurrent + self.max_queue:
+            self._reject("Audit queue is full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("Timed out waiting for an audit slot")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.avg_duration = (
+                0.8 * self.avg_duration + 0.2 * (time.monotonic() - started)
+            )
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_audit_seconds": round(self.avg_duration, 3),
+            "retry_after": self.retry_after(),
+        }
@@ -0,0 +1,197 @@
+"""Per-domain and per-tenant aggregates, maintained as analyses are written."""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import upsert_totals
+from app.models import AggregateStat, Analysis, ArchivedAnalysis, ScorePoint
+from app.services.canonical import url_domain
+from app.services.trends import section_scores
+
+SECTIONS = ScorePoint.SECTIONS
+# Additive columns, merged by summing
+SUMMED = ("count", "overall_sum") + tuple(
+    f"{name}_{part}" for name in SECTIONS for part in ("sum", "count")
+)
+REBUILD_BATCH_SIZE = 1000
+
+
+def _new_row(scope: str, key: str, period: str, created_at: datetime) -> dict:
+    return {
+        "scope": scope,
+        "key": key,
+        "period": period,
+        **{column: 0 for column in SUMMED},
+        "first_analysis_at": created_at,
+        "last_analysis_at": created_at,
+    }
+
+
+def record_aggregate_points(db: Session, records: Iterable[dict]) -> None:
+    """
+    Fold analyses into their tenant and domain totals, all-time and for their
+    day, in the caller's transaction. Each record has anonymous_id, url,
+    created_at, overall_score and the section scores.
+    """
+    rows: Dict[tuple, dict] = {}
+    for record in records:
+        created_at = record["created_at"]
+        keys = [("tenant", record["anonymous_id"])]
+        domain = url_domain(record["url"]) if record["url"] else None
+        if domain:
+            keys.append(("domain", domain))
+        for scope, key in keys:
+            for period in (AggregateStat.TOTAL, created_at.date().isoformat()):
+                row = rows.get((scope, key, period))
+                if row is None:
+                    row = rows[scope, key, period] = _new_row(
+                        scope, key, period, created_at
+                    )
+                row["count"] += 1
+                row["overall_sum"] += record["overall_score"]
+                for name in SECTIONS:
+                    if record[name] is not None:
+                        row[f"{name}_sum"] += record[name]
+                        row[f"{name}_count"] += 1
+                row["first_analysis_at"] = min(row["first_analysis_at"], created_at)
+                row["last_analysis_at"] = max(row["last_analysis_at"], created_at)
+    if rows:
+        upsert_totals(
+            db,
+            AggregateStat,
+            list(rows.values()),
+            summed=SUMMED,
+            least=("first_analysis_at",),
+            greatest=("last_analysis_at",),
+        )
+
+
+def record_aggregates(db: Session, analyses: List[Analysis]) -> None:
+    """Aggregates for a batch of analyses being written (after their flush)"""
+    record_aggregate_points(
+        db,
+        (
+            {
+                "anonymous_id": analysis.anonymous_id,
+                "url": analysis.canonical_url or analysis.url,
+                "created_at": analysis.created_at,
+                "overall_score": analysis.overall_score,
+                **section_scores(analysis.sections()),
+            }
+            for analysis in analyses
+        ),
+    )
+
+
+def _iter_records(db: Session, batch_size: int) -> Iterator[List[dict]]:
+    """Every stored analysis as aggregate records, in keyset batches by id"""
+    # Imported here, as persistence imports this module to record aggregates
+    from app.services.persistence import load_sections
+
+    # Archived analyses only kept their overall score
+    for model in (Analysis, ArchivedAnalysis):
+        with_sections = model is Analysis
+        columns = [
+            model.id,
+            model.anonymous_id,
+            model.canonical_url,
+            model.created_at,
+            model.overall_score,
+        ]
+        if with_sections:
+            columns += [model.url, model.result_hash]
+        last_id = ""
+        while True:
+            rows = (
+                db.query(*columns)
+                .filter(model.id > last_id, model.created_at.isnot(None))
+                .order_by(model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            results = (
+                load_sections(db, {row.result_hash for row in rows}, list(SECTIONS))
+                if with_sections
+                else {}
+            )
+            yield [
+                {
+                    "anonymous_id": row.anonymous_id,
+                    "url": row.canonical_url or (row.url if with_sections else None),
+                    "created_at": row.created_at,
+                    "overall_score": row.overall_score or 0.0,
+                    **section_scores(
+                        results.get(row.result_hash, {}) if with_sections else {}
+                    ),
+                }
+                for row in rows
+            ]
+            last_id = rows[-1].id
+
+
+def rebuild_aggregates(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """
+    Recompute every aggregate from the stored and archived analyses, in one
+    transaction so readers see either the old or the new totals. Returns how
+    many analyses were counted (blocking).
+    """
+    db.query(AggregateStat).delete(synchronize_session=False)
+    counted = 0
+    for records in _iter_records(db, batch_size):
+        record_aggregate_points(db, records)
+        counted += len(records)
+    db.commit()
+    return counted
+
+
+def _summary(row: AggregateStat) -> Dict[str, Any]:
+    return {
+        "count": row.count,
+        "overall_score": round(row.overall_sum / row.count, 2),
+        **{
+            name: (
+                round(getattr(row, f"{name}_sum") / getattr(row, f"{name}_count"), 2)
+                if getattr(row, f"{name}_count")
+                else None
+            )
+            for name in SECTIONS
+        },
+    }
+
+
+def get_aggregate(
+    db: Session, scope: str, key: str, days: int = 30, today: Optional[date] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    All-time totals of a domain or tenant, plus one entry per day with
+    analyses in the last `days` days; None when it has no analyses. Reads one
+    row by key and one primary key range, whatever the history size.
+    """
+    total = db.get(AggregateStat, (scope, key, AggregateStat.TOTAL))
+    if total is None:
+        return None
+    today = today or datetime.utcnow().date()
+    # ISO dates sort chronologically, and before "total"
+    first_day = (today - timedelta(days=days - 1)).isoformat()
+    rows = (
+        db.query(AggregateStat)
+        .filter(
+            AggregateStat.scope == scope,
+            AggregateStat.key == key,
+            AggregateStat.period >= first_day,
+            AggregateStat.period <= today.isoformat(),
+        )
+        .order_by(AggregateStat.period)
+    )
+    return {
+        "scope": scope,
+        "key": key,
+        **_summary(total),
+        "first_analysis_at": total.first_analysis_at.isoformat(),
+        "last_analysis_at": total.last_analysis_at.isoformat(),
+        "days": [{"date": row.period, **_summary(row)} for row in rows],
+    }
@@ -16,10 +16,17 @@ import random
 import re
 import json
 from ..utils import extract_recommendations
+from .canonical import canonicalize_url, resolve_rel_canonical
 import os
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever scoring or checks change, so cached results from older versions are ignored
+ANALYZER_VERSION = "1"
+
+# Page titles are stored for search; anything longer is cut off
+MAX_TITLE_LENGTH = 300
+
 # Default timeout configuration
 DEFAULT_TIMEOUT = ClientTimeout(total=10)  # 10 seconds total timeout
 
@@ -69,45 +76,30 @@ def extract_recommendations(*issues_lists):
 class LLMOAnalyzer:
     def __init__(self, url: str):
         self.original_url = url
-        self.url = self._clean_url(url)
+        # Fetched as submitted; query parameters can select the page's content
+        self.url = url.strip()
+        # Key for caching and storage, updated from the page's rel=canonical
+        # link once it has been fetched
+        self.canonical_url = canonicalize_url(url)
+        self.title: Optional[str] = None
         self.soup: Optional[BeautifulSoup] = None
         self.text_content: str = ""
         self._session: Optional[aiohttp.ClientSession] = None
         self._semaphore = asyncio.Semaphore(5)  # Limit concurrent requests
         logger.info(f"Initialized LLMOAnalyzer for URL: {self.url}")
 
-    def _clean_url(self, url: str) -> str:
-        """Clean URL by removing UTM parameters and other unnecessary query parameters"""
-        try:
-            # Parse the URL
-            parsed = urlparse(url)
-
-            # Remove common tracking parameters
-            if parsed.query:
-                # Split query parameters
-                params = parsed.query.split("&")
-                # Keep only non-tracking parameters
-                clean_params = [
-                    p
-                    for p in params
-                    if not any(
-                        p.startswith(prefix)
-                        for prefix in ["utm_", "fb_", "gclid", "_ga", "ref_", "source"]
-                    )
-                ]
-                # Reconstruct URL
-                if clean_params:
-                    clean_query = "&".join(clean_params)
-                    return (
-                        f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{clean_query}"
-                    )
-                else:
-                    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    def _declared_canonical(self) -> Optional[str]:
+        """href of the page's <link rel="canonical">, if any"""
+        if not self.soup:
+            return None
+        link = self.soup.find("link", rel="canonical")
+        return link.get("href") if link else None
 
-            return url
-        except Exception as e:
-            logger.warning(f"Error cleaning URL {url}: {str(e)}")
-            return url
+    def _page_title(self) -> Optional[str]:
+        """Text of the page's <title>, if any"""
+        if not self.soup or not self.soup.title or not self.soup.title.string:
+            return None
+        return " ".join(self.soup.title.string.split())[:MAX_TITLE_LENGTH] or None
 
     def _is_shopify_store(self, url: str) -> bool:
         """Check if the URL is a Shopify store"""
@@ -232,6 +224,10 @@ class LLMOAnalyzer:
                 if not self.text_content:
                     raise Exception("Failed to extract text content from page")
 
+                self.canonical_url = resolve_rel_canonical(
+                    self.url, self._declared_canonical()
+                )
+                self.title = self._page_title()
                 logger.info(f"Successfully parsed HTML for {self.url}")
             except Exception as e:
                 error_msg = f"Failed to parse HTML: {str(e)}"
@@ -818,6 +814,8 @@ class LLMOAnalyzer:
                     "success": True,
                     "data": {
                         "url": self.url,
+                        "canonical_url": self.canonical_url,
+                        "title": self.title,
                         "overall_score": overall_score,
                         "crawlability": {
                             "robots_txt_score": crawl_score,
@@ -0,0 +1,141 @@
+"""URL canonicalisation shared by caching, coalescing and storage keys"""
+
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only identify where a visit came from
+TRACKING_PARAMS = {
+    "gclid",
+    "dclid",
+    "fbclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "source",
+}
+TRACKING_PREFIXES = ("utm_", "fb_", "_ga", "ref_", "_hs")
+
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = set(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _normalize_escapes(value: str) -> str:
+    """Decode escaped unreserved characters and uppercase the remaining escapes"""
+
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+    return _PERCENT_ESCAPE.sub(replace, value)
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolve "." and ".." segments as described in RFC 3986 section 5.2.4"""
+    output = []
+    segments = path.split("/")
+    for segment in segments[1:]:
+        if segment == "..":
+            if output:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    resolved = "/" + "/".join(output)
+    if segments[-1] in (".", "..") and not resolved.endswith("/"):
+        resolved += "/"
+    return resolved
+
+
+def _normalize_host(hostname: str) -> str:
+    host = hostname.rstrip(".").lower()
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def canonicalize_url(url: str) -> str:
+    """Return the canonical form of an http(s) URL.
+
+    Lowercases the scheme and host, converts internationalised hosts to
+    punycode, drops credentials, default ports, fragments and tracking
+    parameters, resolves dot segments, normalises percent escapes and sorts
+    the query string.
+    URLs that cannot be parsed are returned stripped but otherwise unchanged.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not parts.hostname:
+            return url
+
+        host = _normalize_host(parts.hostname)
+        if ":" in host:
+            host = f"[{host}]"
+        port = parts.port
+        if port is not None and port != DEFAULT_PORTS[scheme]:
+            host = f"{host}:{port}"
+
+        path = _remove_dot_segments(_normalize_escapes(parts.path or "/"))
+
+        params = [
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(name)
+        ]
+        query = urlencode(sorted(params))
+
+        return urlunsplit((scheme, host, path, query, ""))
+    except ValueError as e:
+        logger.warning(f"Error canonicalizing URL {url}: {str(e)}")
+        return url
+
+
+def resolve_rel_canonical(page_url: str, href: Optional[str]) -> str:
+    """Canonical URL for a fetched page, honouring its rel=canonical link.
+
+    The declared URL is only trusted on the same host as the page, so a page
+    cannot group its analyses under another site. It is chosen by the page,
+    so it is used for storage and grouping but never as a result cache key.
+    """
+    page = canonicalize_url(page_url)
+    if not href:
+        return page
+    declared = canonicalize_url(urljoin(page, href))
+    if urlsplit(declared).netloc != urlsplit(page).netloc:
+        return page
+    return declared
+
+
+def url_domain(url: str) -> Optional[str]:
+    """Normalised host of a URL, or of a bare domain; None when it has none.
+
+    A leading "www." is dropped, so both forms aggregate under one domain.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+    try:
+        hostname = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not hostname:
+        return None
+    host = _normalize_host(hostname)
+    return host[4:] if host.startswith("www.") else host
@@ -0,0 +1,80 @@
+"""Commit-ordered change feed of analyses, for polling only what is new."""
+
+from typing import Dict, Iterable, List, Set
+import asyncio
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models import Analysis, ChangeSequence
+
+FEED = "analyses"
+
+
+def assign_change_seqs(db: Session, analyses: List[Analysis]) -> None:
+    """
+    Give a batch of analyses about to be inserted their feed positions, in
+    the caller's transaction. Bumping the counter locks it until commit, so
+    concurrent writers commit in position order and a reader that has seen
+    a position has seen every earlier one.
+    """
+    if not analyses:
+        return
+    # RETURNING reads the bumped value on the connection that bumped it
+    last = db.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.name == FEED)
+        .values(value=ChangeSequence.value + len(analyses))
+        .returning(ChangeSequence.value)
+    ).scalar_one_or_none()
+    if last is None:
+        # First write; a concurrent first write fails with an IntegrityError,
+        # which write_analyses retries
+        last = len(analyses)
+        db.add(ChangeSequence(name=FEED, value=last))
+        db.flush()
+    for seq, analysis in enumerate(analyses, start=last - len(analyses) + 1):
+        analysis.change_seq = seq
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeNotifier:
+    """
+    Wakes long polls of a user's feed when this worker commits analyses for
+    them. Other workers' commits are only seen when a poll re-reads the feed.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+
+    def listen(self, anonymous_id: str) -> asyncio.Future:
+        """A future resolved on the next commit for this user"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(anonymous_id, set()).add(future)
+        return future
+
+    def cancel(self, anonymous_id: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(anonymous_id)
+        if waiters is not None:
+            waiters.discard(future)
+            if not waiters:
+                del self._waiters[anonymous_id]
+
+    def notify(self, anonymous_ids: Iterable[str]) -> None:
+        """Wake the polls of users whose analyses were just committed"""
+        for anonymous_id in set(anonymous_ids):
+            for future in self._waiters.pop(anonymous_id, ()):
+                # Polls may wait on another event loop than the writer's
+                loop = future.get_loop()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(_wake, future)
+
+    def stats(self) -> dict:
+        return {"waiting": sum(len(waiters) for waiters in self._waiters.values())}
+
+
+change_notifier = ChangeNotifier()
@@ -0,0 +1,194 @@
+"""Per-user dashboard summaries, kept current as analyses and usage are written."""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.database import upsert_totals
+from app.models import Analysis, AnonymousUsage, ArchivedAnalysis, DashboardSummary
+
+# Latest scores kept for the trend
+RECENT_SCORES = 10
+INSERT_CHUNK_SIZE = 500
+
+Point = Tuple[datetime, float]
+
+
+def _empty(anonymous_id: str) -> Dict[str, Any]:
+    return {
+        "anonymous_id": anonymous_id,
+        "analysis_count": 0,
+        "overall_sum": 0.0,
+        "best_score": None,
+        "worst_score": None,
+        "last_analysis_at": None,
+        "recent_scores": [],
+        "quota_used": 0,
+    }
+
+
+def _recent(recent: List[list], points: Iterable[Point]) -> List[list]:
+    merged = recent + [[created_at.isoformat(), score] for created_at, score in points]
+    # ISO timestamps sort chronologically
+    return sorted(merged, key=lambda point: point[0])[-RECENT_SCORES:]
+
+
+def record_summary_points(db: Session, points: Dict[str, List[Point]]) -> None:
+    """
+    Fold (created_at, overall score) points into their users' summaries, in
+    the caller's transaction. Rows are locked until commit, in key order, so
+    concurrent writers merge rather than overwrite.
+    """
+    if not points:
+        return
+    keys = sorted(points)
+    rows = {
+        row.anonymous_id: row
+        for row in db.query(DashboardSummary)
+        .filter(DashboardSummary.anonymous_id.in_(keys))
+        .order_by(DashboardSummary.anonymous_id)
+        .with_for_update()
+    }
+    for anonymous_id in keys:
+        row = rows.get(anonymous_id)
+        if row is None:
+            # A concurrent first write fails with an IntegrityError, which
+            # write_analyses retries
+            row = DashboardSummary(**_empty(anonymous_id))
+            db.add(row)
+        scores = [score for _, score in points[anonymous_id]]
+        known = [s for s in (row.best_score, row.worst_score) if s is not None]
+        row.analysis_count += len(scores)
+        row.overall_sum += sum(scores)
+        row.best_score = max(scores + known)
+        row.worst_score = min(scores + known)
+        last = max(created_at for created_at, _ in points[anonymous_id])
+        if row.last_analysis_at is None or last > row.last_analysis_at:
+            row.last_analysis_at = last
+        row.recent_scores = _recent(row.recent_scores, points[anonymous_id])
+    db.flush()
+
+
+def record_summaries(db: Session, analyses: List[Analysis]) -> None:
+    """Summaries for a batch of analyses being written (after their flush)"""
+    points: Dict[str, List[Point]] = {}
+    for analysis in analyses:
+        points.setdefault(analysis.anonymous_id, []).append(
+            (analysis.created_at, analysis.overall_score)
+        )
+    record_summary_points(db, points)
+
+
+def record_usage(db: Session, increments: Dict[str, int]) -> None:
+    """Add flushed usage increments to the summaries, in the flush's transaction"""
+    upsert_totals(
+        db,
+        DashboardSummary,
+        [
+            {**_empty(anonymous_id), "quota_used": n}
+            for anonymous_id, n in sorted(increments.items())
+        ],
+        summed=("quota_used",),
+    )
+
+
+def rebuild_dashboard_summaries(db: Session) -> int:
+    """
+    Recompute every summary from the stored and archived analyses and the
+    usage counters, in one transaction so readers see the old or the new
+    summaries. Returns how many were written (blocking).
+    """
+    db.query(DashboardSummary).delete(synchronize_session=False)
+    rows: Dict[str, Dict[str, Any]] = {}
+    for model in (Analysis, ArchivedAnalysis):
+        totals = db.query(
+            model.anonymous_id,
+            func.count().label("count"),
+            func.sum(model.overall_score).label("overall_sum"),
+            func.max(model.overall_score).label("best_score"),
+            func.min(model.overall_score).label("worst_score"),
+            func.max(model.created_at).label("last_analysis_at"),
+        ).group_by(model.anonymous_id)
+        for total in totals:
+            row = rows.setdefault(total.anonymous_id, _empty(total.anonymous_id))
+            row["analysis_count"] += total.count
+            row["overall_sum"] += total.overall_sum or 0.0
+            for column, pick in (("best_score", max), ("worst_score", min)):
+                known = [
+                    v for v in (row[column], getattr(total, column)) if v is not None
+                ]
+                row[column] = pick(known) if known else None
+            if total.last_analysis_at is not None and (
+                row["last_analysis_at"] is None
+                or total.last_analysis_at > row["last_analysis_at"]
+            ):
+                row["last_analysis_at"] = total.last_analysis_at
+
+        rank = (
+            func.row_number()
+            .over(
+                partition_by=model.anonymous_id,
+                order_by=(model.created_at.desc(), model.id.desc()),
+            )
+            .label("rank")
+        )
+        ranked = (
+            db.query(model.anonymous_id, model.created_at, model.overall_score, rank)
+            .filter(model.created_at.isnot(None))
+            .subquery()
+        )
+        latest: Dict[str, List[Point]] = {}
+        for point in db.query(ranked).filter(ranked.c.rank <= RECENT_SCORES):
+            latest.setdefault(point.anonymous_id, []).append(
+                (point.created_at, point.overall_score)
+            )
+        for anonymous_id, points in latest.items():
+            rows[anonymous_id]["recent_scores"] = _recent(
+                rows[anonymous_id]["recent_scores"], points
+            )
+
+    usage = db.query(AnonymousUsage.anonymous_id, AnonymousUsage.analysis_count)
+    for anonymous_id, analysis_count in usage:
+        row = rows.setdefault(anonymous_id, _empty(anonymous_id))
+        row["quota_used"] = analysis_count or 0
+
+    values = list(rows.values())
+    for start in range(0, len(values), INSERT_CHUNK_SIZE):
+        db.execute(insert(DashboardSummary), values[start : start + INSERT_CHUNK_SIZE])
+    db.commit()
+    return len(values)
+
+
+def get_dashboard_summary(db: Session, anonymous_id: str) -> Dict[str, Any]:
+    """A user's dashboard summary, from one primary key read"""
+    row = db.get(DashboardSummary, anonymous_id)
+    if row is None:
+        row = DashboardSummary(**_empty(anonymous_id))
+    count = row.analysis_count
+    recent = [
+        {"timestamp": timestamp, "overall_score": score}
+        for timestamp, score in row.recent_scores
+    ]
+    return {
+        "count": count,
+        "average_score": round(row.overall_sum / count, 2) if count else None,
+        "best_score": row.best_score,
+        "worst_score": row.worst_score,
+        "last_analysis_at": (
+            row.last_analysis_at.isoformat() if row.last_analysis_at else None
+        ),
+        "recent": recent,
+        "trend": _trend([point["overall_score"] for point in recent]),
+        "quota_used": row.quota_used,
+    }
+
+
+def _trend(scores: List[float]) -> Optional[float]:
+    """Average of the newer half of the recent scores less that of the older half"""
+    if len(scores) < 2:
+        return None
+    half = len(scores) // 2
+    older, newer = scores[:half], scores[-half:]
+    return round(sum(newer) / len(newer) - sum(older) / len(older), 2)
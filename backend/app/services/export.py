@@ -0,0 +1,202 @@
+"""Streaming export of stored analyses as NDJSON, CSV or Parquet."""
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import csv
+import io
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Analysis, AnalysisResult
+from app.responses import dumps
+from app.services.persistence import load_sections
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency, only needed for Parquet exports
+    pyarrow = None
+
+# Exportable fields, mapped to the columns that back them; result sections are
+# read from the stored results, which may be deltas
+EXPORT_FIELDS = {
+    "id": Analysis.id,
+    "anonymous_id": Analysis.anonymous_id,
+    "url": Analysis.url,
+    "canonical_url": Analysis.canonical_url,
+    "overall_score": Analysis.overall_score,
+    "timestamp": Analysis.created_at,
+    **{name: None for name in AnalysisResult.SECTIONS},
+}
+DEFAULT_EXPORT_FIELDS = [
+    "id",
+    "anonymous_id",
+    "url",
+    "canonical_url",
+    "overall_score",
+    "timestamp",
+]
+
+# Format name -> media type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parse_export_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field names, validated; the defaults when empty"""
+    if not fields:
+        return DEFAULT_EXPORT_FIELDS
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in EXPORT_FIELDS]
+    if unknown or not selected:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown) or '(none given)'}. "
+            f"Allowed: {', '.join(EXPORT_FIELDS)}"
+        )
+    return selected
+
+
+def iter_analysis_chunks(
+    db: Session,
+    fields: List[str],
+    anonymous_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    chunk_size: int = settings.export_chunk_size,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Analyses oldest first, chunk_size rows at a time, read through a
+    server-side cursor. Only the current chunk and its sections are in memory.
+    """
+    sections = [f for f in fields if f in AnalysisResult.SECTIONS]
+    columns = [Analysis.result_hash] + [
+        EXPORT_FIELDS[f].label(f) for f in fields if f not in sections
+    ]
+    query = select(*columns)
+    if anonymous_id is not None:
+        query = query.where(Analysis.anonymous_id == anonymous_id)
+    if since is not None:
+        query = query.where(Analysis.created_at >= since)
+    query = query.order_by(Analysis.created_at, Analysis.id).execution_options(
+        stream_results=True, yield_per=chunk_size
+    )
+
+    for rows in db.execute(query).partitions():
+        results = load_sections(db, {row.result_hash for row in rows}, sections)
+        yield [
+            {
+                f: (
+                    results.get(row.result_hash, {}).get(f)
+                    if f in sections
+                    else row._mapping[f]
+                )
+                for f in fields
+            }
+            for row in rows
+        ]
+
+
+def _ndjson(chunks, fields) -> Iterator[bytes]:
+    for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode("utf-8")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv(chunks, fields) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in chunks:
+        writer.writerows([_csv_value(row[f]) for f in fields] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(fields: List[str]):
+    types = {
+        "overall_score": pyarrow.float64(),
+        "timestamp": pyarrow.timestamp("us"),
+    }
+    # Sections are nested and loosely typed, so they are stored as JSON text
+    return pyarrow.schema([(f, types.get(f, pyarrow.string())) for f in fields])
+
+
+def _parquet(chunks, fields) -> Iterator[bytes]:
+    schema = _parquet_schema(fields)
+    sections = [f for f in fields if f in AnalysisResult.SECTIONS]
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for rows in chunks:
+            for row in rows:
+                for name in sections:
+                    if row[name] is not None:
+                        row[name] = dumps(row[name]).decode("utf-8")
+            # One row group per chunk
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}
+
+
+def check_export_format(fmt: str) -> None:
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    if fmt == "parquet" and pyarrow is None:
+        raise ValueError("Parquet exports need the pyarrow package installed")
+
+
+def export_analyses(
+    db: Session,
+    fmt: str,
+    fields: List[str],
+    anonymous_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    chunk_size: int = settings.export_chunk_size,
+) -> Iterator[bytes]:
+    """
+    Encoded export, produced incrementally one chunk of rows at a time as the
+    iterator is consumed (blocking). The format is checked up front.
+    """
+    check_export_format(fmt)
+    chunks = iter_analysis_chunks(db, fields, anonymous_id, since, chunk_size)
+    return (data for data in ENCODERS[fmt](chunks, fields) if data)
@@ -0,0 +1,211 @@
+"""Inverted index of failed and warned checks, maintained as analyses are written."""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import re
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import upsert_totals
+from app.models import Analysis, IssueCode, IssueDailyCount, IssueOccurrence
+from app.services.canonical import url_domain
+
+# Checks are indexed by severity; passed checks are not issues
+SEVERITIES = {"check-fail": "fail", "check-warn": "warn"}
+MAX_CODE_LENGTH = 80
+DAY = timedelta(days=1)
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def issue_code(section: str, text: str) -> str:
+    """
+    Stable code for a check, e.g. crawlability.no-robots-txt-found. Anything
+    after a colon is detail (such as an exception message) and not part of it.
+    """
+    slug = _NON_ALNUM.sub("-", text.split(":", 1)[0].lower()).strip("-")
+    return f"{section}.{slug}"[:MAX_CODE_LENGTH]
+
+
+def section_issues(sections: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Distinct failed and warned checks of a result, with their codes"""
+    issues: Dict[str, Dict[str, str]] = {}
+    for section, value in sections.items():
+        if not isinstance(value, dict):
+            continue
+        for issue in value.get("issues") or []:
+            # Older results and analyzer errors list bare strings, as failures
+            if isinstance(issue, str):
+                issue = {"type": "check-fail", "text": issue}
+            if not isinstance(issue, dict) or not issue.get("text"):
+                continue
+            severity = SEVERITIES.get(issue.get("type"))
+            if severity is None:
+                continue
+            code = issue_code(section, str(issue["text"]))
+            issues.setdefault(
+                code,
+                {
+                    "code": code,
+                    "section": section,
+                    "severity": severity,
+                    "text": str(issue["text"])[:500],
+                },
+            )
+    return list(issues.values())
+
+
+def record_issue_points(db: Session, records: Iterable[dict]) -> None:
+    """
+    Index the issues of analyses in the caller's transaction: one occurrence
+    row per issue and analysis, plus per-code totals and daily counts. Each
+    record has analysis_id, url, created_at and issues (see section_issues).
+    """
+    occurrences, codes, days = [], {}, {}
+    for record in records:
+        created_at = record["created_at"]
+        domain = url_domain(record["url"]) if record["url"] else None
+        for issue in record["issues"]:
+            code = issue["code"]
+            occurrences.append(
+                IssueOccurrence(
+                    code=code,
+                    analysis_id=record["analysis_id"],
+                    domain=domain,
+                    created_at=created_at,
+                )
+            )
+            row = codes.get(code)
+            if row is None:
+                row = codes[code] = {
+                    **issue,
+                    "count": 0,
+                    "first_seen_at": created_at,
+                    "last_seen_at": created_at,
+                }
+            row["count"] += 1
+            row["first_seen_at"] = min(row["first_seen_at"], created_at)
+            row["last_seen_at"] = max(row["last_seen_at"], created_at)
+            key = (code, created_at.date().isoformat())
+            days[key] = days.get(key, 0) + 1
+    if not occurrences:
+        return
+    db.add_all(occurrences)
+    upsert_totals(
+        db,
+        IssueCode,
+        list(codes.values()),
+        summed=("count",),
+        least=("first_seen_at",),
+        greatest=("last_seen_at",),
+    )
+    upsert_totals(
+        db,
+        IssueDailyCount,
+        [{"code": code, "day": day, "count": n} for (code, day), n in days.items()],
+        summed=("count",),
+    )
+
+
+def record_issues(db: Session, analyses: List[Analysis]) -> None:
+    """Index the issues of a batch of analyses being written (after their flush)"""
+    record_issue_points(
+        db,
+        (
+            {
+                "analysis_id": analysis.id,
+                "url": analysis.canonical_url or analysis.url,
+                "created_at": analysis.created_at,
+                "issues": section_issues(analysis.sections()),
+            }
+            for analysis in analyses
+        ),
+    )
+
+
+def _day_range(days: int, today: Optional[date]) -> tuple:
+    today = today or datetime.utcnow().date()
+    return today - DAY * (days - 1), today
+
+
+def top_issues(
+    db: Session,
+    k: int = 10,
+    days: Optional[int] = None,
+    severity: Optional[str] = None,
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    The k most frequent issues, all-time or over the last `days` days. Reads
+    the per-code totals, or the daily counts of the range, never analyses.
+    """
+    columns = [IssueCode.code, IssueCode.section, IssueCode.severity, IssueCode.text]
+    if days is None:
+        count = IssueCode.count
+        query = db.query(*columns, count.label("count"))
+    else:
+        first, last = _day_range(days, today)
+        count = func.sum(IssueDailyCount.count)
+        query = (
+            db.query(*columns, count.label("count"))
+            .join(IssueDailyCount, IssueDailyCount.code == IssueCode.code)
+            .filter(
+                IssueDailyCount.day >= first.isoformat(),
+                IssueDailyCount.day <= last.isoformat(),
+            )
+            .group_by(IssueCode.code)
+        )
+    if severity is not None:
+        query = query.filter(IssueCode.severity == severity)
+    rows = query.order_by(count.desc(), IssueCode.code).limit(k)
+    return [{**row._mapping, "count": int(row.count)} for row in rows]
+
+
+def issue_report(
+    db: Session,
+    code: str,
+    days: int = 30,
+    k: int = 10,
+    today: Optional[date] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    One issue: all-time totals, daily counts and the k domains it was found on
+    most over the last `days` days; None for an unknown code.
+    """
+    issue = db.get(IssueCode, code)
+    if issue is None:
+        return None
+    first, last = _day_range(days, today)
+    daily = (
+        db.query(IssueDailyCount.day, IssueDailyCount.count)
+        .filter(
+            IssueDailyCount.code == code,
+            IssueDailyCount.day >= first.isoformat(),
+            IssueDailyCount.day <= last.isoformat(),
+        )
+        .order_by(IssueDailyCount.day)
+    )
+    count = func.count().label("count")
+    domains = (
+        db.query(IssueOccurrence.domain, count)
+        .filter(
+            IssueOccurrence.code == code,
+            IssueOccurrence.created_at >= datetime.combine(first, time.min),
+            IssueOccurrence.created_at < datetime.combine(last, time.min) + DAY,
+            IssueOccurrence.domain.isnot(None),
+        )
+        .group_by(IssueOccurrence.domain)
+        .order_by(count.desc(), IssueOccurrence.domain)
+        .limit(k)
+    )
+    return {
+        "code": issue.code,
+        "section": issue.section,
+        "severity": issue.severity,
+        "text": issue.text,
+        "count": issue.count,
+        "first_seen_at": issue.first_seen_at.isoformat(),
+        "last_seen_at": issue.last_seen_at.isoformat(),
+        "days": [{"date": row.day, "count": row.count} for row in daily],
+        "top_domains": [{"domain": row.domain, "count": row.count} for row in domains],
+    }
@@ -0,0 +1,228 @@
+"""Mergeable score histograms per section and schema type, for percentile ranks."""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import re
+import threading
+import zlib
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, run_db_write, sqlite_write_lock
+from app.models import ScorePoint, ScoreSketch
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("overall",) + ScorePoint.SECTIONS
+# Scores run from 0 to 100 and are reported to a decimal or two
+RESOLUTION = 0.1
+BINS = 1001
+# Schema types come from page markup; only plausible type names are tracked
+SCHEMA_TYPE = re.compile(r"^[A-Za-z][A-Za-z0-9]{0,63}$")
+
+Key = Tuple[str, str]
+
+
+class ScoreHistogram:
+    """
+    Counts of scores in 0.1-wide bins over 0-100: a fixed-size quantile
+    sketch whose ranks are exact to the bin width. Histograms of different
+    workers or periods merge by adding their counts.
+    """
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts: Optional[Iterable[int]] = None):
+        self.counts = array("Q", counts if counts is not None else bytes(8 * BINS))
+        self.total = sum(self.counts)
+
+    @staticmethod
+    def _bin(score: float) -> int:
+        return min(BINS - 1, max(0, int(round(score / RESOLUTION))))
+
+    def add(self, score: float, n: int = 1) -> None:
+        self.counts[self._bin(score)] += n
+        self.total += n
+
+    def merge(self, other: "ScoreHistogram") -> None:
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.total += other.total
+
+    def rank(self, score: float) -> Optional[float]:
+        """Percent of scores below this one, counting equal scores as half"""
+        if not self.total:
+            return None
+        i = self._bin(score)
+        below = sum(self.counts[:i]) + self.counts[i] / 2
+        return round(100 * below / self.total, 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Smallest score with at least a q fraction of scores at or below it"""
+        if not self.total:
+            return None
+        target, seen = q * self.total, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return round(i * RESOLUTION, 1)
+        return 100.0
+
+    def to_bytes(self) -> bytes:
+        # Mostly empty bins, so this compresses to a few hundred bytes
+        return zlib.compress(self.counts.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ScoreHistogram":
+        counts = array("Q")
+        counts.frombytes(zlib.decompress(data))
+        return cls(counts)
+
+
+def _score(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def score_keys(data: Dict[str, Any]) -> List[Tuple[Key, float]]:
+    """The histograms an analysis result contributes to, with its score in each"""
+    keys = []
+    overall = _score(data.get("overall_score"))
+    if overall is not None:
+        keys.append((("section", "overall"), overall))
+    for name in ScorePoint.SECTIONS:
+        score = _score((data.get(name) or {}).get("total_score"))
+        if score is not None:
+            keys.append((("section", name), score))
+    schema_types = (data.get("structured_data") or {}).get("schema_types") or []
+    if overall is not None:
+        for schema_type in sorted(set(schema_types)):
+            if isinstance(schema_type, str) and SCHEMA_TYPE.match(schema_type):
+                keys.append((("schema_type", schema_type), overall))
+    return keys
+
+
+class ScorePercentiles:
+    """
+    In-process score histograms. Each completed analysis is added to the
+    merged histograms used for ranks and to a pending delta; flushes add the
+    deltas into the stored rows and reload them, so every worker converges
+    on the histograms of all workers.
+    """
+
+    def __init__(self, max_schema_types: int):
+        self.max_schema_types = max_schema_types
+        self._lock = threading.Lock()
+        self._sketches: Dict[Key, ScoreHistogram] = {}
+        self._pending: Dict[Key, ScoreHistogram] = {}
+        self.observed = 0
+        self.flushes = 0
+
+    def _tracked(self, key: Key) -> bool:
+        if key in self._sketches or key[0] != "schema_type":
+            return True
+        schema_types = sum(1 for dimension, _ in self._sketches if dimension == key[0])
+        return schema_types < self.max_schema_types
+
+    def observe(self, data: Dict[str, Any]) -> None:
+        """Count a completed analysis result"""
+        with self._lock:
+            for key, score in score_keys(data):
+                if not self._tracked(key):
+                    continue
+                self._sketches.setdefault(key, ScoreHistogram()).add(score)
+                self._pending.setdefault(key, ScoreHistogram()).add(score)
+            self.observed += 1
+
+    def ranks(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Percentile rank of an analysis result per section and schema type"""
+        ranks: Dict[str, Any] = {"schema_types": {}}
+        with self._lock:
+            for (dimension, name), score in score_keys(data):
+                sketch = self._sketches.get((dimension, name))
+                rank = sketch.rank(score) if sketch is not None else None
+                if dimension == "section":
+                    ranks[name] = rank
+                elif rank is not None:
+                    ranks["schema_types"][name] = rank
+        return ranks
+
+    def load(self, db: Session) -> int:
+        """Replace the histograms with the stored ones plus unflushed scores"""
+        sketches = {
+            (row.dimension, row.key): ScoreHistogram.from_bytes(row.bins)
+            for row in db.query(ScoreSketch)
+        }
+        with self._lock:
+            for key, delta in self._pending.items():
+                sketches.setdefault(key, ScoreHistogram()).merge(delta)
+            self._sketches = sketches
+        return len(sketches)
+
+    def flush(self, db: Session) -> int:
+        """Add pending scores into the stored histograms, then reload (blocking)"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            try:
+                # Lock first, or two workers flushing at once on SQLite could
+                # both merge into the same stored bins and one delta be lost
+                sqlite_write_lock(db, ScoreSketch)
+                # Key order, so concurrent flushes lock rows without deadlocking
+                for (dimension, key), delta in sorted(batch.items()):
+                    row = db.get(ScoreSketch, (dimension, key), with_for_update=True)
+                    if row is None:
+                        db.add(
+                            ScoreSketch(
+                                dimension=dimension,
+                                key=key,
+                                count=delta.total,
+                                bins=delta.to_bytes(),
+                            )
+                        )
+                        continue
+                    stored = ScoreHistogram.from_bytes(row.bins)
+                    stored.merge(delta)
+                    row.count, row.bins = stored.total, stored.to_bytes()
+                db.commit()
+            except Exception:
+                db.rollback()
+                # Put the deltas back so the next flush retries them
+                with self._lock:
+                    for key, delta in batch.items():
+                        self._pending.setdefault(key, ScoreHistogram()).merge(delta)
+                raise
+            self.flushes += 1
+        self.load(db)
+        return len(batch)
+
+    def flush_now(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def run(self, interval: float) -> None:
+        """Flush on a fixed interval until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_db_write(self.flush_now)
+            except Exception as e:
+                logger.error(f"Failed to flush score percentiles: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "histograms": len(self._sketches),
+                "pending_histograms": len(self._pending),
+                "observed": self.observed,
+                "flushes": self.flushes,
+            }
+
+
+score_percentiles = ScorePercentiles(settings.percentile_max_schema_types)
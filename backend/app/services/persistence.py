@@ -0,0 +1,269 @@
+"""Batched, write-behind persistence of completed analyses."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, undefer
+
+from app.config import settings
+from app.database import SessionLocal, run_db_write, sqlite_write_lock
+from app.models import Analysis, AnalysisResult
+from app.responses import dumps
+from app.services.aggregates import record_aggregates
+from app.services.changes import assign_change_seqs, change_notifier
+from app.services.dashboard import record_summaries
+from app.services.issues import record_issues
+from app.services.search import record_search
+from app.services.trends import record_scores
+
+logger = logging.getLogger(__name__)
+
+# Results whose delta is larger than this share of the full payload are stored
+# as keyframes instead
+MAX_DELTA_RATIO = 0.5
+
+
+def _latest_keyframe(db: Session, canonical_url: str) -> Optional[AnalysisResult]:
+    """
+    Keyframe behind the newest stored result for a URL, unless it already
+    has enough deltas that the next result should start a new keyframe
+    """
+    latest = (
+        db.query(AnalysisResult.hash, AnalysisResult.base_hash)
+        .join(Analysis, Analysis.result_hash == AnalysisResult.hash)
+        .filter(Analysis.canonical_url == canonical_url)
+        .order_by(Analysis.created_at.desc())
+        .first()
+    )
+    if latest is None:
+        return None
+    keyframe_hash = latest.base_hash or latest.hash
+    deltas = (
+        db.query(func.count(AnalysisResult.hash))
+        .filter(AnalysisResult.base_hash == keyframe_hash)
+        .scalar()
+    )
+    if deltas >= settings.result_keyframe_interval - 1:
+        return None
+    return db.get(AnalysisResult, keyframe_hash, options=[undefer("*")])
+
+
+def _storage_row(db: Session, analysis: Analysis) -> AnalysisResult:
+    """The row to store for a new result: a delta when one is small enough"""
+    result = analysis.result
+    if settings.result_keyframe_interval <= 1 or not analysis.canonical_url:
+        return result
+    keyframe = _latest_keyframe(db, analysis.canonical_url)
+    if keyframe is None:
+        return result
+    row = AnalysisResult.as_delta(result, keyframe)
+    if len(dumps(row.delta)) > MAX_DELTA_RATIO * len(dumps(result.sections())):
+        return result
+    return row
+
+
+def _store_results(db: Session, analyses: List[Analysis]) -> int:
+    """Add the result payloads not stored yet; returns how many were new"""
+    owners = {}
+    for analysis in analyses:
+        owners.setdefault(analysis.result_hash, analysis)
+    stored = {
+        row.hash
+        for row in db.query(AnalysisResult.hash).filter(
+            AnalysisResult.hash.in_(list(owners))
+        )
+    }
+    new = [
+        _storage_row(db, analysis)
+        for key, analysis in owners.items()
+        if key not in stored
+    ]
+    db.add_all(new)
+    return len(new)
+
+
+def load_sections(
+    db: Session, hashes: Iterable[str], sections: List[str]
+) -> Dict[str, Dict]:
+    """Requested sections of each result by hash, loading only those columns"""
+    hashes = list(hashes)
+    if not sections or not hashes:
+        return {}
+    columns = [undefer(getattr(AnalysisResult, name)) for name in sections]
+    results = (
+        db.query(AnalysisResult)
+        .options(*columns, joinedload(AnalysisResult.base).options(*columns))
+        .filter(AnalysisResult.hash.in_(hashes))
+    )
+    return {result.hash: result.sections(sections) for result in results}
+
+
+def write_analyses(db: Session, analyses: List[Analysis]) -> int:
+    """
+    Insert a batch of analyses in a single transaction (blocking). Result
+    payloads are stored once; returns how many new ones the batch added.
+    """
+    def write() -> int:
+        # Lock before checking which results are stored, so the retention job
+        # cannot delete one this batch reuses before it commits
+        sqlite_write_lock(db, AnalysisResult)
+        new_results = _store_results(db, analyses)
+        # Analysis.result is view-only, so results must be flushed first for
+        # databases that enforce the foreign key
+        db.flush()
+        assign_change_seqs(db, analyses)
+        db.add_all(analyses)
+        db.flush()
+        record_scores(db, analyses)
+        record_aggregates(db, analyses)
+        record_issues(db, analyses)
+        record_search(db, analyses)
+        record_summaries(db, analyses)
+        db.commit()
+        return new_results
+
+    try:
+        return write()
+    except IntegrityError:
+        # Another worker stored one of the same payloads first; retry against it
+        db.rollback()
+        return write()
+
+
+class AnalysisWriter:
+    """
+    Groups completed analyses into batched transactions. A batch is committed
+    once it reaches max_batch rows or max_delay seconds after its first row.
+
+    Callers either await the commit (durable) or return immediately; rows
+    still waiting for their batch are readable through pending().
+    """
+
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self._pending: Dict[str, Analysis] = {}
+        self.batches = 0
+        self.rows = 0
+        self.failed_rows = 0
+        self.results_stored = 0
+        self.last_commit_ms = 0.0
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, analysis: Analysis, durable: bool = True) -> None:
+        """Queue an analysis for the next batch, optionally waiting for its commit"""
+        self._ensure_worker()
+        committed = self._loop.create_future()
+        self._pending[analysis.id] = analysis
+        self._queue.put_nowait((analysis, committed))
+        if durable:
+            await committed
+
+    def pending(self, analysis_id: str) -> Optional[Analysis]:
+        """An analysis accepted but not yet committed, if any"""
+        return self._pending.get(analysis_id)
+
+    async def _next_batch(self) -> Tuple[List[Tuple[Analysis, asyncio.Future]], bool]:
+        """Collect the next batch; the flag is set once drain() asked us to stop"""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            getter = asyncio.ensure_future(self._queue.get())
+            done, _ = await asyncio.wait({getter}, timeout=remaining)
+            if not done:
+                getter.cancel()
+                break
+            item = getter.result()
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, analyses: List[Analysis]) -> int:
+        # Keep attributes loaded after commit; pending() readers may still hold them
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            return write_analyses(db, analyses)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _commit(self, batch: List[Tuple[Analysis, asyncio.Future]]) -> None:
+        analyses = [analysis for analysis, _ in batch]
+        started = time.perf_counter()
+        try:
+            new_results = await run_db_write(self._write, analyses)
+        except Exception as e:
+            self.failed_rows += len(batch)
+            logger.error(f"Failed to persist {len(batch)} analyses: {str(e)}")
+            for _, committed in batch:
+                if not committed.done():
+                    committed.set_exception(e)
+                    # Nobody awaits a non-durable write, so retrieve the error here
+                    committed.exception()
+        else:
+            self.batches += 1
+            self.rows += len(batch)
+            self.results_stored += new_results
+            self.last_commit_ms = (time.perf_counter() - started) * 1000
+            change_notifier.notify(analysis.anonymous_id for analysis in analyses)
+            for _, committed in batch:
+                if not committed.done():
+                    committed.set_result(None)
+        finally:
+            for analysis in analyses:
+                self._pending.pop(analysis.id, None)
+
+    async def _run(self) -> None:
+        while True:
+            batch, closing = await self._next_batch()
+            if batch:
+                await self._commit(batch)
+            if closing:
+                return
+
+    async def drain(self) -> None:
+        """Commit everything queued so far and stop the worker"""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "results_stored": self.results_stored,
+            "results_reused": self.rows - self.results_stored,
+            "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+        }
+
+
+analysis_writer = AnalysisWriter(
+    max_batch=settings.analysis_batch_size,
+    max_delay=settings.analysis_batch_max_delay,
+)
@@ -0,0 +1,120 @@
+"""Two-tier analyzer result cache with stale-while-revalidate."""
+
+from typing import Any, Awaitable, Callable, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.database import run_db
+from app.services.cache import LRUCache
+from app.services.result_store import SharedResultStore, result_store
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class ResultCache:
+    """
+    An in-process LRU in front of the shared on-disk store.
+
+    Entries younger than fresh_ttl are fresh. Older entries are stale until
+    the store expires them; a stale entry is still served, and the caller is
+    expected to schedule a refresh with revalidate().
+    """
+
+    def __init__(self, memory: LRUCache, store: SharedResultStore, fresh_ttl: float):
+        self.memory = memory
+        self.store = store
+        self.fresh_ttl = fresh_ttl
+        self._refreshing: Set[str] = set()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def _store_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            return await run_db(self.store.get, key)
+        except Exception as e:
+            logger.warning(f"Result store lookup failed for {key}: {str(e)}")
+            return None
+
+    async def lookup(
+        self, key: str, max_age: Optional[float] = None
+    ) -> Tuple[str, Optional[Any], float]:
+        """
+        Return (status, data, age). max_age caps how old a result the caller
+        accepts at all; anything older is reported as a miss.
+        """
+        now = time.time()
+        fresh_age = self.fresh_ttl if max_age is None else min(self.fresh_ttl, max_age)
+        stale_age = self.store.ttl if max_age is None else min(self.store.ttl, max_age)
+
+        entry = self.memory.get(key)
+        if entry is None or now - entry[1] > fresh_age:
+            # Another worker may have stored something newer
+            stored = await self._store_get(key)
+            if stored is not None and (entry is None or stored[1] > entry[1]):
+                entry = stored
+                self.memory.set(key, entry)
+
+        if entry is None or now - entry[1] > stale_age:
+            self.misses += 1
+            return MISS, None, 0.0
+
+        data, stored_at = entry
+        age = now - stored_at
+        if age <= fresh_age:
+            self.fresh_hits += 1
+            return FRESH, data, age
+        self.stale_hits += 1
+        return STALE, data, age
+
+    async def put(self, key: str, data: Any) -> None:
+        stored_at = time.time()
+        self.memory.set(key, (data, stored_at))
+        try:
+            await run_db(self.store.set, key, data, stored_at)
+        except Exception as e:
+            logger.warning(f"Result store write failed for {key}: {str(e)}")
+
+    def revalidate(self, key: str, compute: Callable[[], Awaitable[Optional[Any]]]):
+        """Refresh key in the background unless a refresh is already running"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                data = await compute()
+                if data is not None:
+                    await self.put(key, data)
+                    self.refreshes += 1
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {str(e)}")
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.get_running_loop().create_task(refresh())
+
+    def stats(self) -> dict:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refreshing": len(self._refreshing),
+            "memory": self.memory.stats(),
+            "store": self.store.stats(),
+        }
+
+
+result_cache = ResultCache(
+    memory=LRUCache(settings.result_memory_cache_size),
+    store=result_store,
+    fresh_ttl=settings.result_fresh_ttl,
+)
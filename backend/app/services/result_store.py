@@ -0,0 +1,145 @@
+"""SQLite-backed result cache shared by every worker process on a host."""
+
+from typing import Any, Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from app.config import settings
+from app.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class SharedResultStore:
+    """
+    A key-value store in a local SQLite file. All uvicorn workers open the same
+    file, so a result computed by one worker is a hit for the others. Entries
+    expire after ttl seconds; once the store holds more than max_entries, the
+    least recently read entries are evicted.
+
+    Hit/miss counters are per worker process.
+    """
+
+    # Check the size bound every this many writes rather than on each one
+    EVICT_EVERY = 64
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_accessed_at"
+                " ON results (accessed_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) for a live entry, or None (blocking)"""
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, stored_at, expires_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self._count(misses=1)
+            return None
+        value, stored_at, expires_at = row
+        if expires_at <= now:
+            conn.execute(
+                "DELETE FROM results WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            self._count(misses=1, expired=1)
+            return None
+        conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(hits=1)
+        return orjson.loads(value), stored_at
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """Store value under key with the configured TTL (blocking)"""
+        conn = self._connection()
+        now = time.time()
+        stored_at = stored_at or now
+        conn.execute(
+            "INSERT OR REPLACE INTO results"
+            " (key, value, stored_at, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, dumps(value), stored_at, stored_at + self.ttl, now),
+        )
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently read beyond max_entries"""
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM results WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            removed += conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+        self._count(evicted=removed)
+        return removed
+
+    def _count(self, hits=0, misses=0, expired=0, evicted=0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.expired += expired
+            self.evicted += evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "worker_pid": os.getpid(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+result_store = SharedResultStore(
+    path=settings.result_store_path,
+    ttl=settings.result_cache_ttl,
+    max_entries=settings.result_store_max_entries,
+)
@@ -0,0 +1,200 @@
+"""Retention: moves aged analyses into monthly Parquet archive files."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, run_db_write
+from app.models import Analysis, AnalysisResult, ArchivedAnalysis
+from app.responses import dumps
+from app.services.persistence import load_sections
+from app.services.search import unindex_analyses
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency, only needed for archiving
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = AnalysisResult.SECTIONS
+# Small row groups keep by-id reads cheap: files are sorted by id, so the
+# row group statistics narrow a lookup down to one group
+ROW_GROUP_SIZE = 1000
+
+
+def _archive_schema():
+    # Sections are nested and loosely typed, so they are stored as JSON text
+    return pyarrow.schema(
+        [
+            ("id", pyarrow.string()),
+            ("anonymous_id", pyarrow.string()),
+            ("url", pyarrow.string()),
+            ("canonical_url", pyarrow.string()),
+            ("overall_score", pyarrow.float64()),
+            ("created_at", pyarrow.timestamp("us")),
+            *[(name, pyarrow.string()) for name in SECTIONS],
+        ]
+    )
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Archiving analyses needs the pyarrow package installed")
+
+
+def _write_part(archive_dir: str, month: str, records: List[Dict[str, Any]]) -> str:
+    """Write records as a new part file of a month; returns its relative path"""
+    relative = os.path.join(month, f"part-{uuid.uuid4().hex}.parquet")
+    path = os.path.join(archive_dir, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pyarrow.Table.from_pylist(
+        sorted(records, key=lambda record: record["id"]), schema=_archive_schema()
+    )
+    # Never leave a partial file under its final name
+    pyarrow.parquet.write_table(table, path + ".tmp", row_group_size=ROW_GROUP_SIZE)
+    os.replace(path + ".tmp", path)
+    return relative
+
+
+def _delete_unreferenced_results(db: Session) -> int:
+    """Drop stored results no remaining analysis or delta points at"""
+    deleted = 0
+    referenced = select(Analysis.result_hash)
+    bases = select(AnalysisResult.base_hash).where(AnalysisResult.base_hash.isnot(None))
+    # Deltas first, which can leave their keyframes unreferenced for the second pass
+    for deltas_only in (True, False):
+        query = db.query(AnalysisResult).filter(
+            AnalysisResult.hash.notin_(referenced), AnalysisResult.hash.notin_(bases)
+        )
+        if deltas_only:
+            query = query.filter(AnalysisResult.base_hash.isnot(None))
+        deleted += query.delete(synchronize_session=False)
+    return deleted
+
+
+def archive_analyses(
+    db: Session,
+    cutoff: datetime,
+    archive_dir: str = settings.archive_dir,
+    batch_size: int = settings.archive_batch_size,
+) -> int:
+    """
+    Move analyses created before cutoff into monthly archive files, one batch
+    per transaction, and drop results nothing references anymore. Each file
+    is written before its rows are replaced by summaries, so a failed batch
+    leaves an unreferenced file rather than lost analyses. Returns how many
+    analyses moved (blocking).
+    """
+    _require_pyarrow()
+    moved = 0
+    while True:
+        rows = (
+            db.query(
+                Analysis.id,
+                Analysis.anonymous_id,
+                Analysis.url,
+                Analysis.canonical_url,
+                Analysis.overall_score,
+                Analysis.created_at,
+                Analysis.result_hash,
+            )
+            .filter(Analysis.created_at < cutoff)
+            .order_by(Analysis.created_at, Analysis.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        results = load_sections(db, {row.result_hash for row in rows}, list(SECTIONS))
+        months: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            sections = results.get(row.result_hash, {})
+            record = dict(row._mapping)
+            del record["result_hash"]
+            for name in SECTIONS:
+                value = sections.get(name)
+                record[name] = None if value is None else dumps(value).decode("utf-8")
+            months.setdefault(row.created_at.strftime("%Y-%m"), []).append(record)
+
+        summaries = []
+        for month, records in months.items():
+            archive = _write_part(archive_dir, month, records)
+            summaries.extend(
+                ArchivedAnalysis(
+                    id=record["id"],
+                    anonymous_id=record["anonymous_id"],
+                    canonical_url=record["canonical_url"],
+                    overall_score=record["overall_score"],
+                    created_at=record["created_at"],
+                    archive=archive,
+                )
+                for record in records
+            )
+        db.add_all(summaries)
+        ids = [row.id for row in rows]
+        db.query(Analysis).filter(Analysis.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        # Like history and the change feed, search covers stored analyses only
+        unindex_analyses(db, ids)
+        db.commit()
+        moved += len(rows)
+        logger.info(f"Archived {moved} analyses created before {cutoff.date()}")
+
+    if moved:
+        deleted = _delete_unreferenced_results(db)
+        db.commit()
+        logger.info(f"Dropped {deleted} stored results left unreferenced")
+    return moved
+
+
+def load_archived_analysis(
+    db: Session, analysis_id: str, archive_dir: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Full record of an archived analysis, read from its archive file (blocking)"""
+    summary = db.get(ArchivedAnalysis, analysis_id)
+    if summary is None:
+        return None
+    _require_pyarrow()
+    table = pyarrow.parquet.read_table(
+        os.path.join(archive_dir or settings.archive_dir, summary.archive),
+        filters=[("id", "=", analysis_id)],
+    )
+    if table.num_rows == 0:
+        logger.error(f"Archived analysis {analysis_id} missing from {summary.archive}")
+        return None
+    record = table.slice(0, 1).to_pylist()[0]
+    for name in SECTIONS:
+        if record[name] is not None:
+            record[name] = json.loads(record[name])
+    return record
+
+
+def archive_now() -> int:
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=settings.archive_after_days)
+        return archive_analyses(db, cutoff)
+    finally:
+        db.close()
+
+
+async def run_retention(interval: float) -> None:
+    """Archive aged analyses on a fixed interval until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_db_write(archive_now)
+        except Exception as e:
+            logger.error(f"Failed to archive analyses: {str(e)}")
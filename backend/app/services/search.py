@@ -0,0 +1,334 @@
+"""Full-text search over analysis history: SQLite FTS5 or PostgreSQL tsvector."""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+from sqlalchemy import (
+    and_,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    or_,
+    table,
+    text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models import Analysis, ScorePoint
+from app.services.issues import section_issues
+
+MAX_QUERY_TERMS = 8
+REBUILD_BATCH_SIZE = 1000
+_WORD = re.compile(r"\w+")
+
+# The index has no model (see models.ANALYSIS_SEARCH_DDL); statements are built
+# on this lightweight table so they run as DML, on the writer
+_SEARCH = table(
+    "analysis_search",
+    *(
+        column(name)
+        for name in (
+            "owner",
+            "anonymous_id",
+            "analysis_id",
+            "created_at",
+            "url",
+            "title",
+            "overall_score",
+            "schema_types",
+            "issues",
+            "document",
+        )
+    ),
+)
+_SQLITE_COLUMNS = (
+    "url",
+    "title",
+    "schema_types",
+    "issues",
+    "analysis_id",
+    "overall_score",
+)
+_POSTGRES_COLUMNS = (
+    "analysis_id",
+    "anonymous_id",
+    "created_at",
+    "url",
+    "title",
+    "overall_score",
+)
+
+
+def parse_query(query: str) -> List[str]:
+    """Words of a search query; each matches indexed words starting with it"""
+    terms = _WORD.findall(query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        raise ValueError("Search query has no words")
+    return terms
+
+
+def _owner(anonymous_id: str) -> str:
+    # One FTS5 token per user, whatever characters the id contains
+    return "u" + anonymous_id.encode("utf-8").hex()
+
+
+def _timestamp(created_at: datetime) -> str:
+    # FTS5 columns are untyped; a fixed-width ISO string sorts chronologically
+    return created_at.isoformat(timespec="microseconds")
+
+
+def search_document(
+    analysis_id: str,
+    anonymous_id: str,
+    created_at: datetime,
+    url: str,
+    title: Optional[str],
+    overall_score: float,
+    sections: Dict[str, Any],
+) -> Dict[str, Any]:
+    """What the search index holds for one analysis"""
+    schema_types = (sections.get("structured_data") or {}).get("schema_types") or []
+    return {
+        "analysis_id": analysis_id,
+        "anonymous_id": anonymous_id,
+        "created_at": created_at,
+        "url": url,
+        "title": title,
+        "overall_score": overall_score,
+        "schema_types": " ".join(str(t) for t in schema_types),
+        "issues": " ".join(issue["text"] for issue in section_issues(sections)),
+    }
+
+
+def index_documents(db: Session, documents: Iterable[Dict[str, Any]]) -> None:
+    """Add documents to the search index, in the caller's transaction"""
+    documents = list(documents)
+    if not documents:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(
+            insert(_SEARCH),
+            [
+                {
+                    **{name: document[name] for name in _SQLITE_COLUMNS},
+                    "owner": _owner(document["anonymous_id"]),
+                    "created_at": _timestamp(document["created_at"]),
+                }
+                for document in documents
+            ],
+        )
+    elif dialect == "postgresql":
+        # Words only, so the parser does not keep URLs and hosts as single tokens
+        db.execute(
+            postgresql.insert(_SEARCH)
+            .values(document=func.to_tsvector("simple", bindparam("words")))
+            .on_conflict_do_nothing(index_elements=["analysis_id"]),
+            [
+                {
+                    **{name: document[name] for name in _POSTGRES_COLUMNS},
+                    "words": " ".join(
+                        _WORD.findall(
+                            " ".join(
+                                document[field] or ""
+                                for field in ("url", "title", "schema_types", "issues")
+                            )
+                        )
+                    ),
+                }
+                for document in documents
+            ],
+        )
+    # Other databases have no search index; search_analyses scans analyses there
+
+
+def record_search(db: Session, analyses: List[Analysis]) -> None:
+    """Index a batch of analyses being written (after their flush)"""
+    index_documents(
+        db,
+        (
+            search_document(
+                analysis.id,
+                analysis.anonymous_id,
+                analysis.created_at,
+                analysis.url,
+                analysis.title,
+                analysis.overall_score,
+                analysis.sections(),
+            )
+            for analysis in analyses
+        ),
+    )
+
+
+def unindex_analyses(db: Session, analysis_ids: List[str]) -> None:
+    """Drop analyses from the search index, in the caller's transaction"""
+    if analysis_ids and db.get_bind().dialect.name in ("sqlite", "postgresql"):
+        db.execute(delete(_SEARCH).where(_SEARCH.c.analysis_id.in_(analysis_ids)))
+
+
+def search_analyses(
+    db: Session,
+    anonymous_id: str,
+    terms: List[str],
+    limit: int,
+    after: Optional[Tuple[datetime, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    A user's analyses matching every term as a word prefix in the URL, title,
+    schema types or issue text, newest first, keyset-paginated like history.
+    """
+    dialect = db.get_bind().dialect.name
+    params: Dict[str, Any] = {"limit": limit}
+    if after is not None:
+        params["after_id"] = after[1]
+    if dialect == "sqlite":
+        words = " AND ".join(f'"{term}"*' for term in terms)
+        params["match"] = (
+            f'owner : "{_owner(anonymous_id)}" AND '
+            f"{{url title schema_types issues}} : ({words})"
+        )
+        where = "analysis_search MATCH :match"
+        if after is not None:
+            params["after"] = _timestamp(after[0])
+    elif dialect == "postgresql":
+        params["anonymous_id"] = anonymous_id
+        params["query"] = " & ".join(f"{term}:*" for term in terms)
+        where = (
+            "anonymous_id = :anonymous_id "
+            "AND document @@ to_tsquery('simple', :query)"
+        )
+        if after is not None:
+            params["after"] = after[0]
+    else:
+        return _scan_analyses(db, anonymous_id, terms, limit, after)
+
+    if after is not None:
+        where += (
+            " AND (created_at < :after OR (created_at = :after "
+            "AND analysis_id < :after_id))"
+        )
+    rows = db.execute(
+        text(
+            "SELECT analysis_id, url, title, overall_score, created_at "
+            f"FROM analysis_search WHERE {where} "
+            "ORDER BY created_at DESC, analysis_id DESC LIMIT :limit"
+        ),
+        params,
+    )
+    return [
+        {
+            "id": row.analysis_id,
+            "url": row.url,
+            "title": row.title,
+            "overall_score": row.overall_score,
+            "timestamp": (
+                datetime.fromisoformat(row.created_at)
+                if isinstance(row.created_at, str)
+                else row.created_at
+            ),
+        }
+        for row in rows
+    ]
+
+
+def _scan_analyses(
+    db: Session,
+    anonymous_id: str,
+    terms: List[str],
+    limit: int,
+    after: Optional[Tuple[datetime, str]],
+) -> List[Dict[str, Any]]:
+    # Fallback without a search index: URL and title only, by substring
+    query = db.query(
+        Analysis.id,
+        Analysis.url,
+        Analysis.title,
+        Analysis.overall_score,
+        Analysis.created_at,
+    ).filter(Analysis.anonymous_id == anonymous_id)
+    for term in terms:
+        query = query.filter(
+            or_(Analysis.url.ilike(f"%{term}%"), Analysis.title.ilike(f"%{term}%"))
+        )
+    if after is not None:
+        query = query.filter(
+            or_(
+                Analysis.created_at < after[0],
+                and_(Analysis.created_at == after[0], Analysis.id < after[1]),
+            )
+        )
+    rows = query.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(limit)
+    return [
+        {
+            "id": row.id,
+            "url": row.url,
+            "title": row.title,
+            "overall_score": row.overall_score,
+            "timestamp": row.created_at,
+        }
+        for row in rows
+    ]
+
+
+def _iter_documents(db: Session, batch_size: int):
+    """Search documents of every stored analysis, in id batches"""
+    # Imported here, as persistence imports this module to index analyses
+    from app.services.persistence import load_sections
+
+    last_id = ""
+    while True:
+        rows = (
+            db.query(
+                Analysis.id,
+                Analysis.anonymous_id,
+                Analysis.created_at,
+                Analysis.url,
+                Analysis.title,
+                Analysis.overall_score,
+                Analysis.result_hash,
+            )
+            .filter(Analysis.id > last_id, Analysis.created_at.isnot(None))
+            .order_by(Analysis.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        results = load_sections(
+            db, {row.result_hash for row in rows}, list(ScorePoint.SECTIONS)
+        )
+        yield [
+            search_document(
+                row.id,
+                row.anonymous_id,
+                row.created_at,
+                row.url,
+                row.title,
+                row.overall_score,
+                results.get(row.result_hash, {}),
+            )
+            for row in rows
+        ]
+        last_id = rows[-1].id
+
+
+def rebuild_search_index(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """
+    Re-index every stored analysis, in one transaction so
+    searches see the old or the new index. Returns how many were indexed
+    (blocking).
+    """
+    if db.get_bind().dialect.name not in ("sqlite", "postgresql"):
+        return 0
+    db.execute(delete(_SEARCH))
+    indexed = 0
+    for documents in _iter_documents(db, batch_size):
+        index_documents(db, documents)
+        indexed += len(documents)
+    db.commit()
+    return indexed
@@ -0,0 +1,224 @@
+"""Per-URL score time series: raw points, day/week rollups and trend queries."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import upsert_totals
+from app.models import Analysis, ScorePoint, ScoreRollup
+
+SECTIONS = ScorePoint.SECTIONS
+BUCKET_WIDTHS = {"day": timedelta(days=1), "week": timedelta(weeks=1)}
+# Additive rollup columns, merged by summing
+SUMMED = ("overall_sum",) + tuple(
+    f"{name}_{part}" for name in SECTIONS for part in ("sum", "count")
+)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the day, or of the week (Monday), that moment falls in"""
+    day = datetime(moment.year, moment.month, moment.day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def section_scores(sections: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """total_score of each scored section, None where a section is missing"""
+    scores = {}
+    for name in SECTIONS:
+        value = (sections.get(name) or {}).get("total_score")
+        scores[name] = float(value) if isinstance(value, (int, float)) else None
+    return scores
+
+
+class _Bucket:
+    """Running aggregate of score points or rollup rows"""
+
+    def __init__(self):
+        self.count = 0
+        self.overall_sum = 0.0
+        self.overall_min: Optional[float] = None
+        self.overall_max: Optional[float] = None
+        self.sums = {name: 0.0 for name in SECTIONS}
+        self.counts = {name: 0 for name in SECTIONS}
+
+    def add(self, count, overall_sum, overall_min, overall_max, sums, counts):
+        self.count += count
+        self.overall_sum += overall_sum
+        if self.overall_min is None or overall_min < self.overall_min:
+            self.overall_min = overall_min
+        if self.overall_max is None or overall_max > self.overall_max:
+            self.overall_max = overall_max
+        for name in SECTIONS:
+            self.sums[name] += sums[name]
+            self.counts[name] += counts[name]
+
+    def add_point(self, overall: float, scores: Dict[str, Optional[float]]):
+        self.add(
+            1,
+            overall,
+            overall,
+            overall,
+            {name: scores[name] or 0.0 for name in SECTIONS},
+            {name: int(scores[name] is not None) for name in SECTIONS},
+        )
+
+    def add_rollup(self, row: ScoreRollup):
+        self.add(
+            row.count,
+            row.overall_sum,
+            row.overall_min,
+            row.overall_max,
+            {name: getattr(row, f"{name}_sum") for name in SECTIONS},
+            {name: getattr(row, f"{name}_count") for name in SECTIONS},
+        )
+
+    def to_rollup(self, canonical_url: str, granularity: str, start: datetime) -> dict:
+        return {
+            "canonical_url": canonical_url,
+            "granularity": granularity,
+            "bucket_start": start,
+            "count": self.count,
+            "overall_sum": self.overall_sum,
+            "overall_min": self.overall_min,
+            "overall_max": self.overall_max,
+            **{f"{name}_sum": self.sums[name] for name in SECTIONS},
+            **{f"{name}_count": self.counts[name] for name in SECTIONS},
+        }
+
+    def to_point(self, timestamp: datetime) -> dict:
+        return {
+            "timestamp": timestamp.isoformat(),
+            "count": self.count,
+            "overall_score": round(self.overall_sum / self.count, 2),
+            "min_score": self.overall_min,
+            "max_score": self.overall_max,
+            **{
+                name: (
+                    round(self.sums[name] / self.counts[name], 2)
+                    if self.counts[name]
+                    else None
+                )
+                for name in SECTIONS
+            },
+        }
+
+
+def record_score_points(db: Session, points: Iterable[dict]) -> None:
+    """
+    Add raw score points and fold them into their day and week rollups, in
+    the caller's transaction. Each point has analysis_id, canonical_url,
+    created_at, overall_score and the section scores.
+    """
+    points = list(points)
+    if not points:
+        return
+    db.add_all(ScorePoint(**point) for point in points)
+
+    # Aggregate the batch first, so each rollup row is upserted once
+    buckets: Dict[tuple, _Bucket] = {}
+    for point in points:
+        for granularity in ScoreRollup.GRANULARITIES:
+            key = (
+                point["canonical_url"],
+                granularity,
+                bucket_start(point["created_at"], granularity),
+            )
+            buckets.setdefault(key, _Bucket()).add_point(point["overall_score"], point)
+    upsert_totals(
+        db,
+        ScoreRollup,
+        [bucket.to_rollup(*key) for key, bucket in buckets.items()],
+        summed=("count",) + SUMMED,
+        least=("overall_min",),
+        greatest=("overall_max",),
+    )
+
+
+def record_scores(db: Session, analyses: List[Analysis]) -> None:
+    """Score points for a batch of analyses being written (after their flush)"""
+    record_score_points(
+        db,
+        (
+            {
+                "analysis_id": analysis.id,
+                "canonical_url": analysis.canonical_url,
+                "created_at": analysis.created_at,
+                "overall_score": analysis.overall_score,
+                **section_scores(analysis.sections()),
+            }
+            for analysis in analyses
+            if analysis.canonical_url
+        ),
+    )
+
+
+def score_trend(
+    db: Session, canonical_url: str, start: datetime, end: datetime, points: int
+) -> Dict[str, Any]:
+    """
+    Scores for a URL over [start, end) in up to `points` equal-width buckets.
+    Reads the coarsest rollup no wider than a bucket for the rollup buckets
+    wholly inside the range, and raw points for the rest (short ranges, and
+    the partial buckets at either end), with one index range scan each.
+    """
+    width = (end - start) / points
+    granularity = next((g for g in ("week", "day") if BUCKET_WIDTHS[g] <= width), None)
+    buckets = [_Bucket() for _ in range(points)]
+
+    def slot(moment: datetime) -> int:
+        return min(points - 1, max(0, int((moment - start) / width)))
+
+    def add_points(since: datetime, until: datetime) -> None:
+        if since >= until:
+            return
+        rows = (
+            db.query(ScorePoint)
+            .filter(
+                ScorePoint.canonical_url == canonical_url,
+                ScorePoint.created_at >= since,
+                ScorePoint.created_at < until,
+            )
+            .order_by(ScorePoint.created_at)
+        )
+        for row in rows:
+            scores = {name: getattr(row, name) for name in SECTIONS}
+            buckets[slot(row.created_at)].add_point(row.overall_score, scores)
+
+    if granularity is None:
+        add_points(start, end)
+    else:
+        # Rollup buckets that start before start or end after end would count
+        # scores outside the range, so those parts are read from raw points
+        first = bucket_start(start, granularity)
+        if first < start:
+            first += BUCKET_WIDTHS[granularity]
+        last = max(first, bucket_start(end, granularity))
+        rows = (
+            db.query(ScoreRollup)
+            .filter(
+                ScoreRollup.canonical_url == canonical_url,
+                ScoreRollup.granularity == granularity,
+                ScoreRollup.bucket_start >= first,
+                ScoreRollup.bucket_start < last,
+            )
+            .order_by(ScoreRollup.bucket_start)
+        )
+        for row in rows:
+            buckets[slot(row.bucket_start)].add_rollup(row)
+        add_points(start, first)
+        add_points(last, end)
+
+    return {
+        "canonical_url": canonical_url,
+        "granularity": granularity or "raw",
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "points": [
+            bucket.to_point(start + width * i)
+            for i, bucket in enumerate(buckets)
+            if bucket.count
+        ],
+    }
@@ -0,0 +1,195 @@
+"""Write-behind buffering of anonymous usage counters."""
+
+from datetime import datetime
+from typing import Dict
+import asyncio
+import logging
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, conflict_insert, run_db_write
+from app.models import AnonymousUsage
+from app.services.cache import LRUCache
+from app.services.dashboard import record_usage
+
+logger = logging.getLogger(__name__)
+
+# Rows per upsert statement, well under SQLite's bound parameter limit
+UPSERT_CHUNK_SIZE = 500
+
+
+class UsageCounterBuffer:
+    """
+    Buffers AnonymousUsage.analysis_count increments in memory and flushes them
+    periodically as atomic `analysis_count = analysis_count + n` upserts.
+
+    Reads merge the pending deltas into a cached copy of the persisted row, so
+    quota checks stay accurate within this worker without a query per request.
+    Cached rows are dropped whenever their deltas are flushed.
+    """
+
+    def __init__(self, cache_size: int):
+        self._lock = threading.Lock()
+        # One flush at a time, so each one's deltas stay counted until it commits
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        # Deltas taken by an in-progress flush; still counted until it commits
+        self._flushing: Dict[str, int] = {}
+        self._persisted = LRUCache(cache_size)
+        # Bumped by every committed flush
+        self._generation = 0
+        self.flushes = 0
+        self.flushed_increments = 0
+
+    def increment(self, anonymous_id: str, n: int = 1) -> None:
+        with self._lock:
+            self._pending[anonymous_id] = self._pending.get(anonymous_id, 0) + n
+
+    def pending(self, anonymous_id: str) -> int:
+        with self._lock:
+            return self._pending.get(anonymous_id, 0) + self._flushing.get(
+                anonymous_id, 0
+            )
+
+    def usage(self, db: Session, anonymous_id: str) -> Dict[str, int]:
+        """Current usage counts including unflushed increments (blocking on a cache miss)"""
+        persisted = self._persisted.get(anonymous_id)
+        if persisted is None:
+            with self._lock:
+                generation = self._generation
+            row = (
+                db.query(AnonymousUsage.analysis_count, AnonymousUsage.full_views_used)
+                .filter(AnonymousUsage.anonymous_id == anonymous_id)
+                .first()
+            )
+            persisted = {
+                "analysis_count": (row.analysis_count or 0) if row else 0,
+                "full_views_used": (row.full_views_used or 0) if row else 0,
+            }
+            with self._lock:
+                # A flush committed during the read may be missing from the row
+                if self._generation == generation:
+                    self._persisted.set(anonymous_id, persisted)
+        return {
+            "analysis_count": persisted["analysis_count"] + self.pending(anonymous_id),
+            "full_views_used": persisted["full_views_used"],
+        }
+
+    def _apply(self, db: Session, anonymous_id: str, n: int) -> None:
+        updated = (
+            db.query(AnonymousUsage)
+            .filter(AnonymousUsage.anonymous_id == anonymous_id)
+            .update(
+                {
+                    AnonymousUsage.analysis_count: AnonymousUsage.analysis_count + n,
+                    AnonymousUsage.updated_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(
+                AnonymousUsage(
+                    anonymous_id=anonymous_id, analysis_count=n, full_views_used=0
+                )
+            )
+            db.flush()
+
+    def _upsert(self, db: Session, insert, batch: Dict[str, int]) -> None:
+        """Apply increments as INSERT ... ON CONFLICT DO UPDATE, in chunks"""
+        now = datetime.utcnow()
+        items = list(batch.items())
+        for start in range(0, len(items), UPSERT_CHUNK_SIZE):
+            stmt = insert(AnonymousUsage).values(
+                [
+                    {
+                        "anonymous_id": anonymous_id,
+                        "analysis_count": n,
+                        "full_views_used": 0,
+                        "is_premium": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for anonymous_id, n in items[start : start + UPSERT_CHUNK_SIZE]
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AnonymousUsage.anonymous_id],
+                set_={
+                    "analysis_count": AnonymousUsage.analysis_count
+                    + stmt.excluded.analysis_count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            db.execute(stmt)
+
+    def flush(self, db: Session) -> int:
+        """Write all pending increments in one transaction (blocking)"""
+        with self._flush_lock:
+            return self._flush(db)
+
+    def _flush(self, db: Session) -> int:
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+
+        try:
+            insert = conflict_insert(db)
+            if insert is not None:
+                self._upsert(db, insert, batch)
+            else:
+                for anonymous_id, n in batch.items():
+                    self._apply(db, anonymous_id, n)
+            record_usage(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the deltas back so the next flush retries them
+            with self._lock:
+                for anonymous_id, n in batch.items():
+                    self._pending[anonymous_id] = self._pending.get(anonymous_id, 0) + n
+                self._flushing = {}
+            raise
+
+        with self._lock:
+            # Cached rows are now stale; the next read picks up the committed count
+            for anonymous_id in batch:
+                self._persisted.pop(anonymous_id)
+            self._flushing = {}
+            self._generation += 1
+            self.flushes += 1
+            self.flushed_increments += sum(batch.values())
+        return len(batch)
+
+    def flush_now(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def run(self, interval: float) -> None:
+        """Flush on a fixed interval until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_db_write(self.flush_now)
+            except Exception as e:
+                logger.error(f"Failed to flush usage counters: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending_ids": len(self._pending),
+                "pending_increments": sum(self._pending.values()),
+                "flushes": self.flushes,
+                "flushed_increments": self.flushed_increments,
+                "cached_ids": len(self._persisted),
+            }
+
+
+usage_counters = UsageCounterBuffer(settings.usage_cache_size)
@@ -0,0 +1,63 @@
+"""
+Analysis write throughput on SQLite: one commit per row vs batched commits.
+
+    python -m benchmarks.bench_batched_writes --rows 500 --batch 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Analysis, AnalysisResult
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+
+def _rows(count: int):
+    for seed in range(count):
+        data = sample_analysis(seed)
+        result = AnalysisResult.from_sections(data)
+        yield Analysis(
+            id=data["id"],
+            anonymous_id="bench",
+            url=data["url"],
+            overall_score=data["overall_score"],
+            result_hash=result.hash,
+            result=result,
+            created_at=data["timestamp"],
+        )
+
+
+def _run(path: str, rows: int, batch: int) -> float:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    pending = list(_rows(rows))
+    start = time.perf_counter()
+    for i in range(0, rows, batch):
+        write_analyses(db, pending[i : i + batch])
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for batch in (1, args.batch):
+            rate = _run(os.path.join(tmp, f"batch_{batch}.db"), args.rows, batch)
+            print(f"batch size {batch:>4}: {rate:9.1f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput of concurrent audits with blocking vs thread-pooled database access.
+
+Each simulated audit awaits a fake network fetch, then saves an Analysis row and
+reads it back, mirroring analyze_webpage_real + get_analysis. With blocking access
+every commit stalls the event loop for all other in-flight audits.
+
+    python -m benchmarks.bench_db_concurrency --audits 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.database import run_db, db_pool_stats
+from app.models import Analysis, AnalysisResult
+from app.api_real import _load_analysis
+from app.services.persistence import write_analyses
+
+SECTION = {
+    "total_score": 72.5,
+    "issues": [{"type": "check-fail", "text": "No llms.txt found"}] * 10,
+}
+
+
+def _make_session_factory(path: str):
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _new_analysis(anonymous_id: str) -> Analysis:
+    result = AnalysisResult.from_sections(
+        {
+            "crawlability": SECTION,
+            "structured_data": SECTION,
+            "content_structure": SECTION,
+            "eeat": SECTION,
+            "recommendations": ["Add an llms.txt file"] * 5,
+        }
+    )
+    return Analysis(
+        id=str(uuid.uuid4()),
+        anonymous_id=anonymous_id,
+        url="https://example.com/",
+        overall_score=72.5,
+        result_hash=result.hash,
+        result=result,
+    )
+
+
+async def _call(SessionLocal, pooled: bool, fn, *args):
+    """Run fn in its own session, like one request with a get_db dependency"""
+    db = SessionLocal()
+    try:
+        if pooled:
+            return await run_db(fn, db, *args)
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _audit(SessionLocal, pooled: bool, fetch_delay: float):
+    await asyncio.sleep(fetch_delay)
+    analysis = _new_analysis("bench")
+    analysis_id = analysis.id
+    await _call(SessionLocal, pooled, write_analyses, [analysis])
+    await _call(SessionLocal, pooled, _load_analysis, analysis_id)
+
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append(time.perf_counter() - start - 0.001)
+
+
+async def _run(SessionLocal, pooled: bool, audits: int, concurrency: int, delay: float):
+    semaphore = asyncio.Semaphore(concurrency)
+    lag_samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag_samples))
+
+    async def one():
+        async with semaphore:
+            await _audit(SessionLocal, pooled, delay)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(audits)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    lag_samples.sort()
+    p99 = lag_samples[int(len(lag_samples) * 0.99)] if lag_samples else 0.0
+    return audits / elapsed, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audits", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fetch-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pooled in (False, True):
+            SessionLocal = _make_session_factory(
+                os.path.join(tmp, f"bench_{int(pooled)}.db")
+            )
+            rate, lag = asyncio.run(
+                _run(SessionLocal, pooled, args.audits, args.concurrency, args.fetch_delay)
+            )
+            label = "db thread pool" if pooled else "blocking on loop"
+            print(f"{label:>18}: {rate:8.1f} audits/s  loop lag p99 {lag:7.2f} ms")
+
+    print(f"db pool stats: {db_pool_stats.to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Stored size and decode time of result sections: plain JSON vs zstd vs zstd
+with a dictionary trained on other results.
+
+    python -m benchmarks.bench_result_compression --results 2000 --dict-size 65536
+"""
+
+import argparse
+import time
+
+import orjson
+
+from app.compression import SectionCodec
+from app.models import AnalysisResult
+from benchmarks.payloads import sample_analysis
+
+
+def _sections(seeds):
+    return [
+        sample_analysis(seed)[name] for seed in seeds for name in AnalysisResult.SECTIONS
+    ]
+
+
+def _measure(codec: SectionCodec, sections) -> tuple:
+    stored = [codec.encode(value) for value in sections]
+    started = time.perf_counter()
+    for value in stored:
+        codec.decode(value)
+    decode = time.perf_counter() - started
+    return sum(len(value) for value in stored), decode / len(stored) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--results", type=int, default=2000)
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--level", type=int, default=9)
+    args = parser.parse_args()
+
+    # Train and measure on disjoint results, as a dictionary would be in production
+    training = _sections(range(args.results))
+    sections = _sections(range(args.results, 2 * args.results))
+
+    dictionary = SectionCodec.train(
+        (orjson.dumps(value) for value in training), args.dict_size
+    )
+    with_dict = SectionCodec("zstd", args.level)
+    with_dict.add_dictionary(dictionary)
+
+    cases = {
+        "json": SectionCodec("none", args.level),
+        "zstd": SectionCodec("zstd", args.level),
+        "zstd + dictionary": with_dict,
+    }
+    baseline = None
+    for name, codec in cases.items():
+        size, decode_us = _measure(codec, sections)
+        baseline = baseline or size
+        print(
+            f"{name:>18}: {size / 1024:9.1f} KiB  "
+            f"({baseline / size:5.1f}x smaller)  "
+            f"decode {decode_us:6.2f} us/section"
+        )
+    print(f"{len(sections)} sections, dictionary {len(dictionary) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Serialization cost of analysis responses: FastAPI's default path
+(jsonable_encoder + stdlib json) vs FastJSONResponse (orjson).
+
+    python -m benchmarks.bench_serialization --analyses 50 --repeat 200
+"""
+
+import argparse
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import FastJSONResponse
+from benchmarks.payloads import sample_analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--analyses", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    single = {"success": True, "data": sample_analysis()}
+    history = [sample_analysis(seed) for seed in range(args.analyses)]
+
+    cases = {
+        "single analysis": single,
+        f"history of {args.analyses}": history,
+    }
+    for name, payload in cases.items():
+        default = timeit.timeit(
+            lambda: JSONResponse(jsonable_encoder(payload)), number=args.repeat
+        )
+        fast = timeit.timeit(lambda: FastJSONResponse(payload), number=args.repeat)
+        size = len(FastJSONResponse(payload).body)
+        print(
+            f"{name:>16} ({size / 1024:6.1f} KiB): "
+            f"default {default / args.repeat * 1e6:8.1f} us  "
+            f"orjson {fast / args.repeat * 1e6:8.1f} us  "
+            f"({default / fast:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Mixed read/write throughput on SQLite: rollback journal vs WAL with one writer.
+
+Reader tasks load analyses and history pages while writer tasks save batches of
+new analyses, each call in its own session on a thread pool, like requests with
+a get_db dependency. The default setup shares one engine for everything; WAL
+mode (SQLITE_WAL=true) reads from a pool of query-only connections and sends
+every write through the single writer connection on its own thread.
+
+    python -m benchmarks.bench_sqlite_wal --seconds 5 --readers 16 --writers 4
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api_real import _load_analysis
+from app.db import Base, RoutingSession, create_sqlite_wal_engines
+from app.models import Analysis, AnalysisResult
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+ANONYMOUS_IDS = [f"bench-{n}" for n in range(20)]
+
+
+def _analysis(seed: int) -> Analysis:
+    data = sample_analysis(seed)
+    result = AnalysisResult.from_sections(data)
+    return Analysis(
+        id=data["id"],
+        anonymous_id=ANONYMOUS_IDS[seed % len(ANONYMOUS_IDS)],
+        url=data["url"],
+        overall_score=data["overall_score"],
+        result_hash=result.hash,
+        result=result,
+        created_at=data["timestamp"],
+    )
+
+
+def _setup(path: str, wal: bool):
+    url = f"sqlite:///{path}"
+    if wal:
+        writer, reader = create_sqlite_wal_engines(url)
+        factory = sessionmaker(class_=RoutingSession, reader=reader, bind=writer)
+        engines = (writer, reader)
+    else:
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        engines = (engine,)
+    Base.metadata.create_all(bind=engines[0])
+    return factory, engines
+
+
+def _history(db, anonymous_id: str):
+    return (
+        db.query(Analysis.id, Analysis.url, Analysis.overall_score)
+        .filter(Analysis.anonymous_id == anonymous_id)
+        .order_by(Analysis.created_at.desc())
+        .limit(20)
+        .all()
+    )
+
+
+def _in_session(factory, fn, *args):
+    db = factory()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+class Workload:
+    def __init__(self, factory, read_pool, write_pool, ids, batch: int):
+        self.factory = factory
+        self.read_pool = read_pool
+        self.write_pool = write_pool
+        self.ids = ids
+        self.batch = batch
+        self.next_seed = len(ids)
+        self.read_latencies = []
+        self.rows_written = 0
+        self.errors = 0
+
+    async def _call(self, pool, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, _in_session, self.factory, fn, *args)
+
+    async def reader(self, deadline: float):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await self._call(self.read_pool, _load_analysis, random.choice(self.ids))
+                await self._call(self.read_pool, _history, random.choice(ANONYMOUS_IDS))
+            except OperationalError:
+                self.errors += 1
+                continue
+            self.read_latencies.append(time.perf_counter() - started)
+
+    async def writer(self, deadline: float):
+        while time.perf_counter() < deadline:
+            seeds = range(self.next_seed, self.next_seed + self.batch)
+            self.next_seed += self.batch
+            try:
+                await self._call(
+                    self.write_pool, write_analyses, [_analysis(s) for s in seeds]
+                )
+            except OperationalError:
+                self.errors += 1
+                continue
+            self.rows_written += self.batch
+
+
+def _percentile(samples, fraction: float) -> float:
+    return samples[int(len(samples) * fraction)] * 1000 if samples else 0.0
+
+
+async def _run(factory, wal: bool, args) -> dict:
+    seeded = [_analysis(seed) for seed in range(args.seed_rows)]
+    ids = [analysis.id for analysis in seeded]
+    _in_session(factory, write_analyses, seeded)
+
+    read_pool = ThreadPoolExecutor(max_workers=args.threads)
+    # WAL mode hands writes to one writer thread, as run_db_write does
+    write_pool = ThreadPoolExecutor(max_workers=1) if wal else read_pool
+    workload = Workload(factory, read_pool, write_pool, ids, args.batch)
+
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(
+        *(workload.reader(deadline) for _ in range(args.readers)),
+        *(workload.writer(deadline) for _ in range(args.writers)),
+    )
+    read_pool.shutdown()
+    write_pool.shutdown()
+
+    latencies = sorted(workload.read_latencies)
+    return {
+        "reads/s": len(latencies) / args.seconds,
+        "rows written/s": workload.rows_written / args.seconds,
+        "read p50 ms": _percentile(latencies, 0.5),
+        "read p99 ms": _percentile(latencies, 0.99),
+        "errors": workload.errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--seed-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for wal in (False, True):
+            factory, engines = _setup(os.path.join(tmp, f"bench_{int(wal)}.db"), wal)
+            result = asyncio.run(_run(factory, wal, args))
+            for engine in engines:
+                engine.dispose()
+            label = "wal + single writer" if wal else "rollback journal"
+            print(
+                f"{label:>20}: {result['reads/s']:8.1f} reads/s  "
+                f"{result['rows written/s']:7.1f} rows written/s  "
+                f"read p50 {result['read p50 ms']:6.2f} ms  "
+                f"p99 {result['read p99 ms']:7.2f} ms  "
+                f"errors {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Realistic analysis payloads shared by the benchmarks."""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+CHECKS = {
+    "crawlability": [
+        ("robots.txt found", None),
+        ("robots.txt allows AI crawlers", None),
+        ("No llms.txt found", "Create an llms.txt file to specify AI crawler preferences."),
+        ("llms.txt lacks proper directives", "Add allow/disallow directives to llms.txt"),
+        ("Sitemap not referenced in robots.txt", "Reference your XML sitemap in robots.txt."),
+    ],
+    "structured_data": [
+        ("No structured data found", "Add relevant schema.org markup to improve content understanding."),
+        ("Organization schema found", None),
+        ("Article schema missing author", "Add an author property to your Article schema."),
+        ("FAQPage schema found", None),
+    ],
+    "content_structure": [
+        ("Single H1 heading found", None),
+        ("Heading hierarchy skips levels", "Use sequential heading levels (H2 after H1, H3 after H2)."),
+        ("No lists found", "Use lists to organize related information."),
+        ("No tables found", "Consider using tables for structured data presentation."),
+        ("Paragraphs are too long", "Break long paragraphs into concise, scannable blocks."),
+        ("No question-style headings", "Phrase key headings as the questions users ask."),
+    ],
+    "eeat": [
+        ("No clear author attribution", "Add author information with proper schema markup."),
+        ("No clear publication date", "Include publication and last updated dates."),
+        ("External citations found", None),
+        ("No about page linked", "Link to an About page that explains who runs the site."),
+    ],
+}
+
+
+def _issues(section: str, rng: random.Random):
+    issues = []
+    for text, recommendation in CHECKS[section]:
+        if recommendation is None or rng.random() < 0.6:
+            kind = "check-pass" if recommendation is None else rng.choice(
+                ["check-fail", "check-warn"]
+            )
+            issues.append({"type": kind, "text": text, "recommendation": recommendation})
+    return issues
+
+
+def sample_analysis(seed: int = 0) -> dict:
+    """One analysis 'data' payload shaped like LLMOAnalyzer.analyze_page output"""
+    rng = random.Random(seed)
+    scores = {section: float(rng.randint(20, 100)) for section in CHECKS}
+    issues = {section: _issues(section, rng) for section in CHECKS}
+    recommendations = [
+        issue["recommendation"]
+        for section in CHECKS
+        for issue in issues[section]
+        if issue["recommendation"]
+    ]
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "url": f"https://example{seed % 50}.com/blog/post-{seed}",
+        "overall_score": round(sum(scores.values()) / 4),
+        "crawlability": {
+            "robots_txt_score": scores["crawlability"],
+            "llms_txt_score": 0,
+            "total_score": scores["crawlability"],
+            "issues": issues["crawlability"],
+        },
+        "structured_data": {
+            "schema_types": rng.sample(
+                ["Organization", "Article", "FAQPage", "BreadcrumbList", "WebSite"], 2
+            ),
+            "implementation_score": scores["structured_data"],
+            "total_score": scores["structured_data"],
+            "issues": issues["structured_data"],
+        },
+        "content_structure": {
+            "heading_score": scores["content_structure"],
+            "list_table_score": 0,
+            "conciseness_score": 0,
+            "qa_format_score": 0,
+            "total_score": scores["content_structure"],
+            "issues": issues["content_structure"],
+        },
+        "eeat": {
+            "author_score": scores["eeat"],
+            "citation_score": 0,
+            "originality_score": 0,
+            "date_score": 0,
+            "total_score": scores["eeat"],
+            "issues": issues["eeat"],
+        },
+        "recommendations": recommendations,
+        "timestamp": datetime(2025, 1, 1) + timedelta(hours=seed),
+    }
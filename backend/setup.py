@@ -16,5 +16,10 @@ setup(
         "beautifulsoup4",
         "validators",
         "python-dotenv",
+        "orjson",
     ],
+    extras_require={
+        "zstd": ["zstandard"],
+        "parquet": ["pyarrow"],
+    },
 )
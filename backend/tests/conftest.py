@@ -0,0 +1,49 @@
+import os
+import uuid
+
+# app.config reads the environment on import, so this comes before any app import
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app import models  # noqa: E402, F401  registers tables on Base
+from app.models import Analysis, AnalysisResult  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A session bound to a fresh in-memory SQLite database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def make_analysis():
+    """Builds an unsaved analysis of sample sections, with its stored result"""
+
+    def make(data: dict, anonymous_id: str = "anon") -> Analysis:
+        result = AnalysisResult.from_sections(data)
+        return Analysis(
+            id=str(uuid.uuid4()),
+            anonymous_id=anonymous_id,
+            url=data["url"],
+            overall_score=data["overall_score"],
+            result_hash=result.hash,
+            result=result,
+        )
+
+    return make
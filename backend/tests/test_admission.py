@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+async def _run(controller, results):
+    try:
+        async with controller.slot():
+            await asyncio.sleep(0.05)
+            results.append("ok")
+    except AdmissionRejected as e:
+        assert e.retry_after >= 1
+        results.append("rejected")
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_beyond_capacity_and_queue():
+    controller = AdmissionController(max_concurrent=2, max_queue=1, queue_timeout=1)
+    results = []
+    await asyncio.gather(*(_run(controller, results) for _ in range(5)))
+    assert results.count("ok") == 3
+    assert results.count("rejected") == 2
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_after_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.01)
+    results = []
+    await asyncio.gather(*(_run(controller, results) for _ in range(2)))
+    assert sorted(results) == ["ok", "rejected"]
+    assert controller.stats()["queue_depth"] == 0
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+from app.models import AggregateStat
+from app.services.aggregates import get_aggregate, rebuild_aggregates
+from app.services.canonical import url_domain
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+
+def _write(db, make_analysis, anonymous_id, url, score, day):
+    data = sample_analysis(1)
+    analysis = make_analysis({**data, "overall_score": score}, anonymous_id)
+    analysis.canonical_url = url
+    analysis.created_at = datetime(2026, 3, day, 12)
+    write_analyses(db, [analysis])
+
+
+def _seed(db, make_analysis):
+    _write(db, make_analysis, "a", "https://www.example.com/", 40, 1)
+    _write(db, make_analysis, "a", "https://example.com/about", 60, 1)
+    _write(db, make_analysis, "b", "https://example.com/", 80, 3)
+    _write(db, make_analysis, "b", "https://other.org/", 10, 3)
+
+
+def test_url_domain():
+    assert url_domain("https://WWW.Example.com:8080/x?y") == "example.com"
+    assert url_domain("example.com") == "example.com"
+    assert url_domain("") is None
+
+
+def test_writes_update_domain_and_tenant_totals(db, make_analysis):
+    _seed(db, make_analysis)
+    today = date(2026, 3, 3)
+
+    domain = get_aggregate(db, "domain", "example.com", days=7, today=today)
+    assert (domain["count"], domain["overall_score"]) == (3, 60)
+    assert domain["first_analysis_at"] == "2026-03-01T12:00:00"
+    assert domain["last_analysis_at"] == "2026-03-03T12:00:00"
+    assert [(d["date"], d["count"]) for d in domain["days"]] == [
+        ("2026-03-01", 2),
+        ("2026-03-03", 1),
+    ]
+    assert domain["eeat"] == sample_analysis(1)["eeat"]["total_score"]
+
+    tenant = get_aggregate(db, "tenant", "b", days=1, today=today)
+    assert (tenant["count"], tenant["overall_score"]) == (2, 45)
+    assert [d["date"] for d in tenant["days"]] == ["2026-03-03"]
+    assert get_aggregate(db, "domain", "missing.com") is None
+
+
+def test_rebuild_matches_incremental_totals(db, make_analysis):
+    _seed(db, make_analysis)
+    columns = [c for c in AggregateStat.__table__.columns]
+    incremental = sorted(db.query(*columns).all())
+
+    db.query(AggregateStat).delete()
+    db.commit()
+    assert rebuild_aggregates(db, batch_size=3) == 4
+    assert sorted(db.query(*columns).all()) == incremental
@@ -6,8 +6,9 @@ from bs4 import BeautifulSoup
 
 @pytest.mark.asyncio
 async def test_analyzer_initialization():
-    analyzer = LLMOAnalyzer("https://example.com")
-    assert analyzer.url == "https://example.com"
+    analyzer = LLMOAnalyzer("https://example.com/p?ref=nav&b=2&a")
+    assert analyzer.url == "https://example.com/p?ref=nav&b=2&a"
+    assert analyzer.canonical_url == "https://example.com/p?a=&b=2"
     assert analyzer.soup is None
     assert analyzer.text_content == ""
 
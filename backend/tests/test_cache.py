@@ -0,0 +1,89 @@
+import asyncio
+import time
+import pytest
+from app.services.cache import LRUCache
+from app.services.result_cache import FRESH, MISS, STALE, ResultCache
+from app.services.result_store import SharedResultStore
+from app.api_real import _compute_etag, _etag_matches
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+
+
+def test_lru_cache_disabled_when_maxsize_zero():
+    cache = LRUCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_etag_is_stable_and_matches_weak_validators():
+    body = {"success": True, "data": {"id": "x", "overall_score": 80.0}}
+    etag = _compute_etag(body)
+    assert etag == _compute_etag(dict(reversed(list(body.items()))))
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(f'"other", W/{etag}', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+    assert not _etag_matches("", etag)
+
+
+def test_shared_result_store_is_visible_across_instances(tmp_path):
+    path = str(tmp_path / "results.db")
+    worker_a = SharedResultStore(path, ttl=60, max_entries=10)
+    worker_b = SharedResultStore(path, ttl=60, max_entries=10)
+
+    worker_a.set("1:https://example.com/", {"overall_score": 80})
+    value, stored_at = worker_b.get("1:https://example.com/")
+    assert value == {"overall_score": 80}
+    assert stored_at > 0
+    assert worker_b.stats()["hits"] == 1
+    assert worker_a.stats()["hits"] == 0
+
+
+def test_shared_result_store_expires_and_evicts(tmp_path):
+    store = SharedResultStore(str(tmp_path / "results.db"), ttl=60, max_entries=2)
+    store.set("old", 1, stored_at=time.time() - 120)
+    assert store.get("old") is None
+    assert store.stats()["expired"] == 1
+
+    for key in ("a", "b", "c"):
+        store.set(key, key)
+    store.get("a")
+    assert store.evict() == 1
+    assert store.get("b") is None
+    assert store.get("a")[0] == "a"
+
+
+@pytest.mark.asyncio
+async def test_result_cache_serves_stale_entries_and_revalidates(tmp_path):
+    store = SharedResultStore(str(tmp_path / "results.db"), ttl=600, max_entries=10)
+    cache = ResultCache(LRUCache(10), store, fresh_ttl=60)
+
+    assert (await cache.lookup("k"))[0] == MISS
+    await cache.put("k", {"score": 1})
+    assert await cache.lookup("k") == (FRESH, {"score": 1}, pytest.approx(0, abs=1))
+
+    cache.memory.set("k", ({"score": 1}, time.time() - 120))
+    store.set("k", {"score": 1}, stored_at=time.time() - 120)
+    status, data, age = await cache.lookup("k")
+    assert (status, data) == (STALE, {"score": 1})
+    assert (await cache.lookup("k", max_age=30))[0] == MISS
+
+    async def compute():
+        return {"score": 2}
+
+    cache.revalidate("k", compute)
+    cache.revalidate("k", compute)
+    await asyncio.sleep(0.1)
+    assert cache.refreshes == 1
+    assert await cache.lookup("k") == (FRESH, {"score": 2}, pytest.approx(0, abs=1))
@@ -0,0 +1,56 @@
+import asyncio
+
+from fastapi import HTTPException
+import pytest
+
+from app.api.v1.user import _decode_change_cursor, _encode_change_cursor, _list_changes
+from app.models import ChangeSequence
+from app.services.changes import ChangeNotifier
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+
+def test_writes_take_consecutive_feed_positions(db, make_analysis):
+    first = [make_analysis(sample_analysis(n)) for n in range(3)]
+    write_analyses(db, first)
+    second = make_analysis(sample_analysis(3))
+    write_analyses(db, [second])
+
+    assert [a.change_seq for a in first + [second]] == [1, 2, 3, 4]
+    assert db.get(ChangeSequence, "analyses").value == 4
+
+
+def test_changes_page_in_feed_order(db, make_analysis):
+    ids = []
+    for n in range(5):
+        analysis = make_analysis(sample_analysis(n), "anon" if n != 2 else "other")
+        write_analyses(db, [analysis])
+        ids.append(analysis.id)
+
+    items, last, more = _list_changes(db, "anon", ["id"], 0, 2)
+    assert [item["id"] for item in items] == [ids[0], ids[1]] and more
+    items, last, more = _list_changes(db, "anon", ["id", "url"], last, 2)
+    assert [item["id"] for item in items] == [ids[3], ids[4]] and not more
+    assert _list_changes(db, "anon", ["id"], last, 2) == ([], last, False)
+
+
+def test_change_cursors_are_tied_to_one_history():
+    cursor = _encode_change_cursor("anon", 42)
+    assert _decode_change_cursor(cursor, "anon") == 42
+    with pytest.raises(HTTPException) as e:
+        _decode_change_cursor(cursor, "linked-extension")
+    assert e.value.status_code == 410
+    with pytest.raises(HTTPException) as e:
+        _decode_change_cursor("not a cursor", "anon")
+    assert e.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_notifier_wakes_only_listeners_of_the_user():
+    notifier = ChangeNotifier()
+    mine, theirs = notifier.listen("anon"), notifier.listen("other")
+    notifier.notify(["anon", "anon"])
+    await asyncio.wait_for(mine, 1)
+    assert not theirs.done()
+    notifier.cancel("other", theirs)
+    assert notifier.stats() == {"waiting": 0}
@@ -0,0 +1,58 @@
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app.api_real import _load_analysis
+from app.compression import ZSTD_MAGIC, SectionCodec, section_codec
+from app.models import AnalysisResult
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+zstandard = pytest.importorskip("zstandard")
+
+
+def _sections(seeds):
+    return [
+        sample_analysis(seed)[name] for seed in seeds for name in AnalysisResult.SECTIONS
+    ]
+
+
+def test_plain_and_legacy_values_decode():
+    codec = SectionCodec("none", level=3)
+    value = {"total_score": 80.0, "issues": ["No llms.txt found"]}
+    assert codec.encode(value) == orjson.dumps(value)
+    assert codec.decode(codec.encode(value)) == value
+    assert codec.decode('{"legacy": true}') == {"legacy": True}
+    assert codec.decode(None) is None
+
+
+def test_dictionary_compression_round_trips_and_shrinks():
+    samples = [orjson.dumps(value) for value in _sections(range(300))]
+    dictionary = SectionCodec.train(samples, 16 * 1024)
+    codec = SectionCodec("zstd", level=3)
+    dict_id = codec.add_dictionary(dictionary)
+
+    value = sample_analysis(1000)["content_structure"]
+    stored = codec.encode(value)
+    assert stored.startswith(ZSTD_MAGIC)
+    assert zstandard.get_frame_parameters(stored).dict_id == dict_id
+    assert len(stored) < len(orjson.dumps(value)) / 3
+    assert codec.decode(stored) == value
+
+    # Rows written with a dictionary stay readable by plain-JSON writers
+    reader = SectionCodec("none", level=3)
+    reader.add_dictionary(dictionary, active=False)
+    assert reader.decode(stored) == value
+
+
+def test_compressed_results_are_stored_and_loaded(db, monkeypatch, make_analysis):
+    monkeypatch.setattr(section_codec, "compression", "zstd")
+    data = sample_analysis(7)
+    analysis = make_analysis(data)
+    analysis_id = analysis.id
+    write_analyses(db, [analysis])
+    db.expunge_all()
+
+    raw = db.execute(text("SELECT eeat FROM analysis_results")).scalar()
+    assert raw.startswith(ZSTD_MAGIC)
+    assert _load_analysis(db, analysis_id)["eeat"] == data["eeat"]
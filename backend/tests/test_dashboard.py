@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from app.models import DashboardSummary
+from app.services.dashboard import (
+    RECENT_SCORES,
+    get_dashboard_summary,
+    rebuild_dashboard_summaries,
+)
+from app.services.persistence import write_analyses
+from app.services.usage import UsageCounterBuffer
+from benchmarks.payloads import sample_analysis
+
+
+def _write(db, make_analysis, scores, anonymous_id="anon", first_hour=0):
+    analyses = []
+    for hour, score in enumerate(scores, start=first_hour):
+        analysis = make_analysis(sample_analysis(hour), anonymous_id)
+        analysis.overall_score = score
+        analysis.created_at = datetime(2026, 3, 1, hour)
+        analyses.append(analysis)
+    write_analyses(db, analyses)
+
+
+def _columns(db):
+    return [
+        (row.anonymous_id, row.analysis_count, row.overall_sum, row.best_score)
+        + (row.worst_score, row.last_analysis_at, row.recent_scores, row.quota_used)
+        for row in db.query(DashboardSummary).order_by(DashboardSummary.anonymous_id)
+    ]
+
+
+def test_writes_keep_the_summary_current(db, make_analysis):
+    assert get_dashboard_summary(db, "anon")["count"] == 0
+    _write(db, make_analysis, [40, 0, 90])
+    _write(db, make_analysis, [60] * RECENT_SCORES, first_hour=3)
+    _write(db, make_analysis, [10], anonymous_id="other")
+
+    summary = get_dashboard_summary(db, "anon")
+    assert summary["count"] == 3 + RECENT_SCORES
+    assert summary["average_score"] == round(730 / 13, 2)
+    assert (summary["best_score"], summary["worst_score"]) == (90, 0)
+    assert summary["last_analysis_at"] == "2026-03-01T12:00:00"
+    assert len(summary["recent"]) == RECENT_SCORES
+    assert summary["recent"][-1] == {
+        "timestamp": "2026-03-01T12:00:00",
+        "overall_score": 60,
+    }
+    assert summary["trend"] == 0
+    assert get_dashboard_summary(db, "other")["count"] == 1
+
+
+def test_usage_flushes_update_the_quota(db, make_analysis):
+    _write(db, make_analysis, [50])
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("anon", 2)
+    buffer.increment("new")
+    buffer.flush(db)
+    buffer.increment("anon")
+    buffer.flush(db)
+
+    assert get_dashboard_summary(db, "anon")["quota_used"] == 3
+    assert get_dashboard_summary(db, "new")["quota_used"] == 1
+    assert get_dashboard_summary(db, "anon")["count"] == 1
+
+
+def test_rebuild_matches_incremental_summaries(db, make_analysis):
+    _write(db, make_analysis, [30, 70, 50])
+    _write(db, make_analysis, [80], anonymous_id="other")
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("anon", 3)
+    buffer.flush(db)
+    incremental = _columns(db)
+
+    assert rebuild_dashboard_summaries(db) == 2
+    assert _columns(db) == incremental
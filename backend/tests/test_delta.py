@@ -0,0 +1,59 @@
+from app.delta import apply, diff, diff_sections, summarize_changes
+from app.models import AnalysisResult
+from benchmarks.payloads import sample_analysis
+
+
+def test_diff_round_trips_nested_changes():
+    base = {"a": 1, "b": {"c": [1, 2, 3], "d": "x"}, "gone": True}
+    target = {"a": 1, "b": {"c": [1, 5, 3], "d": "y"}, "new": [1]}
+    patch = diff(base, target)
+    assert apply(base, patch) == target
+    assert base["b"]["c"] == [1, 2, 3]
+    assert diff(target, target) is None
+
+
+def test_diff_replaces_lists_of_different_length():
+    assert diff([1, 2], [1, 2, 3]) == {"=": [1, 2, 3]}
+
+
+def test_section_diffs_round_trip_sample_results():
+    for seed in range(20):
+        base = sample_analysis(seed)
+        target = sample_analysis(seed + 100)
+        sections = {name: base[name] for name in AnalysisResult.SECTIONS}
+        patches = diff_sections(
+            sections, {name: target[name] for name in AnalysisResult.SECTIONS}
+        )
+        rebuilt = {
+            name: apply(sections[name], patches.get(name)) for name in sections
+        }
+        assert rebuilt == {name: target[name] for name in AnalysisResult.SECTIONS}
+
+
+def test_summarize_changes_reports_scores_issues_and_recommendations():
+    old = {
+        "eeat": {
+            "total_score": 40,
+            "issues": [{"text": "No clear author attribution"}],
+        },
+        "crawlability": {"total_score": 80, "issues": []},
+        "recommendations": ["Add author information"],
+    }
+    new = {
+        "eeat": {"total_score": 70, "issues": [{"text": "No about page linked"}]},
+        "crawlability": {"total_score": 80, "issues": []},
+        "recommendations": ["Link an About page"],
+    }
+    summary = summarize_changes(old, new)
+    assert summary["changed"]
+    assert set(summary["sections"]) == {"eeat"}
+    assert summary["sections"]["eeat"]["score"] == {"from": 40, "to": 70}
+    assert summary["sections"]["eeat"]["issues"] == {
+        "added": [{"text": "No about page linked"}],
+        "resolved": [{"text": "No clear author attribution"}],
+    }
+    assert summary["recommendations"] == {
+        "added": ["Link an About page"],
+        "removed": ["Add author information"],
+    }
+    assert not summarize_changes(new, new)["changed"]
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.export import export_analyses, parse_export_fields
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+STARTED = datetime(2026, 1, 1)
+
+
+def _seed(db, make_analysis, count: int = 7) -> list:
+    analyses = []
+    for n in range(count):
+        data = sample_analysis(n)
+        analysis = make_analysis(data, "anon" if n % 2 == 0 else "other")
+        analysis.created_at = STARTED + timedelta(days=n)
+        analyses.append(analysis)
+    expected = [
+        (analysis.id, analysis.overall_score)
+        for analysis in analyses
+        if analysis.anonymous_id == "anon"
+    ]
+    write_analyses(db, analyses)
+    return expected
+
+
+def test_ndjson_export_streams_one_users_rows_in_chunks(db, make_analysis):
+    expected = _seed(db, make_analysis)
+    fields = parse_export_fields("id,overall_score,timestamp,eeat")
+    chunks = list(export_analyses(db, "ndjson", fields, "anon", chunk_size=2))
+
+    assert len(chunks) == 2  # four rows, two per chunk
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [(row["id"], row["overall_score"]) for row in rows] == expected
+    assert rows[0]["eeat"] == sample_analysis(0)["eeat"]
+    assert list(rows[0]) == ["id", "overall_score", "timestamp", "eeat"]
+
+
+def test_csv_export_has_a_header_and_json_sections(db, make_analysis):
+    expected = _seed(db, make_analysis)
+    fields = ["id", "overall_score", "recommendations"]
+    data = b"".join(export_analyses(db, "csv", fields, "anon", chunk_size=3))
+
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+    assert [(row["id"], float(row["overall_score"])) for row in rows] == expected
+    assert json.loads(rows[1]["recommendations"]) == (
+        sample_analysis(2)["recommendations"]
+    )
+
+
+def test_export_filters_by_date(db, make_analysis):
+    _seed(db, make_analysis)
+    since = STARTED + timedelta(days=4)
+    data = b"".join(export_analyses(db, "ndjson", ["id"], since=since))
+    assert len(data.splitlines()) == 3
+
+
+def test_parquet_export_writes_a_row_group_per_chunk(db, make_analysis):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    expected = _seed(db, make_analysis)
+    fields = parse_export_fields("id,overall_score,timestamp,eeat")
+    data = b"".join(export_analyses(db, "parquet", fields, "anon", chunk_size=2))
+
+    file = parquet.ParquetFile(io.BytesIO(data))
+    assert file.num_row_groups == 2
+    table = file.read()
+    assert list(zip(table["id"].to_pylist(), table["overall_score"].to_pylist())) == (
+        expected
+    )
+    assert table["timestamp"].to_pylist()[0] == STARTED
+    assert json.loads(table["eeat"].to_pylist()[0]) == sample_analysis(0)["eeat"]
+
+
+def test_unknown_formats_and_fields_are_rejected(db):
+    with pytest.raises(ValueError):
+        export_analyses(db, "xml", ["id"])
+    with pytest.raises(ValueError):
+        parse_export_fields("id,password")
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.v1.auth import get_current_user
+from app.api.v1.user import DEFAULT_HISTORY_PAGE_SIZE, router
+from app.database import get_db
+from app.models import User
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+STARTED = datetime(2026, 3, 1)
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(router)
+    user = User(email="user@example.com", anonymous_id="anon")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: db
+    with TestClient(app) as client:
+        yield client
+
+
+def _seed(db, make_analysis, hours) -> list:
+    """One analysis per hour offset; returns their ids newest first"""
+    analyses = []
+    for n, hour in enumerate(hours):
+        analysis = make_analysis(sample_analysis(n))
+        analysis.created_at = STARTED + timedelta(hours=hour)
+        analyses.append(analysis)
+    write_analyses(db, analyses)
+    ordered = sorted(analyses, key=lambda a: (a.created_at, a.id), reverse=True)
+    return [analysis.id for analysis in ordered]
+
+
+def _walk(client, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/analyses", params=params)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_the_history_once(db, make_analysis, client):
+    # Runs of equal timestamps straddle the page boundaries
+    expected = _seed(db, make_analysis, [0, 0, 0, 1, 1, 2, 2, 2, 3])
+    other = make_analysis(sample_analysis(1), "other")
+    other.created_at = STARTED
+    write_analyses(db, [other])
+
+    pages = _walk(client, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 1]
+    assert [item for page in pages for item in page] == expected
+
+
+def test_history_is_paged_by_default(db, make_analysis, client):
+    expected = _seed(db, make_analysis, range(DEFAULT_HISTORY_PAGE_SIZE + 1))
+    response = client.get("/analyses", params={"fields": "id,timestamp"})
+
+    assert [item["id"] for item in response.json()] == expected[:-1]
+    cursor = response.headers["X-Next-Cursor"]
+    rest = client.get("/analyses", params={"cursor": cursor})
+    assert [item["id"] for item in rest.json()] == expected[-1:]
+    assert "X-Next-Cursor" not in rest.headers
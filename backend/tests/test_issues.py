@@ -0,0 +1,76 @@
+from datetime import date, datetime
+
+from app.models import IssueOccurrence
+from app.services.issues import issue_code, issue_report, section_issues, top_issues
+from app.services.persistence import write_analyses
+from benchmarks.payloads import sample_analysis
+
+TODAY = date(2026, 3, 3)
+
+
+def _write(db, make_analysis, url, day, issues):
+    data = {
+        **sample_analysis(1),
+        "crawlability": {"total_score": 50, "issues": issues},
+    }
+    analysis = make_analysis(data)
+    analysis.canonical_url = url
+    analysis.created_at = datetime(2026, 3, day, 12)
+    write_analyses(db, [analysis])
+    return analysis.id
+
+
+FAIL = {"type": "check-fail", "text": "No robots.txt found"}
+WARN = {"type": "check-warn", "text": "No explicit AI bot permissions in robots.txt"}
+PASS = {"type": "check-pass", "text": "llms.txt found"}
+
+
+def test_issue_codes():
+    assert issue_code("crawlability", "No robots.txt found") == (
+        "crawlability.no-robots-txt-found"
+    )
+    assert issue_code("structured_data", "Error parsing schema: bad") == (
+        "structured_data.error-parsing-schema"
+    )
+    issues = section_issues(
+        {"crawlability": {"issues": [FAIL, FAIL, PASS, "Page not loaded"]}}
+    )
+    assert [(i["code"], i["severity"]) for i in issues] == [
+        ("crawlability.no-robots-txt-found", "fail"),
+        ("crawlability.page-not-loaded", "fail"),
+    ]
+
+
+def test_writes_maintain_the_index(db, make_analysis):
+    first = _write(db, make_analysis, "https://a.com/", 1, [FAIL, WARN, PASS])
+    second = _write(db, make_analysis, "https://b.com/", 3, [FAIL])
+    _write(db, make_analysis, "https://a.com/x", 3, [FAIL])
+
+    ids = {
+        row.analysis_id
+        for row in db.query(IssueOccurrence).filter(
+            IssueOccurrence.code == "crawlability.no-robots-txt-found"
+        )
+    }
+    assert {first, second} <= ids and len(ids) == 3
+
+    top = top_issues(db, k=10)
+    crawlability = [i for i in top if i["section"] == "crawlability"]
+    assert [(i["code"], i["count"]) for i in crawlability] == [
+        ("crawlability.no-robots-txt-found", 3),
+        ("crawlability.no-explicit-ai-bot-permissions-in-robots-txt", 1),
+    ]
+    recent = top_issues(db, k=10, days=1, severity="warn", today=TODAY)
+    assert all(i["code"] != crawlability[1]["code"] for i in recent)
+
+    report = issue_report(db, "crawlability.no-robots-txt-found", days=7, today=TODAY)
+    assert report["count"] == 3
+    assert report["days"] == [
+        {"date": "2026-03-01", "count": 1},
+        {"date": "2026-03-03", "count": 2},
+    ]
+    assert report["top_domains"] == [
+        {"domain": "a.com", "count": 2},
+        {"domain": "b.com", "count": 1},
+    ]
+    assert issue_report(db, "nope") is None
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import ScoreSketch
+from app.services.percentiles import ScoreHistogram, ScorePercentiles, score_keys
+from benchmarks.payloads import sample_analysis
+
+
+def test_histogram_ranks_and_quantiles():
+    histogram = ScoreHistogram()
+    for score in range(100):
+        histogram.add(score)
+    assert histogram.rank(50) == 50.5
+    assert histogram.rank(-5) == 0.5  # clamped into the first bin
+    assert histogram.quantile(0.9) == 89.0
+    assert ScoreHistogram().rank(50) is None
+
+    restored = ScoreHistogram.from_bytes(histogram.to_bytes())
+    restored.merge(histogram)
+    assert restored.total == 200
+    assert restored.rank(50) == histogram.rank(50)
+
+
+def test_score_keys_cover_sections_and_schema_types():
+    data = sample_analysis(1)
+    data["structured_data"]["schema_types"] = ["Article", "Article", "<script>"]
+    keys = dict(score_keys(data))
+    assert keys[("section", "overall")] == data["overall_score"]
+    assert keys[("section", "eeat")] == data["eeat"]["total_score"]
+    assert keys[("schema_type", "Article")] == data["overall_score"]
+    assert ("schema_type", "<script>") not in keys
+
+
+def test_workers_converge_through_flushes(db):
+    first, second = ScorePercentiles(10), ScorePercentiles(10)
+    for score in (10, 20, 30):
+        first.observe({"overall_score": score})
+    second.observe({"overall_score": 90})
+    assert second.ranks({"overall_score": 50})["overall"] == 0
+
+    assert first.flush(db) == 1
+    assert second.flush(db) == 1
+    ranks = second.ranks({"overall_score": 50})
+    assert ranks == {"overall": 75.0, "schema_types": {}}
+    (row,) = db.query(ScoreSketch)
+    assert row.count == 4
+    first.load(db)
+    assert first.ranks({"overall_score": 50})["overall"] == 75.0
+
+
+def test_schema_types_are_capped():
+    percentiles = ScorePercentiles(max_schema_types=1)
+    data = sample_analysis(1)
+    data["structured_data"]["schema_types"] = ["Article", "Product"]
+    percentiles.observe(data)
+    assert set(percentiles.ranks(data)["schema_types"]) == {"Article"}
+
+
+def test_concurrent_flushes_do_not_lose_deltas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sketches.db'}"
+    engines = [create_engine(url, connect_args={"timeout": 5}) for _ in range(2)]
+    Base.metadata.create_all(bind=engines[0])
+    sessions = [sessionmaker(bind=engine)() for engine in engines]
+    stored = ScorePercentiles(10)
+    stored.observe({"overall_score": 50})
+    stored.flush(sessions[0])
+    workers = [ScorePercentiles(10) for _ in engines]
+    for worker in workers:
+        worker.observe({"overall_score": 50})
+    reading, second_started = threading.Event(), threading.Event()
+
+    @event.listens_for(engines[0], "after_cursor_execute")
+    def pause_after_reading(conn, cursor, statement, *args):
+        # Let the second flush start while the first holds what it read
+        if statement.startswith("SELECT") and "score_sketches" in statement:
+            if not reading.is_set():
+                reading.set()
+                second_started.wait(5)
+                time.sleep(0.2)
+
+    def second_flush():
+        reading.wait(5)
+        second_started.set()
+        workers[1].flush(sessions[1])
+
+    thread = threading.Thread(target=second_flush)
+    thread.start()
+    workers[0].flush(sessions[0])
+    thread.join()
+
+    (row,) = sessions[0].query(ScoreSketch)
+    assert row.count == 3
+    for session, engine in zip(sessions, engines):
+        session.close()
+        engine.dispose()
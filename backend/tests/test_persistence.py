@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.api_real import (
+    ANALYSIS_CACHE_CONTROL,
+    PENDING_ANALYSIS_CACHE_CONTROL,
+    _load_analysis,
+    get_analysis,
+)
+from app.config import settings
+from app.models import Analysis, AnalysisResult
+from app.services import persistence
+from app.services.persistence import AnalysisWriter, write_analyses
+from benchmarks.payloads import sample_analysis
+
+
+def test_identical_payloads_are_stored_once(db, make_analysis):
+    data = sample_analysis(1)
+    assert write_analyses(db, [make_analysis(data, "a"), make_analysis(data, "b")]) == 1
+    assert write_analyses(db, [make_analysis(data, "c")]) == 0
+    assert write_analyses(db, [make_analysis(sample_analysis(2))]) == 1
+
+    assert db.query(Analysis).count() == 4
+    assert db.query(AnalysisResult).count() == 2
+
+
+def test_shared_result_is_read_back_per_analysis(db, make_analysis):
+    data = sample_analysis(3)
+    first, second = make_analysis(data, "a"), make_analysis(data, "b")
+    write_analyses(db, [first, second])
+
+    loaded = _load_analysis(db, second.id)
+    assert loaded["id"] == second.id
+    assert loaded["eeat"] == data["eeat"]
+    assert loaded["recommendations"] == data["recommendations"]
+
+
+def test_content_hash_ignores_key_order():
+    data = sample_analysis(4)
+    reordered = {name: data[name] for name in reversed(AnalysisResult.SECTIONS)}
+    assert AnalysisResult.content_hash(data) == AnalysisResult.content_hash(reordered)
+
+
+def _repeat(data: dict, **changes) -> dict:
+    """data with some sections replaced, as a later audit of the same page"""
+    return {**data, **changes}
+
+
+def test_repeat_results_are_stored_as_deltas_against_a_keyframe(db, make_analysis):
+    data = sample_analysis(5)
+    first = make_analysis(data)
+    first.canonical_url = data["url"]
+    keyframe_hash = first.result_hash
+    write_analyses(db, [first])
+
+    eeat = {**data["eeat"], "total_score": data["eeat"]["total_score"] + 5}
+    second = make_analysis(_repeat(data, eeat=eeat))
+    second.canonical_url = data["url"]
+    second_id, second_hash = second.id, second.result_hash
+    write_analyses(db, [second])
+    db.expunge_all()
+
+    stored = db.get(AnalysisResult, second_hash)
+    assert stored.base_hash == keyframe_hash
+    assert stored.crawlability is None
+    assert set(stored.delta) == {"eeat"}
+
+    loaded = _load_analysis(db, second_id)
+    assert loaded["eeat"] == eeat
+    assert loaded["crawlability"] == data["crawlability"]
+
+
+def test_keyframe_interval_starts_new_keyframes(db, monkeypatch, make_analysis):
+    monkeypatch.setattr(settings, "result_keyframe_interval", 3)
+    data = sample_analysis(6)
+    hashes = []
+    for score in range(5):
+        eeat = {**data["eeat"], "total_score": score}
+        analysis = make_analysis(_repeat(data, eeat=eeat))
+        analysis.canonical_url = data["url"]
+        hashes.append(analysis.result_hash)
+        write_analyses(db, [analysis])
+
+    bases = [db.get(AnalysisResult, key).base_hash for key in hashes]
+    assert bases == [None, hashes[0], hashes[0], None, hashes[3]]
+
+
+@pytest.fixture
+def writer_analyses(db, make_analysis, monkeypatch):
+    """Builds analyses for an AnalysisWriter committing to the test database"""
+    monkeypatch.setattr(persistence, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    def make(n: int) -> Analysis:
+        analysis = make_analysis(sample_analysis(n))
+        analysis.created_at = datetime(2026, 3, 1, n)
+        return analysis
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_writer_commits_full_batches_without_waiting(db, writer_analyses):
+    writer = AnalysisWriter(max_batch=2, max_delay=60)
+    analyses = [writer_analyses(n) for n in range(4)]
+    await asyncio.wait_for(
+        asyncio.gather(*(writer.submit(analysis) for analysis in analyses)), 5
+    )
+
+    assert (writer.batches, writer.rows) == (2, 4)
+    assert db.query(Analysis).count() == 4
+    await writer.drain()
+
+
+@pytest.mark.asyncio
+async def test_writer_commits_partial_batches_after_the_delay(db, writer_analyses):
+    writer = AnalysisWriter(max_batch=100, max_delay=0.05)
+    await asyncio.wait_for(writer.submit(writer_analyses(1)), 5)
+
+    assert (writer.batches, writer.rows) == (1, 1)
+    await writer.drain()
+
+
+@pytest.mark.asyncio
+async def test_non_durable_writes_are_pending_until_drained(db, writer_analyses):
+    writer = AnalysisWriter(max_batch=100, max_delay=60)
+    analyses = [writer_analyses(n) for n in range(3)]
+    for analysis in analyses:
+        await writer.submit(analysis, durable=False)
+
+    assert all(writer.pending(analysis.id) is analysis for analysis in analyses)
+    assert db.query(Analysis).count() == 0
+
+    await writer.drain()
+    assert writer._task.done()
+    assert (writer.batches, writer.rows) == (1, 3)
+    assert all(writer.pending(analysis.id) is None for analysis in analyses)
+    assert db.query(Analysis).count() == 3
+
+
+@pytest.mark.asyncio
+async def test_pending_analyses_are_not_cached_by_clients(db, writer_analyses):
+    writer = AnalysisWriter(max_batch=100, max_delay=60)
+    analysis = writer_analyses(1)
+    request = Request({"type": "http", "headers": []})
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr("app.api_real.analysis_writer", writer)
+        await writer.submit(analysis, durable=False)
+        pending = await get_analysis(analysis.id, request, db=db)
+        await writer.drain()
+        committed = await get_analysis(analysis.id, request, db=db)
+
+    assert pending.headers["Cache-Control"] == PENDING_ANALYSIS_CACHE_CONTROL
+    assert committed.headers["Cache-Control"] == ANALYSIS_CACHE_CONTROL
+
+
+@pytest.mark.asyncio
+async def test_writer_retries_conflicts_and_survives_failed_batches(
+    db, writer_analyses, monkeypatch
+):
+    calls = []
+    record_search = persistence.record_search
+
+    def conflict_once(db, analyses):
+        calls.append(len(analyses))
+        if len(calls) == 1:
+            raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+        record_search(db, analyses)
+
+    monkeypatch.setattr(persistence, "record_search", conflict_once)
+    writer = AnalysisWriter(max_batch=1, max_delay=60)
+    await writer.submit(writer_analyses(1))
+    assert calls == [1, 1]
+    assert (writer.rows, writer.failed_rows) == (1, 0)
+
+    def fail(db, analyses):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(persistence, "record_search", fail)
+    failed = writer_analyses(2)
+    with pytest.raises(RuntimeError):
+        await writer.submit(failed)
+    assert writer.failed_rows == 1
+    assert writer.pending(failed.id) is None
+
+    # The worker keeps committing later batches
+    monkeypatch.setattr(persistence, "record_search", record_search)
+    await writer.submit(writer_analyses(3))
+    assert (writer.batches, writer.rows, writer.failed_rows) == (2, 2, 1)
+    assert db.query(Analysis).count() == 2
+    await writer.drain()
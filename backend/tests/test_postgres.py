@@ -0,0 +1,170 @@
+"""Runs against a real PostgreSQL database when TEST_DATABASE_URL points at one"""
+
+from datetime import date, datetime
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.user import _list_analyses, _list_changes
+from app.api_real import _load_analysis
+from app.db import Base, create_db_engine
+from app.models import AnalysisResult, AnonymousUsage, ScoreRollup
+from app.services.dashboard import get_dashboard_summary, rebuild_dashboard_summaries
+from app.services.issues import top_issues
+from app.services.persistence import write_analyses
+from app.services.search import parse_query, search_analyses
+from app.services.usage import UsageCounterBuffer
+from benchmarks.payloads import sample_analysis
+from tests.test_query_plans import _captured
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL or not TEST_DATABASE_URL.startswith("postgresql"),
+    reason="TEST_DATABASE_URL is not a PostgreSQL database",
+)
+
+
+@pytest.fixture
+def pg_db():
+    """A session on a freshly created schema in the test PostgreSQL database"""
+    engine = create_db_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_sections_are_stored_as_queryable_jsonb(pg_db, make_analysis):
+    data = sample_analysis(1)
+    analysis = make_analysis(data)
+    analysis_id = analysis.id
+    assert write_analyses(pg_db, [analysis]) == 1
+
+    score = pg_db.execute(
+        text("SELECT eeat->>'total_score' FROM analysis_results")
+    ).scalar()
+    assert score == str(data["eeat"]["total_score"])
+    assert _load_analysis(pg_db, analysis_id)["eeat"] == data["eeat"]
+
+
+def test_deltas_round_trip(pg_db, make_analysis):
+    data = sample_analysis(2)
+    first = make_analysis(data)
+    first.canonical_url = data["url"]
+    keyframe_hash = first.result_hash
+    write_analyses(pg_db, [first])
+
+    eeat = {**data["eeat"], "total_score": 1}
+    second = make_analysis({**data, "eeat": eeat})
+    second.canonical_url = data["url"]
+    second_id, second_hash = second.id, second.result_hash
+    write_analyses(pg_db, [second])
+    pg_db.expunge_all()
+
+    assert pg_db.get(AnalysisResult, second_hash).base_hash == keyframe_hash
+    assert _load_analysis(pg_db, second_id)["eeat"] == eeat
+
+
+def test_usage_flush_upserts(pg_db):
+    pg_db.add(AnonymousUsage(anonymous_id="existing", analysis_count=5))
+    pg_db.commit()
+    buffer = UsageCounterBuffer(cache_size=10)
+
+    buffer.increment("existing", 3)
+    buffer.increment("new")
+    assert buffer.flush(pg_db) == 2
+    buffer.increment("new", 2)
+    assert buffer.flush(pg_db) == 1
+
+    counts = dict(
+        pg_db.query(AnonymousUsage.anonymous_id, AnonymousUsage.analysis_count)
+    )
+    assert counts == {"existing": 8, "new": 3}
+
+
+def test_score_rollups_upsert(pg_db, make_analysis):
+    data = sample_analysis(3)
+    for hour, score in enumerate((40, 90, 10)):
+        analysis = make_analysis({**data, "overall_score": score})
+        analysis.canonical_url = data["url"]
+        analysis.created_at = datetime(2026, 1, 5, hour)
+        write_analyses(pg_db, [analysis])
+
+    rollups = pg_db.query(ScoreRollup).filter(ScoreRollup.granularity == "day").all()
+    assert [
+        (r.count, r.overall_sum, r.overall_min, r.overall_max) for r in rollups
+    ] == [(3, 140, 10, 90)]
+
+
+def test_top_issues_over_a_range(pg_db, make_analysis):
+    for n in range(3):
+        analysis = make_analysis(sample_analysis(n))
+        analysis.created_at = datetime(2026, 1, 5, n)
+        write_analyses(pg_db, [analysis])
+
+    ranged = top_issues(pg_db, k=5, days=1, today=date(2026, 1, 5))
+    assert ranged == top_issues(pg_db, k=5)
+    assert ranged and ranged[0]["count"] >= ranged[-1]["count"]
+
+
+def test_score_listing_is_an_index_only_scan(pg_db, make_analysis):
+    write_analyses(pg_db, [make_analysis(sample_analysis(n)) for n in range(20)])
+    pg_db.execute(text("ANALYZE analyses"))
+    pg_db.execute(text("SET enable_seqscan = off"))
+    with _captured(pg_db) as statements:
+        _list_analyses(pg_db, "anon", ["id", "overall_score", "timestamp"], limit=5)
+    statement, parameters = statements[0]
+
+    cursor = pg_db.connection().connection.cursor()
+    cursor.execute(f"EXPLAIN {statement}", parameters)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "Index Only Scan using ix_analyses_anonymous_id_created_at" in plan, plan
+    assert "Sort" not in plan, plan
+
+
+def test_search_uses_the_tsvector_index(pg_db, make_analysis):
+    for n in range(3):
+        data = {**sample_analysis(n), "url": f"https://recipes{n}.com/pasta"}
+        analysis = make_analysis(data)
+        analysis.created_at = datetime(2026, 1, 5, n)
+        write_analyses(pg_db, [analysis])
+
+    found = search_analyses(pg_db, "anon", parse_query("recipe past"), 2)
+    assert [item["url"] for item in found] == [
+        "https://recipes2.com/pasta",
+        "https://recipes1.com/pasta",
+    ]
+    assert search_analyses(pg_db, "other", ["recipe"], 2) == []
+
+
+def test_change_feed_positions(pg_db, make_analysis):
+    for n in range(3):
+        write_analyses(pg_db, [make_analysis(sample_analysis(n))])
+
+    items, last, more = _list_changes(pg_db, "anon", ["id", "url"], 1, 10)
+    assert [item["url"] for item in items] == [
+        sample_analysis(n)["url"] for n in (1, 2)
+    ]
+    assert (last, more) == (3, False)
+
+
+def test_dashboard_summaries_merge_writes_and_usage(pg_db, make_analysis):
+    for n in range(3):
+        write_analyses(pg_db, [make_analysis(sample_analysis(n))])
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("anon", 3)
+    buffer.flush(pg_db)
+
+    summary = get_dashboard_summary(pg_db, "anon")
+    assert (summary["count"], summary["quota_used"]) == (3, 3)
+    assert len(summary["recent"]) == 3
+    assert rebuild_dashboard_summaries(pg_db) == 1
+    assert get_dashboard_summary(pg_db, "anon") == summary
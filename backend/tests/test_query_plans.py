@@ -0,0 +1,106 @@
+"""EXPLAIN QUERY PLAN checks that hot queries stay on their indexes"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import event
+
+from app.api.v1.user import _list_analyses
+from app.api_real import _previous_analysis_id
+from app.services.persistence import _latest_keyframe, write_analyses
+from benchmarks.payloads import sample_analysis
+
+
+@contextmanager
+def _captured(db):
+    """Statements (with parameters) executed on db's engine inside the block"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def _plan(db, statement, parameters) -> List[str]:
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _assert_indexed(plan: List[str], index: str) -> None:
+    assert any(index in step for step in plan), plan
+    # A bare "SCAN analyses" is a full table scan
+    assert not any(step == "SCAN analyses" for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def _seed(db, make_analysis) -> List[str]:
+    analyses = []
+    started = datetime(2026, 1, 1)
+    for n in range(30):
+        analysis = make_analysis(sample_analysis(n), f"anon-{n % 3}")
+        analysis.canonical_url = f"https://example.com/{n % 5}"
+        analysis.created_at = started + timedelta(hours=n)
+        analyses.append(analysis)
+    ids = [analysis.id for analysis in analyses]
+    write_analyses(db, analyses)
+    return ids
+
+
+def test_score_listing_reads_only_the_history_index(db, make_analysis):
+    _seed(db, make_analysis)
+    with _captured(db) as statements:
+        _list_analyses(db, "anon-1", ["id", "overall_score", "timestamp"], limit=5)
+    plan = _plan(db, *statements[0])
+    _assert_indexed(plan, "COVERING INDEX ix_analyses_anonymous_id_created_at")
+
+
+def test_history_pages_follow_the_history_index(db, make_analysis):
+    _seed(db, make_analysis)
+    items, cursor = _list_analyses(
+        db, "anon-2", ["id", "url", "overall_score", "timestamp"], limit=3
+    )
+    last = items[-1]
+    with _captured(db) as statements:
+        _list_analyses(
+            db, "anon-2", ["id", "url"], limit=3, cursor=(last["timestamp"], last["id"])
+        )
+    plan = _plan(db, *statements[0])
+    _assert_indexed(plan, "ix_analyses_anonymous_id_created_at")
+
+
+def _plans(db, statements, column: str) -> List[List[str]]:
+    """Plans of the captured statements that filter on analyses.<column>"""
+    return [
+        _plan(db, statement, parameters)
+        for statement, parameters in statements
+        if f"analyses.{column} =" in statement
+    ]
+
+
+def test_latest_keyframe_uses_the_canonical_url_index(db, make_analysis):
+    _seed(db, make_analysis)
+    with _captured(db) as statements:
+        _latest_keyframe(db, "https://example.com/4")
+    plans = _plans(db, statements, "canonical_url")
+    assert plans
+    for plan in plans:
+        _assert_indexed(plan, "ix_analyses_canonical_url_created_at")
+
+
+def test_previous_analysis_lookup_is_indexed(db, make_analysis):
+    ids = _seed(db, make_analysis)
+    with _captured(db) as statements:
+        _previous_analysis_id(db, ids[-1])
+    # Either composite index answers it without a scan or a sort
+    _assert_indexed(_plans(db, statements, "canonical_url")[0], "ix_analyses_")
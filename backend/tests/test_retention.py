@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api_real import _load_analysis
+from app.config import settings
+from app.db import Base
+from app.models import Analysis, AnalysisResult, ArchivedAnalysis
+from app.services.persistence import write_analyses
+from app.services.search import rebuild_search_index, search_analyses
+from benchmarks.payloads import sample_analysis
+
+pytest.importorskip("pyarrow")
+
+from app.services.retention import (  # noqa: E402
+    _delete_unreferenced_results,
+    archive_analyses,
+)
+
+CUTOFF = datetime(2026, 3, 1)
+
+
+def _seed(db, make_analysis):
+    """Old analyses across two months, plus a recent one; returns their ids"""
+    data = sample_analysis(1)
+    days = [-40, -35, -10, -1, 5]
+    analyses = []
+    for n, day in enumerate(days):
+        # Repeat audits of one page, so the old ones include deltas
+        eeat = {**data["eeat"], "total_score": n}
+        analysis = make_analysis({**data, "eeat": eeat})
+        analysis.canonical_url = data["url"]
+        analysis.created_at = CUTOFF + timedelta(days=day)
+        analyses.append(analysis)
+    ids = [analysis.id for analysis in analyses]
+    for analysis in analyses:
+        write_analyses(db, [analysis])
+    return ids
+
+
+def test_aged_analyses_move_to_monthly_files(db, tmp_path, make_analysis):
+    ids = _seed(db, make_analysis)
+    assert archive_analyses(db, CUTOFF, str(tmp_path), batch_size=3) == 4
+
+    assert [row.id for row in db.query(Analysis.id)] == ids[4:]
+    summaries = {row.id: row for row in db.query(ArchivedAnalysis)}
+    assert set(summaries) == set(ids[:4])
+    months = {summary.archive.split("/")[0] for summary in summaries.values()}
+    assert months == {"2026-01", "2026-02"}
+    assert sorted(p.parent.name for p in tmp_path.glob("*/*.parquet")) == [
+        "2026-01",
+        "2026-02",
+        "2026-02",  # second batch
+    ]
+    # The recent analysis' result is left, with the keyframe it is a delta of
+    assert db.query(AnalysisResult).count() == 2
+    (recent,) = db.query(AnalysisResult).filter(AnalysisResult.base_hash.isnot(None))
+    assert db.get(AnalysisResult, recent.base_hash) is not None
+
+
+def test_archived_analyses_are_served_by_id(db, tmp_path, monkeypatch, make_analysis):
+    ids = _seed(db, make_analysis)
+    before = _load_analysis(db, ids[1])
+    archive_analyses(db, CUTOFF, str(tmp_path))
+
+    monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+    assert _load_analysis(db, ids[1]) == before
+    assert _load_analysis(db, "missing") is None
+
+
+def test_archived_analyses_leave_the_search_index(db, tmp_path, make_analysis):
+    def found():
+        return [item["id"] for item in search_analyses(db, "anon", ["example"], 10)]
+
+    ids = _seed(db, make_analysis)
+    assert found() == ids[::-1]
+    archive_analyses(db, CUTOFF, str(tmp_path))
+
+    assert found() == ids[4:]
+    assert rebuild_search_index(db) == 1
+    assert found() == ids[4:]
+
+
+def test_nothing_to_archive_is_a_no_op(db, tmp_path, make_analysis):
+    write_analyses(db, [make_analysis(sample_analysis(2))])
+    assert archive_analyses(db, datetime(2000, 1, 1), str(tmp_path)) == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_cleanup_waits_for_writes_reusing_a_result(tmp_path, make_analysis):
+    url = f"sqlite:///{tmp_path / 'race.db'}"
+    engines = [create_engine(url, connect_args={"timeout": 5}) for _ in range(2)]
+    Base.metadata.create_all(bind=engines[0])
+    sessions = [sessionmaker(bind=engine)() for engine in engines]
+    # A stored result that nothing references, as after an archive run
+    analysis = make_analysis(sample_analysis(1))
+    sessions[0].add(AnalysisResult.from_sections(sample_analysis(1)))
+    sessions[0].commit()
+    checked, cleaning = threading.Event(), threading.Event()
+
+    @event.listens_for(engines[0], "after_cursor_execute")
+    def pause_after_checking(conn, cursor, statement, *args):
+        # Let the cleanup run between the existence check and the insert
+        if "FROM analysis_results" in statement and not checked.is_set():
+            checked.set()
+            cleaning.wait(5)
+            time.sleep(0.2)
+
+    def cleanup():
+        checked.wait(5)
+        cleaning.set()
+        _delete_unreferenced_results(sessions[1])
+        sessions[1].commit()
+
+    thread = threading.Thread(target=cleanup)
+    thread.start()
+    write_analyses(sessions[0], [analysis])
+    thread.join()
+
+    assert sessions[0].get(AnalysisResult, analysis.result_hash) is not None
+    for session, engine in zip(sessions, engines):
+        session.close()
+        engine.dispose()
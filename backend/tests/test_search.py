@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.services.persistence import write_analyses
+from app.services.search import parse_query, rebuild_search_index, search_analyses
+from benchmarks.payloads import sample_analysis
+
+
+def _write(
+    db, make_analysis, url, hour, title=None, anonymous_id="anon", schema_types=()
+):
+    data = {
+        **sample_analysis(hour),
+        "url": url,
+        "structured_data": {
+            "schema_types": list(schema_types),
+            "total_score": 50,
+            "issues": [{"type": "check-fail", "text": "Article schema missing author"}],
+        },
+    }
+    analysis = make_analysis(data, anonymous_id)
+    analysis.title = title
+    analysis.created_at = datetime(2026, 3, 1, hour)
+    write_analyses(db, [analysis])
+    return analysis.id
+
+
+def _ids(db, query, anonymous_id="anon", limit=10, after=None):
+    items = search_analyses(db, anonymous_id, parse_query(query), limit, after)
+    return [item["id"] for item in items]
+
+
+def test_parse_query():
+    assert parse_query("  Blog-Post  faq ") == ["blog", "post", "faq"]
+    with pytest.raises(ValueError):
+        parse_query(" -- ")
+
+
+def test_prefix_search_over_every_field(db, make_analysis):
+    recipes = _write(
+        db, make_analysis, "https://cooking.com/recipes", 1, title="Best pasta"
+    )
+    faq = _write(db, make_analysis, "https://help.com/", 2, schema_types=["FAQPage"])
+    _write(db, make_analysis, "https://cooking.com/recipes", 3, anonymous_id="other")
+
+    assert _ids(db, "cook") == [recipes]
+    assert _ids(db, "past") == [recipes]
+    assert _ids(db, "faqp") == [faq]
+    assert _ids(db, "author") == [faq, recipes]
+    assert _ids(db, "cooking recipe") == [recipes]
+    assert _ids(db, "cooking faq") == []
+    assert _ids(db, "recipes", anonymous_id="nobody") == []
+
+
+def test_search_pages_newest_first(db, make_analysis):
+    ids = [
+        _write(db, make_analysis, f"https://shop.com/item-{hour}", hour)
+        for hour in range(5)
+    ]
+    first = search_analyses(db, "anon", ["shop"], 2)
+    assert [item["id"] for item in first] == [ids[4], ids[3]]
+    last = first[-1]
+    after = (last["timestamp"], last["id"])
+    assert _ids(db, "shop", limit=10, after=after) == [ids[2], ids[1], ids[0]]
+
+
+def test_rebuild_matches_incremental_index(db, make_analysis):
+    _write(db, make_analysis, "https://a.com/", 1, title="Alpha")
+    _write(db, make_analysis, "https://b.com/", 2, schema_types=["Article"])
+    incremental = db.execute(
+        text("SELECT analysis_id, url, title FROM analysis_search ORDER BY 1")
+    ).all()
+
+    assert rebuild_search_index(db) == 2
+    rebuilt = db.execute(
+        text("SELECT analysis_id, url, title FROM analysis_search ORDER BY 1")
+    ).all()
+    assert rebuilt == incremental
+    assert len(_ids(db, "alpha")) == 1
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.user import _list_changes
+from app.db import Base, RoutingSession, create_sqlite_wal_engines
+from app.models import AnonymousUsage, ChangeSequence
+from app.services.dashboard import get_dashboard_summary
+from app.services.persistence import write_analyses
+from app.services.search import rebuild_search_index, search_analyses
+from app.services.usage import UsageCounterBuffer
+from benchmarks.payloads import sample_analysis
+
+
+@pytest.fixture
+def wal_engines(tmp_path):
+    writer, reader = create_sqlite_wal_engines(f"sqlite:///{tmp_path / 'wal.db'}")
+    Base.metadata.create_all(bind=writer)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+@pytest.fixture
+def wal_session(wal_engines):
+    writer, reader = wal_engines
+    session = sessionmaker(class_=RoutingSession, reader=reader, bind=writer)()
+    yield session
+    session.close()
+
+
+def test_connections_use_wal_and_readers_are_query_only(wal_engines):
+    writer, reader = wal_engines
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    with reader.connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM anonymous_usage"))
+
+
+def test_session_writes_through_the_writer_and_reads_from_the_pool(wal_session):
+    wal_session.add(AnonymousUsage(anonymous_id="anon", analysis_count=1))
+    wal_session.commit()
+    assert wal_session.get_bind() is wal_session.reader
+
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("anon", 2)
+    buffer.increment("new")
+    assert buffer.flush(wal_session) == 2
+
+    counts = dict(
+        wal_session.query(AnonymousUsage.anonymous_id, AnonymousUsage.analysis_count)
+    )
+    assert counts == {"anon": 3, "new": 1}
+
+
+def test_transactions_read_their_own_writes(wal_session):
+    wal_session.add(AnonymousUsage(anonymous_id="anon", analysis_count=1))
+    wal_session.flush()
+    assert wal_session.get_bind() is not wal_session.reader
+    assert wal_session.query(AnonymousUsage).count() == 1
+    wal_session.rollback()
+    assert wal_session.get_bind() is wal_session.reader
+    assert wal_session.query(AnonymousUsage).count() == 0
+
+
+def test_analysis_writes_go_through_the_writer(wal_session, make_analysis):
+    for n in range(3):
+        write_analyses(wal_session, [make_analysis(sample_analysis(n))])
+    write_analyses(
+        wal_session, [make_analysis(sample_analysis(n)) for n in range(3, 5)]
+    )
+
+    items, last, _ = _list_changes(wal_session, "anon", ["id"], 0, 10)
+    assert len(items) == 5 and last == 5
+    assert wal_session.get(ChangeSequence, "analyses").value == 5
+    assert get_dashboard_summary(wal_session, "anon")["count"] == 5
+    assert len(search_analyses(wal_session, "anon", ["example"], 10)) == 5
+    assert rebuild_search_index(wal_session) == 5
+    assert len(search_analyses(wal_session, "anon", ["example"], 10)) == 5
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.trends import get_score_trend
+
+from app.models import ScorePoint, ScoreRollup
+from app.services.persistence import write_analyses
+from app.services.trends import score_trend
+from benchmarks.payloads import sample_analysis
+
+URL = "https://example.com/page"
+START = datetime(2026, 1, 5)  # a Monday
+
+
+def _seed(db, make_analysis, scores_by_hour):
+    """One analysis of URL per (hours after START, overall score)"""
+    data = sample_analysis(1)
+    analyses = []
+    for hours, score in scores_by_hour:
+        analysis = make_analysis({**data, "overall_score": score})
+        analysis.canonical_url = URL
+        analysis.created_at = START + timedelta(hours=hours)
+        analyses.append(analysis)
+    write_analyses(db, analyses)
+
+
+def test_writes_record_points_and_rollups(db, make_analysis):
+    _seed(db, make_analysis, [(1, 40), (5, 60), (30, 80)])
+    _seed(db, make_analysis, [(2, 20)])  # merged into the existing rollups
+
+    assert db.query(ScorePoint).count() == 4
+    day = db.get(ScoreRollup, (URL, "day", START))
+    assert (day.count, day.overall_sum, day.overall_min, day.overall_max) == (
+        3,
+        120,
+        20,
+        60,
+    )
+    week = db.get(ScoreRollup, (URL, "week", START))
+    assert (week.count, week.overall_min, week.overall_max) == (4, 20, 80)
+    eeat = sample_analysis(1)["eeat"]["total_score"]
+    assert week.eeat_count == 4
+    assert week.eeat_sum == 4 * eeat
+
+
+def test_trend_source_follows_bucket_width(db, make_analysis):
+    _seed(
+        db, make_analysis, [(hours, 50 + hours % 10) for hours in range(0, 24 * 60, 6)]
+    )
+
+    short = score_trend(db, URL, START, START + timedelta(days=1), 4)
+    assert short["granularity"] == "raw"
+    assert [point["count"] for point in short["points"]] == [1, 1, 1, 1]
+
+    daily = score_trend(db, URL, START, START + timedelta(days=10), 5)
+    assert daily["granularity"] == "day"
+    assert [point["count"] for point in daily["points"]] == [8] * 5
+
+    weekly = score_trend(db, URL, START, START + timedelta(weeks=8), 4)
+    assert weekly["granularity"] == "week"
+    assert sum(point["count"] for point in weekly["points"]) == 8 * 7 * 4
+    assert len(weekly["points"]) == 4
+    for point in weekly["points"]:
+        assert point["min_score"] == 50 and point["max_score"] == 58
+
+
+def test_trend_skips_empty_buckets_and_other_urls(db, make_analysis):
+    _seed(db, make_analysis, [(1, 70)])
+    trend = score_trend(db, URL, START, START + timedelta(days=30), 30)
+    assert [point["timestamp"] for point in trend["points"]] == [START.isoformat()]
+    assert trend["points"][0]["overall_score"] == 70
+    assert (
+        score_trend(db, URL + "/other", START, START + timedelta(days=30), 30)["points"]
+        == []
+    )
+
+
+def test_rollup_trends_exclude_scores_outside_partial_buckets(db, make_analysis):
+    # Both ends of the range fall inside weeks that have scores outside it
+    day = 24
+    _seed(db, make_analysis, [(1, 10), (2 * day, 90), (15 * day + 1, 30)])
+    trend = score_trend(
+        db, URL, START + timedelta(days=1), START + timedelta(days=15), 2
+    )
+    assert trend["granularity"] == "week"
+    assert [(p["count"], p["overall_score"]) for p in trend["points"]] == [(1, 90)]
+
+
+@pytest.mark.asyncio
+async def test_trend_accepts_timezone_aware_bounds(db, make_analysis):
+    _seed(db, make_analysis, [(1, 70)])
+    # 01:00 in UTC+2 is 23:00 UTC the day before START
+    start = datetime(2026, 1, 5, 1, tzinfo=timezone(timedelta(hours=2)))
+    end = datetime(2026, 1, 6, tzinfo=timezone.utc)
+    response = await get_score_trend(URL, start=start, end=end, points=4, db=db)
+    assert response["data"]["start"] == (START - timedelta(hours=1)).isoformat()
+    assert [point["count"] for point in response["data"]["points"]] == [1]
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import AnonymousUsage
+from app.services.usage import UsageCounterBuffer
+
+
+def test_usage_reads_merge_pending_increments(db):
+    db.add(AnonymousUsage(anonymous_id="anon", analysis_count=2, full_views_used=1))
+    db.commit()
+    buffer = UsageCounterBuffer(cache_size=10)
+
+    buffer.increment("anon")
+    buffer.increment("anon")
+    assert buffer.usage(db, "anon") == {"analysis_count": 4, "full_views_used": 1}
+
+
+def test_flush_applies_atomic_increments_and_creates_rows(db):
+    db.add(AnonymousUsage(anonymous_id="existing", analysis_count=5))
+    db.commit()
+    buffer = UsageCounterBuffer(cache_size=10)
+
+    buffer.increment("existing", 3)
+    buffer.increment("new")
+    assert buffer.flush(db) == 2
+    assert buffer.pending("existing") == 0
+
+    counts = dict(db.query(AnonymousUsage.anonymous_id, AnonymousUsage.analysis_count))
+    assert counts == {"existing": 8, "new": 1}
+    assert buffer.usage(db, "existing")["analysis_count"] == 8
+    assert buffer.flush(db) == 0
+
+
+@pytest.fixture
+def wal_sessions(tmp_path):
+    """Sessions on separate connections to a WAL file database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    event.listen(
+        engine,
+        "connect",
+        lambda conn, _: conn.execute("PRAGMA journal_mode=WAL"),
+    )
+    Base.metadata.create_all(bind=engine)
+    sessions = [Session(engine) for _ in range(2)]
+    try:
+        yield engine, sessions
+    finally:
+        for session in sessions:
+            session.close()
+        engine.dispose()
+
+
+def test_reads_overlapping_a_flush_are_not_cached(wal_sessions):
+    engine, (reader, writer) = wal_sessions
+    writer.add(AnonymousUsage(anonymous_id="anon", analysis_count=2))
+    writer.commit()
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("anon", 3)
+    flushed = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def flush_during_read(conn, cursor, statement, *args):
+        # The read's snapshot predates the flush's commit
+        if "FROM anonymous_usage" in statement and not flushed:
+            flushed.append(buffer.flush(writer))
+
+    buffer.usage(reader, "anon")
+    reader.rollback()
+    assert flushed == [1]
+    assert buffer.usage(reader, "anon")["analysis_count"] == 5
+
+
+def test_overlapping_flushes_keep_in_flight_deltas_counted(wal_sessions):
+    engine, sessions = wal_sessions
+    buffer = UsageCounterBuffer(cache_size=10)
+    buffer.increment("first", 2)
+    writing, resume = threading.Event(), threading.Event()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def pause_first_flush(conn, cursor, statement, *args):
+        if "INTO anonymous_usage" in statement and not writing.is_set():
+            writing.set()
+            resume.wait(5)
+
+    threads = [
+        threading.Thread(target=buffer.flush, args=(session,)) for session in sessions
+    ]
+    threads[0].start()
+    assert writing.wait(5)
+    buffer.increment("second")
+    threads[1].start()
+    time.sleep(0.1)
+    assert buffer.pending("first") == 2
+    resume.set()
+    for thread in threads:
+        thread.join()
+
+    counts = dict(
+        sessions[0].query(AnonymousUsage.anonymous_id, AnonymousUsage.analysis_count)
+    )
+    assert counts == {"first": 2, "second": 1}
+    assert buffer.pending("first") == buffer.pending("second") == 0
@@ -0,0 +1 @@
+"""Maintenance commands for the backend. Run modules with `python -m tools.<name>`."""
@@ -0,0 +1,53 @@
+"""
+Move aged analyses out of the analyses table into monthly Parquet files.
+
+    python -m tools.archive_analyses --days 90
+    python -m tools.archive_analyses --before 2026-01-01 --dry-run
+
+Each archived analysis keeps a summary row in archived_analyses and is still
+served by id from its file under ARCHIVE_DIR. Run it from cron, or set
+ARCHIVE_INTERVAL to run it inside the API process.
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Analysis
+from app.services.retention import archive_analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=settings.archive_after_days)
+    parser.add_argument(
+        "--before", type=datetime.fromisoformat, help="archive up to this date instead"
+    )
+    parser.add_argument("--archive-dir", default=settings.archive_dir)
+    parser.add_argument("--batch", type=int, default=settings.archive_batch_size)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count what would be archived"
+    )
+    args = parser.parse_args()
+    cutoff = args.before or datetime.utcnow() - timedelta(days=args.days)
+
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            count = db.query(Analysis).filter(Analysis.created_at < cutoff).count()
+            print(f"{count} analyses created before {cutoff.date()} would be archived")
+            return
+        started = time.perf_counter()
+        moved = archive_analyses(db, cutoff, args.archive_dir, args.batch)
+        print(
+            f"Archived {moved} analyses created before {cutoff.date()} "
+            f"to {args.archive_dir} in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Train the zstd dictionary for stored result sections and re-encode rows.
+
+    python -m tools.compress_results train --results 5000 --dict-size 65536
+    python -m tools.compress_results migrate --to zstd --batch 500
+    python -m tools.compress_results stats
+
+Train first, then set RESULT_COMPRESSION=zstd so new results use the
+dictionary, and migrate existing rows. `migrate --to none` decodes everything
+back to plain JSON, e.g. before downgrading the schema.
+"""
+
+import argparse
+import time
+
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.compression import ENCODINGS, section_codec
+from app.database import SessionLocal
+from app.models import AnalysisResult, CompressionDictionary
+
+# Every CompressedJSON column on analysis_results
+COLUMNS = AnalysisResult.SECTIONS + ("delta",)
+
+
+def _batches(db, batch: int, limit: int = None):
+    """Result rows with all sections loaded, in hash order"""
+    last_hash, seen = "", 0
+    while limit is None or seen < limit:
+        size = batch if limit is None else min(batch, limit - seen)
+        rows = (
+            db.query(AnalysisResult)
+            .options(undefer("*"))
+            .filter(AnalysisResult.hash > last_hash)
+            .order_by(AnalysisResult.hash)
+            .limit(size)
+            .all()
+        )
+        if not rows:
+            return
+        last_hash = rows[-1].hash
+        seen += len(rows)
+        yield rows
+
+
+def train(args):
+    db = SessionLocal()
+    try:
+        samples = [
+            orjson.dumps(getattr(row, name))
+            for rows in _batches(db, 500, args.results)
+            for row in rows
+            for name in COLUMNS
+            if getattr(row, name) is not None
+        ]
+        if not samples:
+            print("No stored results to train on")
+            return
+        data = section_codec.train(samples, args.dict_size)
+        dict_id = section_codec.add_dictionary(data)
+        db.merge(CompressionDictionary(id=dict_id, data=data, samples=len(samples)))
+        db.commit()
+        print(
+            f"Trained dictionary {dict_id}: {len(data)} bytes "
+            f"from {len(samples)} sections"
+        )
+    finally:
+        db.close()
+
+
+def migrate(args):
+    db = SessionLocal()
+    try:
+        section_codec.load_dictionaries(db)
+        section_codec.compression = args.to
+        started, count = time.perf_counter(), 0
+        for rows in _batches(db, args.batch):
+            for row in rows:
+                for name in COLUMNS:
+                    flag_modified(row, name)
+            db.commit()
+            db.expunge_all()
+            count += len(rows)
+            print(f"Re-encoded {count} results")
+        stats = section_codec.stats()
+        print(
+            f"Done: {count} results as {args.to} in "
+            f"{time.perf_counter() - started:.1f}s, "
+            f"compression ratio {stats['compression_ratio']}"
+        )
+    finally:
+        db.close()
+
+
+def stats(args):
+    db = SessionLocal()
+    try:
+        total = 0
+        for name in COLUMNS:
+            size = db.query(
+                func.coalesce(func.sum(func.length(getattr(AnalysisResult, name))), 0)
+            ).scalar()
+            total += size
+            print(f"{name:>18}: {size:>12,} bytes")
+        print(f"{'total':>18}: {total:>12,} bytes")
+        print(f"{'results':>18}: {db.query(AnalysisResult).count():>12,}")
+        print(f"{'dictionaries':>18}: {db.query(CompressionDictionary).count():>12,}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train", help="train and store a dictionary")
+    train_parser.add_argument("--results", type=int, default=5000)
+    train_parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    train_parser.set_defaults(run=train)
+
+    migrate_parser = commands.add_parser("migrate", help="re-encode stored results")
+    migrate_parser.add_argument("--to", choices=ENCODINGS, default="zstd")
+    migrate_parser.add_argument("--batch", type=int, default=500)
+    migrate_parser.set_defaults(run=migrate)
+
+    stats_parser = commands.add_parser("stats", help="stored section sizes")
+    stats_parser.set_defaults(run=stats)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Stream stored analyses to a file as NDJSON, CSV or Parquet.
+
+    python -m tools.export_analyses --format parquet --output analyses.parquet
+    python -m tools.export_analyses --format csv --anonymous-id abc --since 2026-01-01
+    python -m tools.export_analyses --fields id,url,overall_score,eeat > out.ndjson
+
+Rows are read through a server-side cursor and written one chunk at a time,
+so memory use stays flat however many analyses are exported.
+"""
+
+from datetime import datetime
+import argparse
+import sys
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.export import (
+    EXPORT_FORMATS,
+    check_export_format,
+    export_analyses,
+    parse_export_fields,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--fields", help="comma-separated fields to export")
+    parser.add_argument("--anonymous-id", help="only this user's analyses")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="only analyses from this date"
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.export_chunk_size)
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        check_export_format(args.format)
+        fields = parse_export_fields(args.fields)
+    except ValueError as e:
+        parser.error(str(e))
+
+    db = SessionLocal()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        started, written = time.perf_counter(), 0
+        for data in export_analyses(
+            db, args.format, fields, args.anonymous_id, args.since, args.chunk_size
+        ):
+            out.write(data)
+            written += len(data)
+        out.flush()
+        print(
+            f"Exported {written:,} bytes of {args.format} in "
+            f"{time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+    finally:
+        if args.output:
+            out.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Recompute the per-domain and per-tenant aggregate tables from scratch.
+
+    python -m tools.rebuild_aggregates
+    python -m tools.rebuild_aggregates --batch 5000
+
+The aggregates are kept up to date as analyses are written; rebuild them
+after restoring a backup, editing analyses by hand or changing how they are
+computed. Archived analyses are counted with their overall score only.
+"""
+
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services.aggregates import REBUILD_BATCH_SIZE, rebuild_aggregates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=REBUILD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counted = rebuild_aggregates(db, args.batch)
+        print(
+            f"Rebuilt aggregates from {counted} analyses "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
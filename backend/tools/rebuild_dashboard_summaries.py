@@ -0,0 +1,34 @@
+"""
+Recompute the per-user dashboard summaries from scratch.
+
+    python -m tools.rebuild_dashboard_summaries
+
+The summaries are kept up to date as analyses and usage are written;
+rebuild them after restoring a backup, editing analyses or usage by hand or
+changing how they are computed.
+"""
+
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services.dashboard import rebuild_dashboard_summaries
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[1]).parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        written = rebuild_dashboard_summaries(db)
+        print(
+            f"Rebuilt {written} dashboard summaries "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Rebuild the full-text search index of analysis history from scratch.
+
+    python -m tools.rebuild_search_index
+    python -m tools.rebuild_search_index --batch 5000
+
+The index is kept in sync as analyses are written; rebuild it for databases
+created before it existed without running migrations, or after restoring a
+backup. Archived analyses are indexed by URL only.
+"""
+
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services.search import REBUILD_BATCH_SIZE, rebuild_search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=REBUILD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        indexed = rebuild_search_index(db, args.batch)
+        print(
+            f"Indexed {indexed} analyses for search "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,33 @@ async function getOrCreateAnonymousId() {
     return uuid;
 }
 
+// How often to retry when the API is at capacity, and the longest we wait between tries
+const MAX_BUSY_RETRIES = 2;
+const MAX_RETRY_AFTER_MS = 30000;
+
+// POST to the analyze endpoint, honoring 429 Retry-After when the server is busy
+async function postAnalyze(body, signal) {
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetch(`${LLMO_CONFIG.API.BASE_URL}${LLMO_CONFIG.API.ENDPOINTS.ANALYZE}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(body),
+            signal: signal
+        });
+
+        if (response.status !== 429 || attempt >= MAX_BUSY_RETRIES) {
+            return response;
+        }
+
+        const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+        const delay = Math.min((isNaN(retryAfter) ? 1 : retryAfter) * 1000, MAX_RETRY_AFTER_MS);
+        console.log(`Server busy, retrying in ${delay} ms`);
+        await new Promise(r => setTimeout(r, delay));
+    }
+}
+
 // Analyze URL with timeout and error handling
 async function analyzeUrl(url, anonId) {
     const controller = new AbortController();
@@ -36,18 +63,11 @@ async function analyzeUrl(url, anonId) {
         console.log('Starting analysis for URL:', cleanUrl);
         console.log('Making API request to:', `${LLMO_CONFIG.API.BASE_URL}${LLMO_CONFIG.API.ENDPOINTS.ANALYZE}`);
         
-        const response = await fetch(`${LLMO_CONFIG.API.BASE_URL}${LLMO_CONFIG.API.ENDPOINTS.ANALYZE}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ 
-                url: cleanUrl,
-                anonymous_id: anonId,
-                include_content: true
-            }),
-            signal: controller.signal
-        });
+        const response = await postAnalyze({
+            url: cleanUrl,
+            anonymous_id: anonId,
+            include_content: true
+        }, controller.signal);
         
         clearTimeout(timeoutId);
         
@@ -158,16 +178,10 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
         // Get the anonymous ID first
         getOrCreateAnonymousId().then(anonId => {
             // Make the API request
-            fetch(`${LLMO_CONFIG.API.BASE_URL}${LLMO_CONFIG.API.ENDPOINTS.ANALYZE}`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({ 
-                    url: request.url,
-                    anonymous_id: anonId,
-                    include_content: true
-                })
+            postAnalyze({
+                url: request.url,
+                anonymous_id: anonId,
+                include_content: true
             })
         .then(response => {
             console.log('Received response status:', response.status);